@@ -1,19 +1,187 @@
 # admin.py (na pasta do seu app)
 
+"""Admin das dimensões e da tabela fato, dimensionado para tabelas grandes.
+
+* FKs e riscos usam ``autocomplete_fields``: o formulário mostra só o valor
+  escolhido em vez de um ``<select>`` com todos os usuários/UOs/riscos;
+* ``list_select_related`` traz as dimensões exibidas na listagem no mesmo JOIN;
+* as buscas usam só consultas indexadas (igualdade na PK, prefixo e, para nomes,
+  o índice de trigramas de ``nome_busca`` no PostgreSQL);
+* a contagem da listagem sem filtros vem da estimativa do banco
+  (``EstimatedCountPaginator``) e o total geral não é recontado.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .filters import prefix_filter
 from .models import (
-    DimUser, DimUO, DimCargo, DimLocalAtividade, DimRegimeTrabalho, 
-    DimTipoRequerimento, DimRisk, FactRequerimento
+    DimUser, DimUO, DimCargo, DimLocalAtividade, DimRegimeTrabalho,
+    DimTipoRequerimento, DimRisk, FactRequerimento, FactRequerimentoDiario, search_key,
 )
 
-# Registro de todas as dimensões
-admin.site.register(DimUser)
-admin.site.register(DimUO)
-admin.site.register(DimCargo)
-admin.site.register(DimLocalAtividade)
-admin.site.register(DimRegimeTrabalho)
-admin.site.register(DimTipoRequerimento)
-admin.site.register(DimRisk)
-
-# Registro da Tabela de Fato
-admin.site.register(FactRequerimento)
\ No newline at end of file
+# Abaixo disso a contagem exata é barata e preferível à estimativa.
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+
+def estimated_count(queryset) -> Optional[int]:
+    """Número aproximado de linhas da tabela segundo as estatísticas do banco.
+
+    PostgreSQL: ``pg_class.reltuples`` (atualizado por ``ANALYZE``/autovacuum);
+    SQLite: ``sqlite_stat1`` (só existe depois de ``ANALYZE``). ``None`` se não houver.
+    """
+
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table]
+                )
+                row = cursor.fetchone()
+                return row[0] if row and row[0] >= 0 else None
+            if connection.vendor == "sqlite":
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+                row = cursor.fetchone()
+                return int(row[0].split()[0]) if row else None
+    except DatabaseError:
+        return None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Usa a estimativa do banco para a listagem sem filtros (evita ``COUNT(*)`` na tabela toda)."""
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+# === DIMENSÕES === #
+
+
+@admin.register(DimUser)
+class DimUserAdmin(LargeTableAdmin):
+    list_display = ("matricula", "nome", "uo", "funcao")
+    list_select_related = ("uo",)
+    autocomplete_fields = ("uo",)
+    ordering = ("matricula",)
+    # A busca real está em ``get_search_results``; os campos só habilitam a caixa.
+    search_fields = ("matricula", "nome_busca")
+
+    def get_search_results(self, request, queryset, search_term):
+        """Matrícula por prefixo; nome sem acentos por ``nome_busca`` (trigramas no PostgreSQL)."""
+
+        term = search_key(search_term)
+        if not term:
+            return queryset, False
+        if term.isascii() and term.isdigit():
+            return queryset.filter(prefix_filter("matricula", term)), False
+        return queryset.filter(nome_busca__contains=term), False
+
+
+@admin.register(DimUO)
+class DimUOAdmin(admin.ModelAdmin):
+    list_display = ("codigo", "descricao")
+    search_fields = ("^codigo", "descricao")
+
+
+@admin.register(DimCargo)
+class DimCargoAdmin(admin.ModelAdmin):
+    list_display = ("id", "nome")
+    search_fields = ("nome",)
+
+
+@admin.register(DimLocalAtividade, DimRegimeTrabalho, DimTipoRequerimento)
+class CodigoDescricaoAdmin(admin.ModelAdmin):
+    list_display = ("codigo", "descricao")
+    search_fields = ("^codigo", "descricao")
+
+
+@admin.register(DimRisk)
+class DimRiskAdmin(admin.ModelAdmin):
+    list_display = ("codigo", "subcategoria", "categoria", "descricao")
+    list_filter = ("categoria",)
+    search_fields = ("^codigo", "subcategoria", "descricao")
+
+
+# === TABELA FATO === #
+
+
+class StatusListFilter(admin.SimpleListFilter):
+    """Opções lidas dos agregados diários (o ``DISTINCT`` roda na tabela pequena)."""
+
+    title = "status"
+    parameter_name = "status"
+
+    def lookups(self, request, model_admin):
+        statuses = (
+            FactRequerimentoDiario.objects.order_by("status")
+            .values_list("status", flat=True)
+            .distinct()
+        )
+        return [(status, status) for status in statuses]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(status=self.value())
+        return queryset
+
+
+@admin.register(FactRequerimento)
+class FactRequerimentoAdmin(LargeTableAdmin):
+    list_display = ("req_num", "status", "requerente", "uo", "tipo_requerimento", "data_criacao")
+    list_select_related = ("requerente", "uo", "tipo_requerimento")
+    list_filter = (
+        StatusListFilter,
+        ("data_criacao", admin.DateFieldListFilter),
+        "tipo_requerimento",
+        "regime_trabalho",
+    )
+    autocomplete_fields = (
+        "requerente",
+        "funcionario",
+        "uo",
+        "regime_trabalho",
+        "local_atividade",
+        "tipo_requerimento",
+        "riscos",
+    )
+    readonly_fields = ("data_criacao", "data_modificacao")
+    # Mesma ordem do índice ``fato_req_criacao_num_idx`` (e já é total: inclui a PK).
+    ordering = ("-data_criacao", "req_num")
+    search_fields = ("req_num", "doc_uuid")
+
+    def get_search_results(self, request, queryset, search_term):
+        """Número do requerimento ou matrícula (requerente/funcionário); senão ``doc_uuid``.
+
+        Todas são igualdades cobertas por índice (PK, compostos das FKs, único do UUID).
+        """
+
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.isascii() and term.isdigit():
+            query = Q(requerente_id=term) | Q(funcionario_id=term)
+            if len(term) <= 9:
+                query |= Q(req_num=int(term))
+            return queryset.filter(query), False
+        return queryset.filter(doc_uuid=term), False
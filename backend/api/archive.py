@@ -0,0 +1,138 @@
+"""Arquivamento de requerimentos encerrados fora da tabela fato.
+
+``archive_requerimentos`` move, em lotes transacionais, os requerimentos com
+status encerrado e criados antes da janela de retenção para
+``fato_requerimento_arquivo`` (e seus riscos para
+``fato_requerimento_arquivo_riscos``), excluindo-os da tabela fato. Assim a
+tabela quente e seus índices guardam só o período recente, que é o que a
+listagem, o detalhe e a exportação consultam por padrão; o arquivo só é lido
+quando a API recebe ``incluir_arquivados``.
+
+No PostgreSQL o arquivo é particionado por ano de ``data_criacao``: antes de
+cada lote as partições dos anos envolvidos são criadas (``ensure_partitions``),
+e as consultas ao arquivo com filtro de data leem só as partições do intervalo.
+
+A exclusão no fato é um ``DELETE`` explícito, sem os signals de ``post_delete``:
+eles descontariam cada requerimento dos agregados diários, que devem continuar
+contando os arquivados (``rollups.rebuild`` também soma o arquivo), e
+incrementariam a versão do fato linha a linha. Por isso os agregados ficam como
+estão e as versões do fato e do arquivo são incrementadas uma vez por lote.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Callable, Iterable, Optional, Sequence, Tuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import FactRequerimento, FactRequerimentoArquivo, FactRequerimentoArquivoRisco
+from .versioning import ARCHIVE_TABLE, FACT_TABLE, bump_versions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+RiskLink = FactRequerimento.riscos.through
+FACT_FIELDS = tuple(field.attname for field in FactRequerimento._meta.concrete_fields)
+
+
+# === PARTIÇÕES (PostgreSQL) === #
+
+
+def partition_name(year: int) -> str:
+    return f"{ARCHIVE_TABLE}_{year}"
+
+
+def ensure_partitions(years: Iterable[int]) -> None:
+    """Cria (se faltarem) as partições anuais do arquivo; nada fora do PostgreSQL."""
+
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        for year in sorted(set(years)):
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(year)} "
+                f"PARTITION OF {ARCHIVE_TABLE} "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+
+
+# === ARQUIVAMENTO === #
+
+
+def closed_queryset(cutoff: datetime, statuses: Sequence[str]):
+    """Requerimentos encerrados criados antes de ``cutoff`` (candidatos ao arquivo)."""
+
+    return FactRequerimento.objects.filter(status__in=statuses, data_criacao__lt=cutoff)
+
+
+def _delete_facts(ids: Sequence[int]) -> None:
+    """``DELETE`` dos requerimentos ``ids`` no fato, sem signals (ver o início do módulo)."""
+
+    quote = connection.ops.quote_name
+    table, pk = quote(FACT_TABLE), quote(FactRequerimento._meta.pk.column)
+    step = connection.features.max_query_params or len(ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), step):
+            chunk = ids[start : start + step]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({placeholders})", chunk)
+
+
+def archive_batch(cutoff: datetime, statuses: Sequence[str], batch_size: int) -> Tuple[int, int]:
+    """Move um lote (mais antigos primeiro); devolve ``(requerimentos, ligações)``."""
+
+    with transaction.atomic():
+        rows = list(
+            closed_queryset(cutoff, statuses)
+            .select_for_update()
+            .order_by("data_criacao", "req_num")
+            .values(*FACT_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0, 0
+
+        # A conexão do Django usa UTC, o mesmo fuso dos limites das partições.
+        ensure_partitions(row["data_criacao"].year for row in rows)
+
+        now = timezone.now()
+        FactRequerimentoArquivo.objects.bulk_create(
+            [FactRequerimentoArquivo(arquivado_em=now, **row) for row in rows]
+        )
+        ids = [row["req_num"] for row in rows]
+        links = RiskLink.objects.filter(factrequerimento_id__in=ids)
+        archived_links = FactRequerimentoArquivoRisco.objects.bulk_create(
+            [
+                FactRequerimentoArquivoRisco(req_num=fact_id, risco_id=risk_id)
+                for fact_id, risk_id in links.values_list("factrequerimento_id", "dimrisk_id")
+            ]
+        )
+        links.delete()
+        _delete_facts(ids)
+        # Agregados diários inalterados: os arquivados continuam contando (ver acima).
+        bump_versions(FACT_TABLE, ARCHIVE_TABLE)
+    return len(rows), len(archived_links)
+
+
+def archive_requerimentos(
+    cutoff: datetime,
+    statuses: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[int, int]:
+    """Arquiva todos os candidatos, lote a lote; devolve os totais movidos."""
+
+    facts = links = 0
+    while True:
+        moved, moved_links = archive_batch(cutoff, statuses, batch_size)
+        if not moved:
+            break
+        facts += moved
+        links += moved_links
+        if progress is not None:
+            progress(facts, links)
+    logger.info("Arquivamento: %d requerimentos e %d ligações com riscos.", facts, links)
+    return facts, links
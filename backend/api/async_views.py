@@ -0,0 +1,106 @@
+"""Caminho de leitura assíncrono (ASGI) para os ViewSets da API.
+
+Com ``API_ASYNC_READS`` ligado, as rotas de ``list``/``retrieve`` dos ViewSets
+com ``AsyncReadMixin`` viram views ``async``: pedidos GET/HEAD que aceitam JSON
+são atendidos por ``alist``/``aretrieve`` no loop de eventos, com o ORM e o
+cache assíncronos do Django; os demais métodos (e o navegador de API em HTML)
+seguem para o ViewSet síncrono via ``sync_to_async``. Autenticação, permissões,
+negociação de conteúdo e tratamento de erros continuam sendo os do DRF.
+
+Observação: até o Django ter drivers de banco assíncronos, cada consulta do ORM
+assíncrono ainda roda numa thread dedicada; o ganho está em não prender uma
+thread do servidor enquanto a requisição espera cache, banco ou o cliente, e em
+sobrepor esperas independentes com ``asyncio.gather``.
+"""
+
+from __future__ import annotations
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+READ_METHODS = ("GET", "HEAD")
+
+
+class AsyncReadMixin:
+    """``alist``/``aretrieve`` assíncronos, ligados às rotas por ``as_view``."""
+
+    async_actions = {"list": "alist", "retrieve": "aretrieve"}
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        read_action = (actions or {}).get("get")
+        if not getattr(settings, "API_ASYNC_READS", False) or read_action not in cls.async_actions:
+            return view
+
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method not in READ_METHODS:
+                return await sync_view(request, *args, **kwargs)
+            return await cls(**initkwargs).adispatch(
+                actions, read_action, request, *args, **kwargs
+            )
+
+        for attribute in ("cls", "initkwargs", "actions", "csrf_exempt"):
+            setattr(async_view, attribute, getattr(view, attribute, None))
+        async_view.__name__ = view.__name__
+        return async_view
+
+    async def adispatch(self, actions, read_action, request, *args, **kwargs):
+        """Equivalente assíncrono de ``ViewSetMixin.view`` + ``APIView.dispatch``."""
+
+        self.action_map = actions
+        for method, action in actions.items():
+            setattr(self, method, getattr(self, action))
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+            if request.accepted_renderer.format == "json":
+                handler = getattr(self, self.async_actions[read_action])
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(getattr(self, read_action))(
+                    request, *args, **kwargs
+                )
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        response = self.finalize_response(request, response, *args, **kwargs)
+        if request.accepted_renderer.format == "json" and hasattr(response, "render"):
+            # JSON não consulta o banco; renderizar aqui evita um salto para thread.
+            response.render()
+        return response
+
+    # === IMPLEMENTAÇÃO PADRÃO (sem paginação) === #
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = [instance async for instance in queryset]
+        return Response(self.get_serializer(rows, many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            ).afirst()
+        except (TypeError, ValueError, DjangoValidationError):
+            instance = None
+        if instance is None:
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
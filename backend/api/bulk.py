@@ -0,0 +1,165 @@
+"""Criação em lote de requerimentos com validação de chaves por conjunto.
+
+Em vez de uma consulta por ``PrimaryKeyRelatedField`` e por risco em cada
+linha, as chaves de todas as linhas são reunidas e conferidas no cache de
+dimensões (``api.dimension_cache``), que só vai ao banco para as ausentes,
+com um único ``IN`` por dimensão. Os fatos válidos entram com ``bulk_create``
+e as linhas da tabela de ligação dos riscos num único lote. Linhas inválidas
+são devolvidas com seus erros sem impedir a gravação das demais, inclusive as
+que só se tornam inválidas por uma gravação concorrente (ver ``create_requerimentos``).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from django.db import IntegrityError, transaction
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from . import rollups
+from .dimension_cache import dimension_cache
+from .models import (
+    DimLocalAtividade,
+    DimRegimeTrabalho,
+    DimRisk,
+    DimTipoRequerimento,
+    DimUO,
+    DimUser,
+    FactRequerimento,
+)
+from .serializers import FactRequerimentoBulkRowSerializer
+from .versioning import FACT_TABLE, bump_versions
+
+# campo de entrada -> (atributo FK no fato, dimensão)
+KEY_FIELDS = {
+    "requerente_matricula": ("requerente_id", DimUser),
+    "funcionario_matricula": ("funcionario_id", DimUser),
+    "uo_codigo": ("uo_id", DimUO),
+    "regime_trabalho_codigo": ("regime_trabalho_id", DimRegimeTrabalho),
+    "local_atividade_codigo": ("local_atividade_id", DimLocalAtividade),
+    "tipo_requerimento_codigo": ("tipo_requerimento_id", DimTipoRequerimento),
+}
+DOES_NOT_EXIST = PrimaryKeyRelatedField.default_error_messages["does_not_exist"]
+
+Created = Tuple[int, int]
+RowErrors = Tuple[int, Dict[str, List[str]]]
+
+
+def _existing_keys(valid_rows: Dict[int, dict], fresh: bool = False) -> Dict[type, Set]:
+    """Chaves das dimensões citadas em ``valid_rows`` que existem.
+
+    ``fresh`` consulta o banco em vez do cache de dimensões (que pode ainda ter
+    uma linha apagada por outra transação).
+    """
+
+    wanted: Dict[type, Set] = defaultdict(set)
+    for data in valid_rows.values():
+        for field, (_, model) in KEY_FIELDS.items():
+            wanted[model].add(data[field])
+        wanted[DimRisk].update(data["riscos_ids"])
+
+    if fresh:
+        return {
+            model: set(model.objects.filter(pk__in=keys).values_list("pk", flat=True))
+            for model, keys in wanted.items()
+            if keys
+        }
+    return {model: dimension_cache.existing(model, keys) for model, keys in wanted.items() if keys}
+
+
+def _taken_uuids(valid_rows: Dict[int, dict]) -> Set[str]:
+    uuids = [data["doc_uuid"] for data in valid_rows.values()]
+    return set(
+        FactRequerimento.objects.filter(doc_uuid__in=uuids).values_list("doc_uuid", flat=True)
+    )
+
+
+def _build_facts(
+    valid_rows: Dict[int, dict], fresh: bool = False
+) -> Tuple[List[Tuple[int, FactRequerimento, List[int]]], List[RowErrors]]:
+    """Confere as chaves e os ``doc_uuid`` e monta os fatos das linhas aprovadas."""
+
+    existing = _existing_keys(valid_rows, fresh)
+    taken_uuids = _taken_uuids(valid_rows)
+
+    facts: List[Tuple[int, FactRequerimento, List[int]]] = []
+    errors: List[RowErrors] = []
+    for index, data in valid_rows.items():
+        row_errors: Dict[str, List[str]] = {}
+        for field, (_, model) in KEY_FIELDS.items():
+            if data[field] not in existing.get(model, ()):
+                row_errors[field] = [DOES_NOT_EXIST.format(pk_value=data[field])]
+        missing_risks = [pk for pk in data["riscos_ids"] if pk not in existing.get(DimRisk, ())]
+        if missing_risks:
+            row_errors["riscos_ids"] = [DOES_NOT_EXIST.format(pk_value=pk) for pk in missing_risks]
+        if data["doc_uuid"] in taken_uuids:
+            row_errors["doc_uuid"] = ["Já existe um requerimento com este doc_uuid."]
+
+        if row_errors:
+            errors.append((index, row_errors))
+            continue
+
+        taken_uuids.add(data["doc_uuid"])
+        attributes = {
+            key: value
+            for key, value in data.items()
+            if key not in KEY_FIELDS and key != "riscos_ids"
+        }
+        for field, (attribute, _) in KEY_FIELDS.items():
+            attributes[attribute] = data[field]
+        facts.append((index, FactRequerimento(**attributes), sorted(set(data["riscos_ids"]))))
+    return facts, errors
+
+
+def _insert(facts: List[Tuple[int, FactRequerimento, List[int]]], batch_size: int) -> None:
+    Through = FactRequerimento.riscos.through
+    with transaction.atomic():
+        FactRequerimento.objects.bulk_create([fact for _, fact, _ in facts], batch_size)
+        Through.objects.bulk_create(
+            [
+                Through(factrequerimento_id=fact.pk, dimrisk_id=risk_id)
+                for _, fact, risk_ids in facts
+                for risk_id in risk_ids
+            ],
+            batch_size,
+        )
+        rollups.add_facts(rollups.fact_values(fact) for _, fact, _ in facts)
+        bump_versions(FACT_TABLE)
+
+
+def create_requerimentos(
+    rows: List[dict], batch_size: int = 500
+) -> Tuple[List[Created], List[RowErrors]]:
+    """Cria os requerimentos válidos de ``rows``.
+
+    Retorna ``[(índice, req_num)]`` dos criados e ``[(índice, erros)]`` dos rejeitados.
+    Se outra transação gravar um dos ``doc_uuid`` ou apagar uma dimensão citada entre
+    a conferência e o ``INSERT``, as linhas são conferidas de novo direto no banco e
+    as aprovadas são gravadas numa segunda tentativa; um novo ``IntegrityError`` nela
+    é propagado.
+    """
+
+    errors: List[RowErrors] = []
+    valid: Dict[int, dict] = {}
+    for index, row in enumerate(rows):
+        serializer = FactRequerimentoBulkRowSerializer(data=row)
+        if serializer.is_valid():
+            valid[index] = serializer.validated_data
+        else:
+            errors.append((index, serializer.errors))
+
+    facts, rejected = _build_facts(valid)
+    errors.extend(rejected)
+    if facts:
+        try:
+            _insert(facts, batch_size)
+        except IntegrityError:
+            approved = {index: valid[index] for index, _, _ in facts}
+            facts, rejected = _build_facts(approved, fresh=True)
+            errors.extend(rejected)
+            if facts:
+                _insert(facts, batch_size)
+
+    errors.sort(key=lambda item: item[0])
+    return [(index, fact.pk) for index, fact, _ in facts], errors
@@ -0,0 +1,62 @@
+"""Pacote único com as tabelas de lookup usadas pelo formulário de requerimento.
+
+O JSON é montado uma vez por versão das dimensões, comprimido com gzip e
+guardado no cache (as versões antigas expiram com ``API_RESPONSE_CACHE_TIMEOUT``);
+enquanto nenhuma dimensão muda, a ETag é a mesma e os clientes recebem
+``304 Not Modified`` sem que nenhuma tabela seja lida.
+"""
+
+from __future__ import annotations
+
+import gzip
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from .caching import response_cache_timeout
+from .models import (
+    DimLocalAtividade,
+    DimRegimeTrabalho,
+    DimTipoRequerimento,
+    DimUO,
+)
+from .serializers import (
+    DimLocalAtividadeSerializer,
+    DimRegimeTrabalhoSerializer,
+    DimTipoRequerimentoSerializer,
+    DimUOSerializer,
+)
+from .versioning import versions_etag
+
+# (chave no pacote, modelo, serializer) — mesmas chaves das rotas individuais.
+# DimUser fica de fora: o formulário resolve usuários sob demanda em ``users/search/``;
+# os riscos vêm já agrupados de ``riscos/tree/`` (ver ``api.risk_tree``).
+BUNDLE_SECTIONS = (
+    ("locais", DimLocalAtividade, DimLocalAtividadeSerializer),
+    ("tipos_req", DimTipoRequerimento, DimTipoRequerimentoSerializer),
+    ("regimes", DimRegimeTrabalho, DimRegimeTrabalhoSerializer),
+    ("uos", DimUO, DimUOSerializer),
+)
+BUNDLE_TABLES = tuple(model._meta.db_table for _, model, _ in BUNDLE_SECTIONS)
+
+
+def bundle_etag() -> str:
+    return versions_etag("dimensions", BUNDLE_TABLES)
+
+
+def build_bundle(etag: str) -> bytes:
+    data = {"version": etag.strip('"')}
+    for name, model, serializer_class in BUNDLE_SECTIONS:
+        data[name] = serializer_class(model.objects.all(), many=True).data
+    return JSONRenderer().render(data)
+
+
+def get_compressed_bundle(etag: str) -> bytes:
+    """Pacote comprimido da versão ``etag``, montado apenas na primeira requisição."""
+
+    key = f"dimensions-bundle:{etag}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = gzip.compress(build_bundle(etag))
+        cache.set(key, payload, timeout=response_cache_timeout())
+    return payload
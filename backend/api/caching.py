@@ -0,0 +1,188 @@
+"""Cache de respostas e GET condicional nos ViewSets, versionados por tabela.
+
+A chave de cada resposta e sua ETag derivam da versão (``TableVersion``) das
+tabelas que ela lê. Qualquer gravação (signals dos modelos ou cargas dos CSVs)
+incrementa a versão: a próxima requisição cai numa chave nova e a ETag muda;
+as entradas antigas expiram sozinhas. Como as versões também são lidas pelo
+cache (``cached_versions``), uma resposta repetida não consulta o banco, e um
+``If-None-Match`` válido é respondido com 304 antes de montar o queryset.
+
+O armazenamento é o cache ``default`` do Django (ver ``CACHES`` nas settings).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from .versioning import (
+    acached_versions,
+    aversions_validators,
+    cached_versions,
+    versions_validators,
+)
+
+RESPONSE_CACHE_PREFIX = "api-response"
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+Validators = Tuple[str, Optional[datetime]]
+
+
+def response_cache_timeout() -> int:
+    """Validade (s) das entradas versionadas: as de versões antigas somem sozinhas."""
+
+    return getattr(settings, "API_RESPONSE_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+
+class VersionedViewMixin:
+    """Declara de quais tabelas dependem as respostas do ViewSet.
+
+    ``version_tables`` padrão: a tabela do modelo do ``queryset``; declare também as
+    tabelas lidas por serializers aninhados (ex.: a UO exibida junto do usuário).
+    """
+
+    version_tables: Tuple[str, ...] = ()
+
+    def get_version_tables(self) -> Tuple[str, ...]:
+        return self.version_tables or (self.queryset.model._meta.db_table,)
+
+
+class VersionedResponseCacheMixin(VersionedViewMixin):
+    """Guarda ``response.data`` de ``list``/``retrieve`` enquanto as tabelas não mudam."""
+
+    def _response_cache_key(self, request, versions) -> str:
+        fingerprint = "|".join(
+            f"{table}:{versao}" for table, (versao, _) in sorted(versions.items())
+        )
+        digest = hashlib.sha1(f"{fingerprint}|{request.get_full_path()}".encode()).hexdigest()
+        return f"{RESPONSE_CACHE_PREFIX}:{self.basename}:{self.action}:{digest}"
+
+    def get_response_cache_key(self, request) -> str:
+        return self._response_cache_key(request, cached_versions(self.get_version_tables()))
+
+    def cached_response(self, request, handler: Callable[..., Response], *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=response_cache_timeout())
+        return response
+
+    async def acached_response(self, request, handler: Callable[..., Awaitable], *args, **kwargs):
+        versions = await acached_versions(self.get_version_tables())
+        key = self._response_cache_key(request, versions)
+        data = await cache.aget(key)
+        if data is not None:
+            return Response(data)
+
+        response = await handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            await cache.aset(key, response.data, timeout=response_cache_timeout())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+
+class ConditionalGetMixin(VersionedViewMixin):
+    """``ETag``/``Last-Modified`` em ``list``/``retrieve`` a partir das versões das tabelas.
+
+    Deve vir antes de ``VersionedResponseCacheMixin`` nas bases, para que o 304 seja
+    decidido antes de consultar o cache de respostas.
+    """
+
+    def get_validators_prefix(self, request) -> str:
+        return f"{self.basename}-{self.action}-{request.accepted_renderer.format}"
+
+    def get_validators(self, request, tables: Iterable[str] | None = None) -> Optional[Validators]:
+        """``(etag, última modificação)`` da resposta, ou ``None`` para não validar."""
+
+        return versions_validators(
+            self.get_validators_prefix(request), tables or self.get_version_tables()
+        )
+
+    async def aget_validators(
+        self, request, tables: Iterable[str] | None = None
+    ) -> Optional[Validators]:
+        return await aversions_validators(
+            self.get_validators_prefix(request), tables or self.get_version_tables()
+        )
+
+    def conditional_response(
+        self,
+        request,
+        handler: Callable[..., Response],
+        *args,
+        validators: Optional[Validators] = None,
+        **kwargs,
+    ):
+        """Responde 304 se o cliente já tem a versão atual; senão chama ``handler``."""
+
+        if validators is None:
+            validators = self.get_validators(request)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        response = self._not_modified(request, validators)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return self._add_validators(response, validators)
+
+    async def aconditional_response(
+        self,
+        request,
+        handler: Callable[..., Awaitable],
+        *args,
+        validators: Optional[Validators] = None,
+        **kwargs,
+    ):
+        if validators is None:
+            validators = await self.aget_validators(request)
+        if validators is None:
+            return await handler(request, *args, **kwargs)
+
+        response = self._not_modified(request, validators)
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+        return self._add_validators(response, validators)
+
+    @staticmethod
+    def _not_modified(request, validators: Validators):
+        etag, modified = validators
+        return get_conditional_response(
+            request._request,
+            etag=etag,
+            last_modified=int(modified.timestamp()) if modified else None,
+        )
+
+    @staticmethod
+    def _add_validators(response, validators: Validators):
+        if response.status_code not in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            return response
+        etag, modified = validators
+        response["ETag"] = etag
+        if modified is not None:
+            response["Last-Modified"] = http_date(int(modified.timestamp()))
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
@@ -0,0 +1,320 @@
+"""Exportação colunar (Parquet / Arrow IPC) do esquema estrela para análise.
+
+Cada tabela — as dimensões, o fato e a ponte ``fato_requerimento_riscos`` — é
+lida com ``values_list().iterator(chunk_size)`` e gravada em *record batches*,
+um por fatia, de modo que a memória não depende do tamanho da tabela.
+
+No diretório de saída cada tabela vira uma pasta de partes (``part-*.parquet``
+ou ``part-*.arrows``) e ``_watermark.json`` guarda o estado da última exportação.
+No modo incremental:
+
+* fato e ponte recebem uma parte nova só com os requerimentos criados ou
+  alterados desde a marca d'água (``data_modificacao``; mudanças nos riscos
+  também atualizam esse campo), recuada de ``WATERMARK_OVERLAP``: uma transação
+  iniciada antes da leitura da marca e confirmada depois grava uma
+  ``data_modificacao`` menor que a marca e, sem a sobreposição, nunca seria
+  exportada. Os requerimentos da janela já exportados e não alterados desde
+  então (``recentes`` no arquivo da marca) ficam de fora. Uma linha pode
+  reaparecer em partes posteriores: vale a de maior ``data_modificacao`` e, na
+  ponte, o conjunto de riscos da parte mais recente do requerimento. Exclusões
+  não são propagadas;
+* cada dimensão é regravada inteira apenas quando sua versão em
+  ``TableVersion`` mudou.
+
+``pyarrow`` é dependência opcional: sem ele, ``available()`` é falso e o comando
+e o endpoint recusam a exportação.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Tuple
+
+from django.db.models import Max, Model
+from django.utils import timezone
+
+from .loaders import iter_chunks
+from .models import FactRequerimento
+from .versioning import DIMENSION_MODELS, FACT_TABLE, get_versions
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = pq = None
+
+FORMATS = {"parquet": "parquet", "arrow": "arrows"}
+DEFAULT_CHUNK_SIZE = 50_000
+WATERMARK_FILE = "_watermark.json"
+# Recuo da marca d'água: maior que a transação mais longa que grava no fato.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+RiskLink = FactRequerimento.riscos.through
+BRIDGE_TABLE = RiskLink._meta.db_table
+
+TABLES: Dict[str, Tuple[type, Tuple[str, ...]]] = {
+    **{model._meta.db_table: (model, ()) for model in DIMENSION_MODELS},
+    FACT_TABLE: (FactRequerimento, ()),
+    BRIDGE_TABLE: (RiskLink, ("id",)),
+}
+
+# Tipos Arrow por tipo interno do Django; os demais campos viram texto.
+ARROW_TYPES = {
+    "AutoField": "int64",
+    "BigAutoField": "int64",
+    "IntegerField": "int64",
+    "BigIntegerField": "int64",
+    "SmallIntegerField": "int64",
+    "PositiveIntegerField": "int64",
+    "FloatField": "float64",
+    "BooleanField": "bool_",
+    "DateField": "date32",
+}
+
+
+def available() -> bool:
+    return pa is not None
+
+
+# === ESQUEMA E LOTES === #
+
+
+def _arrow_type(field):
+    if field.is_relation:
+        return _arrow_type(field.target_field)
+    internal = field.get_internal_type()
+    if internal == "DateTimeField":
+        return pa.timestamp("us", tz="UTC")
+    return getattr(pa, ARROW_TYPES.get(internal, "string"))()
+
+
+def table_schema(table: str):
+    model, excluded = TABLES[table]
+    return pa.schema(
+        [
+            (field.attname, _arrow_type(field))
+            for field in model._meta.concrete_fields
+            if field.attname not in excluded
+        ]
+    )
+
+
+def table_queryset(table: str, since: Optional[datetime] = None, skip: Collection[int] = ()):
+    """Linhas da tabela em ordem de PK; ``since`` filtra fato e ponte pela modificação.
+
+    ``skip``: requerimentos deixados de fora do fato e da ponte (já exportados).
+    """
+
+    model: type[Model] = TABLES[table][0]
+    queryset = model.objects.order_by("pk")
+    if table == FACT_TABLE:
+        if since is not None:
+            queryset = queryset.filter(data_modificacao__gte=since)
+        if skip:
+            queryset = queryset.exclude(pk__in=skip)
+    elif table == BRIDGE_TABLE:
+        if since is not None:
+            queryset = queryset.filter(factrequerimento__data_modificacao__gte=since)
+        if skip:
+            queryset = queryset.exclude(factrequerimento_id__in=skip)
+    return queryset
+
+
+def iter_batches(table: str, since=None, chunk_size=DEFAULT_CHUNK_SIZE, skip=()):
+    schema = table_schema(table)
+    queryset = table_queryset(table, since, skip)
+    rows = queryset.values_list(*schema.names).iterator(chunk_size=chunk_size)
+    for chunk in iter_chunks(rows, chunk_size):
+        columns = zip(*chunk)
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        )
+
+
+def write_batches(
+    table: str, sink, fmt: str, since=None, chunk_size=DEFAULT_CHUNK_SIZE, skip=()
+):
+    """Grava a tabela em ``sink``, produzindo o total de linhas após cada lote."""
+
+    schema = table_schema(table)
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    total = 0
+    try:
+        for batch in iter_batches(table, since, chunk_size, skip):
+            writer.write_batch(batch)
+            total += batch.num_rows
+            yield total
+    finally:
+        writer.close()
+
+
+# === ENDPOINT (streaming) === #
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino em memória esvaziado a cada lote, para enviar a resposta aos poucos."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_table(table: str, fmt: str, since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    sink = _ChunkSink()
+    for _ in write_batches(table, sink, fmt, since, chunk_size):
+        data = sink.drain()
+        if data:
+            yield data
+    yield sink.drain()
+
+
+# === EXPORTAÇÃO PARA DIRETÓRIO === #
+
+
+def read_watermark(output: Path) -> Optional[Dict]:
+    path = output / WATERMARK_FILE
+    if not path.exists():
+        return None
+    state = json.loads(path.read_text())
+    state["data_modificacao"] = (
+        datetime.fromisoformat(state["data_modificacao"]) if state["data_modificacao"] else None
+    )
+    return state
+
+
+def _recent_modifications(watermark: Optional[datetime], skipped: Dict[str, str]):
+    """``{req_num: data_modificacao}`` exportados na janela de sobreposição da marca.
+
+    Lidos antes da cópia, então já estavam confirmados e a cópia traz essa versão
+    (ou uma mais nova). Os ``skipped`` ficam fora da cópia e guardam a versão da
+    exportação anterior: se mudaram nesse meio tempo, a próxima os inclui.
+    """
+
+    if watermark is None:
+        return {}
+    rows = FactRequerimento.objects.filter(
+        data_modificacao__gte=watermark - WATERMARK_OVERLAP
+    ).values_list("pk", "data_modificacao")
+    return {
+        str(pk): skipped.get(str(pk), modified.isoformat()) for pk, modified in rows.iterator()
+    }
+
+
+def _incremental_window(state: Dict) -> Tuple[Optional[datetime], Dict[str, str]]:
+    """Início da parte incremental e os requerimentos da janela sem mudança desde a anterior."""
+
+    if state["data_modificacao"] is None:
+        return None, {}
+    recent = state.get("recentes", {})
+    current = FactRequerimento.objects.filter(pk__in=[int(pk) for pk in recent]).values_list(
+        "pk", "data_modificacao"
+    )
+    skipped = {
+        str(pk): recent[str(pk)]
+        for pk, modified in current
+        if recent[str(pk)] == modified.isoformat()
+    }
+    return state["data_modificacao"] - WATERMARK_OVERLAP, skipped
+
+
+def _write_part(
+    output: Path, table: str, fmt: str, stamp: str, since, replace: bool, chunk_size, skip=()
+):
+    directory = output / table
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"part-{stamp}.{FORMATS[fmt]}"
+    rows = 0
+    with open(target, "wb") as sink:
+        for rows in write_batches(table, sink, fmt, since, chunk_size, skip):
+            pass
+    if replace:
+        for old in directory.glob("part-*"):
+            if old != target:
+                old.unlink()
+    return rows
+
+
+def export_star_schema(
+    output: Path, fmt: str = "parquet", incremental: bool = False, chunk_size=DEFAULT_CHUNK_SIZE
+) -> Dict[str, Optional[int]]:
+    """Exporta as tabelas para ``output``; devolve as linhas gravadas por tabela.
+
+    Tabelas puladas no modo incremental (dimensão sem mudança) aparecem com ``None``.
+    """
+
+    output = Path(output)
+    state = read_watermark(output) if incremental else None
+    if state is not None and state.get("format") != fmt:
+        raise ValueError(f"A exportação existente está em {state.get('format')}, não em {fmt}.")
+
+    since, skipped = _incremental_window(state) if state else (None, {})
+    versions = {table: versao for table, (versao, _) in get_versions(TABLES).items()}
+    # Lida antes da cópia: o que mudar durante a exportação volta na próxima.
+    watermark = FactRequerimento.objects.aggregate(Max("data_modificacao"))[
+        "data_modificacao__max"
+    ]
+    if state and state["data_modificacao"]:
+        # Arquivar ou excluir os mais recentes não pode fazer a marca recuar.
+        watermark = max(filter(None, (watermark, state["data_modificacao"])))
+    recent = _recent_modifications(watermark, skipped)
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+
+    written: Dict[str, Optional[int]] = {}
+    for table in TABLES:
+        if table in (FACT_TABLE, BRIDGE_TABLE):
+            written[table] = _write_part(
+                output,
+                table,
+                fmt,
+                stamp,
+                since,
+                replace=state is None,
+                chunk_size=chunk_size,
+                skip=[int(pk) for pk in skipped],
+            )
+        elif state is None or state["versions"].get(table) != versions.get(table, 0):
+            written[table] = _write_part(
+                output, table, fmt, stamp, None, replace=True, chunk_size=chunk_size
+            )
+        else:
+            written[table] = None
+
+    (output / WATERMARK_FILE).write_text(
+        json.dumps(
+            {
+                "format": fmt,
+                "data_modificacao": watermark.isoformat() if watermark else None,
+                "recentes": recent,
+                "versions": {table: versions.get(table, 0) for table in TABLES},
+                "exported_at": timezone.now().isoformat(),
+            },
+            indent=2,
+        )
+    )
+    return written
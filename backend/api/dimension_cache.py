@@ -0,0 +1,126 @@
+"""Cache em memória (por processo) das linhas de dimensão usadas na validação.
+
+As dimensões só mudam quando a carga dos CSVs ou o admin rodam, mas cada
+gravação no fato validava suas chaves com uma consulta por campo. Aqui cada
+tabela é carregada inteira uma vez e guardada junto com a versão de
+``TableVersion`` em que foi lida. A validade é conferida lendo as versões de
+todas as dimensões numa única consulta, no máximo uma vez a cada
+``DIMENSION_CACHE_VERSION_TTL`` segundos; os signals de ``post_save``/
+``post_delete`` descartam a tabela alterada no próprio processo na hora.
+
+Uma chave ausente da memória é procurada no banco antes de ser recusada, de
+modo que linhas criadas por outro worker dentro da janela do TTL não geram
+erros de validação; chaves removidas nessa janela ainda são barradas pela
+restrição de FK ao gravar.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple, Type
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Model, QuerySet
+
+from .versioning import DIMENSION_TABLES, get_versions
+
+DEFAULT_VERSION_TTL = 1.0
+
+# Relações lidas pelos serializers de resposta (evita uma consulta por linha).
+SELECT_RELATED = {"dim_user": ("uo",)}
+
+
+class DimensionCache:
+    """Linhas das dimensões indexadas pela PK, recarregadas quando a versão muda."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._tables: Dict[str, Tuple[int, Dict[Any, Model]]] = {}
+        self._versions: Dict[str, int] = {}
+        self._checked_at = float("-inf")
+
+    # --- versões --- #
+
+    def _current_versions(self) -> Dict[str, int]:
+        ttl = getattr(settings, "DIMENSION_CACHE_VERSION_TTL", DEFAULT_VERSION_TTL)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at >= ttl:
+                self._versions = {
+                    table: versao for table, (versao, _) in get_versions(DIMENSION_TABLES).items()
+                }
+                self._checked_at = now
+            return self._versions
+
+    def invalidate(self, model: Optional[Type[Model]] = None) -> None:
+        """Descarta ``model`` (ou tudo) e força reler as versões no próximo acesso."""
+
+        with self._lock:
+            if model is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(model._meta.db_table, None)
+            self._checked_at = float("-inf")
+
+    # --- leitura --- #
+
+    @staticmethod
+    def _queryset(model: Type[Model]) -> QuerySet:
+        return model.objects.select_related(*SELECT_RELATED.get(model._meta.db_table, ()))
+
+    def rows(self, model: Type[Model]) -> Dict[Any, Model]:
+        """``{pk: instância}`` da dimensão, na versão corrente."""
+
+        table = model._meta.db_table
+        version = self._current_versions().get(table, 0)
+        with self._lock:
+            cached = self._tables.get(table)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            # A versão é lida antes das linhas: se algo mudar no meio, a próxima
+            # conferência vê uma versão nova e recarrega (nunca o contrário).
+            rows = {instance.pk: instance for instance in self._queryset(model)}
+            self._tables[table] = (version, rows)
+            return rows
+
+    @staticmethod
+    def to_pk(model: Type[Model], value: Any) -> Any:
+        """Converte ``value`` para o tipo da PK; ``ValueError`` se não for possível."""
+
+        if isinstance(value, bool):
+            raise ValueError(value)
+        try:
+            return model._meta.pk.to_python(value)
+        except (TypeError, DjangoValidationError) as exc:
+            raise ValueError(value) from exc
+
+    def get(self, model: Type[Model], pk: Any) -> Optional[Model]:
+        rows = self.rows(model)
+        instance = rows.get(pk)
+        if instance is None:
+            instance = self._queryset(model).filter(pk=pk).first()
+            if instance is not None:
+                with self._lock:
+                    rows[instance.pk] = instance
+        return instance
+
+    def existing(self, model: Type[Model], keys: Iterable[Any]) -> Set[Any]:
+        """Subconjunto de ``keys`` presente na dimensão (faltantes conferidos num único IN)."""
+
+        rows = self.rows(model)
+        keys = set(keys)
+        found = keys & rows.keys()
+        missing = keys - found
+        if missing:
+            late = {
+                instance.pk: instance for instance in self._queryset(model).filter(pk__in=missing)
+            }
+            with self._lock:
+                rows.update(late)
+            found |= late.keys()
+        return found
+
+
+dimension_cache = DimensionCache()
@@ -0,0 +1,155 @@
+"""Exportação em streaming da tabela fato (CSV e NDJSON).
+
+As linhas saem de ``.values()`` com ``iterator(chunk_size)`` (cursor no servidor
+no PostgreSQL, ``fetchmany`` no SQLite) e são escritas conforme são lidas, de modo
+que a memória não cresce com o tamanho da tabela. Os rótulos das dimensões vêm
+dos JOINs da listagem plana e os códigos de risco de uma consulta por fatia.
+
+Com o arquivo (``incluir_arquivados``), fato e arquivo são lidos em paralelo e
+intercalados pela ordenação da consulta, com a coluna ``arquivado``.
+"""
+
+from __future__ import annotations
+
+import csv
+import heapq
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Value
+
+from . import search
+from .loaders import iter_chunks
+from .models import FactRequerimento, FactRequerimentoArquivoRisco
+from .serializers import FactRequerimentoFlatSerializer
+
+DEFAULT_CHUNK_SIZE = 2000
+# Mesmo separador dos arquivos base (dimRisk.csv/dimUser.csv).
+CSV_DELIMITER = ";"
+RISK_SEPARATOR = "|"
+
+EXPORT_COLUMNS = (
+    *FactRequerimentoFlatSerializer.fields,
+    *FactRequerimentoFlatSerializer.related_fields,
+    "riscos",
+)
+
+
+def export_columns(queryset, archived: bool = False) -> Tuple[str, ...]:
+    """Colunas da exportação de ``queryset``.
+
+    Com ``?search=`` entram ``relevancia`` e ``destaque`` (a ordem padrão é a da
+    relevância); ``arquivado`` só quando o arquivo entra.
+    """
+
+    searched = tuple(name for name in search.ANNOTATIONS if name in queryset.query.annotations)
+    return (*EXPORT_COLUMNS, *searched, *(("arquivado",) if archived else ()))
+
+
+def _risk_codes(fact_ids: List[int], archived: bool = False) -> Dict[int, List[str]]:
+    codes: Dict[int, List[str]] = defaultdict(list)
+    if archived:
+        links = (
+            FactRequerimentoArquivoRisco.objects.filter(req_num__in=fact_ids)
+            .order_by("req_num", "risco__codigo")
+            .values_list("req_num", "risco__codigo")
+        )
+    else:
+        links = (
+            FactRequerimento.riscos.through.objects.filter(factrequerimento_id__in=fact_ids)
+            .order_by("factrequerimento_id", "dimrisk__codigo")
+            .values_list("factrequerimento_id", "dimrisk__codigo")
+        )
+    for fact_id, codigo in links:
+        if codigo not in codes[fact_id]:
+            codes[fact_id].append(codigo)
+    return codes
+
+
+def _flat_rows(queryset, chunk_size: int, archived: bool, **extra) -> Iterator[Dict]:
+    rows = FactRequerimentoFlatSerializer.values(queryset, **extra).iterator(
+        chunk_size=chunk_size
+    )
+    for chunk in iter_chunks(rows, chunk_size):
+        codes = _risk_codes([row["req_num"] for row in chunk], archived)
+        for row in chunk:
+            row["riscos"] = codes.get(row["req_num"], [])
+            yield row
+
+
+class _SortKey:
+    """Chave de ``heapq.merge`` para uma ordenação com campos crescentes e decrescentes."""
+
+    __slots__ = ("values", "descending")
+
+    def __init__(self, values: Sequence, descending: Sequence[bool]) -> None:
+        # ``None`` depois dos valores na ordem crescente, como em ``MergedQuerySet``.
+        self.values = [(value is None, value if value is not None else 0) for value in values]
+        self.descending = descending
+
+    def __lt__(self, other: "_SortKey") -> bool:
+        for mine, theirs, descending in zip(self.values, other.values, self.descending):
+            if mine != theirs:
+                return mine > theirs if descending else mine < theirs
+        return False
+
+
+def _merge_key(ordering: Sequence[str]):
+    names = [field.lstrip("-") for field in ordering]
+    descending = [field.startswith("-") for field in ordering]
+    return lambda row: _SortKey([row[name] for name in names], descending)
+
+
+def iter_export_rows(
+    queryset, chunk_size: int = DEFAULT_CHUNK_SIZE, archive_queryset=None
+) -> Iterator[Dict]:
+    """Linhas planas do fato (já filtrado/ordenado), com ``riscos`` = códigos distintos.
+
+    ``archive_queryset`` (o arquivo com os mesmos filtros e ordenação) é intercalado
+    com o fato e as linhas ganham ``arquivado``.
+    """
+
+    if archive_queryset is None:
+        yield from _flat_rows(queryset, chunk_size, archived=False)
+        return
+
+    yield from heapq.merge(
+        _flat_rows(queryset, chunk_size, archived=False, arquivado=Value(False)),
+        _flat_rows(archive_queryset, chunk_size, archived=True, arquivado=Value(True)),
+        key=_merge_key(queryset.query.order_by),
+    )
+
+
+class _Echo:
+    """Pseudo-arquivo: ``csv.writer`` devolve a linha em vez de gravá-la."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def stream_csv(rows: Iterable[Dict], columns: Sequence[str] = EXPORT_COLUMNS) -> Iterator[str]:
+    writer = csv.writer(_Echo(), delimiter=CSV_DELIMITER)
+    yield writer.writerow(columns)
+    for row in rows:
+        values = []
+        for column in columns:
+            value = row[column]
+            if column == "riscos":
+                value = RISK_SEPARATOR.join(value)
+            elif value is None:
+                value = ""
+            elif hasattr(value, "isoformat"):
+                value = value.isoformat()
+            values.append(value)
+        yield writer.writerow(values)
+
+
+def stream_ndjson(rows: Iterable[Dict], columns: Sequence[str] = EXPORT_COLUMNS) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(
+            {column: row[column] for column in columns},
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+        ) + "\n"
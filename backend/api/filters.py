@@ -0,0 +1,181 @@
+"""Backends de filtro e ordenação usados pelos ViewSets da API."""
+
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from . import search
+
+SEARCH_PARAM = "search"
+
+
+def prefix_filter(field: str, prefix: str) -> Q:
+    """Filtro de prefixo que aproveita o índice B-tree do campo.
+
+    No SQLite o ``LIKE`` é case-insensitive e não usa índice, então o prefixo vira
+    um intervalo; no PostgreSQL o ``LIKE 'x%'`` usa o índice ``*_like`` criado pelo Django.
+    """
+
+    if connection.vendor == "sqlite":
+        return Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + "\uffff"})
+    return Q(**{f"{field}__startswith": prefix})
+
+
+def _query_values(request, name: str) -> list[str]:
+    """Valores de ``?name=a&name=b`` ou ``?name=a,b``, sem vazios."""
+
+    values = []
+    for raw in request.query_params.getlist(name):
+        values.extend(value.strip() for value in raw.split(",") if value.strip())
+    return values
+
+
+def _parse_date(request, param: str):
+    raw = request.query_params.get(param)
+    if not raw:
+        return None
+    try:
+        value = parse_date(raw)
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({param: "Data inválida; use o formato AAAA-MM-DD."})
+    return value
+
+
+def _exact_lookups(request, filters: dict) -> dict:
+    lookups = {}
+    for param, field in filters.items():
+        values = _query_values(request, param)
+        if len(values) == 1:
+            lookups[field] = values[0]
+        elif values:
+            lookups[f"{field}__in"] = values
+    return lookups
+
+
+class FactRequerimentoFilter(BaseFilterBackend):
+    """Filtros declarados da tabela fato, todos cobertos por índices compostos.
+
+    * igualdade (aceita vários valores): ``status``, ``uo``, ``tipo_requerimento``,
+      ``regime_trabalho``, ``funcionario`` e ``requerente``;
+    * intervalos inclusivos: ``data_inicio_after``/``data_inicio_before``,
+      ``data_fim_after``/``data_fim_before`` e ``data_criacao_after``/``data_criacao_before``
+      (datas ``AAAA-MM-DD`` ou, para ``data_criacao``, data/hora ISO 8601).
+    """
+
+    exact_filters = {
+        "status": "status",
+        "uo": "uo_id",
+        "tipo_requerimento": "tipo_requerimento_id",
+        "regime_trabalho": "regime_trabalho_id",
+        "funcionario": "funcionario_id",
+        "requerente": "requerente_id",
+    }
+    date_filters = ("data_inicio", "data_fim")
+    datetime_filters = ("data_criacao",)
+
+    def filter_queryset(self, request, queryset, view):
+        lookups = _exact_lookups(request, self.exact_filters)
+        for field in self.date_filters:
+            after = _parse_date(request, f"{field}_after")
+            before = _parse_date(request, f"{field}_before")
+            if after:
+                lookups[f"{field}__gte"] = after
+            if before:
+                lookups[f"{field}__lte"] = before
+
+        for field in self.datetime_filters:
+            after = self._parse_datetime(request, f"{field}_after")
+            before = self._parse_datetime(request, f"{field}_before")
+            if after:
+                lookups[f"{field}__gte"] = after[0]
+            if before:
+                value, whole_day = before
+                if whole_day:
+                    lookups[f"{field}__lt"] = value + timedelta(days=1)
+                else:
+                    lookups[f"{field}__lte"] = value
+
+        return queryset.filter(**lookups) if lookups else queryset
+
+    @staticmethod
+    def _parse_datetime(request, param):
+        """Retorna ``(instante, é_data_pura)``; uma data pura vale a partir da meia-noite."""
+
+        raw = request.query_params.get(param)
+        if not raw:
+            return None
+        try:
+            value = parse_datetime(raw)
+            day = parse_date(raw) if value is None else None
+        except ValueError:
+            value = day = None
+
+        if value is None and day is None:
+            raise ValidationError({param: "Data/hora inválida; use ISO 8601."})
+        if value is None:
+            value = datetime.combine(day, time.min)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value, day is not None
+
+
+class FactRequerimentoSearchFilter(BaseFilterBackend):
+    """``?search=``: busca textual em ``atividades_executadas`` (ver ``api.search``).
+
+    Combina com os demais filtros no mesmo ``WHERE``; sem ``ordering`` explícito o
+    resultado vem por relevância.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return search.search(queryset, request.query_params.get(SEARCH_PARAM, ""))
+
+
+class FactRequerimentoDiarioFilter(BaseFilterBackend):
+    """Filtros dos agregados diários: mesmas dimensões do fato e ``dia_after``/``dia_before``."""
+
+    exact_filters = {
+        "status": "status",
+        "uo": "uo_id",
+        "tipo_requerimento": "tipo_requerimento_id",
+        "regime_trabalho": "regime_trabalho_id",
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        lookups = _exact_lookups(request, self.exact_filters)
+        after = _parse_date(request, "dia_after")
+        before = _parse_date(request, "dia_before")
+        if after:
+            lookups["dia__gte"] = after
+        if before:
+            lookups["dia__lte"] = before
+        return queryset.filter(**lookups) if lookups else queryset
+
+
+class FactRequerimentoOrderingFilter(OrderingFilter):
+    """``OrderingFilter`` que sempre termina a ordenação com ``req_num`` como desempate."""
+
+    def get_default_ordering(self, view):
+        if self._searching(view):
+            return ("-relevancia",)
+        return super().get_default_ordering(view)
+
+    @staticmethod
+    def _searching(view) -> bool:
+        request = getattr(view, "request", None)
+        term = request.query_params.get(SEARCH_PARAM, "") if request is not None else ""
+        return search.has_terms(term)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip("-") == "req_num" for field in ordering):
+            ordering += ("req_num",)
+        return ordering
@@ -0,0 +1,421 @@
+"""Carga em lote (set-based) das tabelas de dimensão a partir dos arquivos base.
+
+Cada carga lê o arquivo uma única vez, compara as linhas com as chaves já
+existentes e aplica apenas as diferenças via ``bulk_create``/``bulk_update``
+em lotes configuráveis. Sem ``chunk_size`` a comparação usa uma consulta por
+tabela; com ``chunk_size`` o arquivo é processado em fatias de tamanho fixo,
+cada uma confirmada em sua própria transação, mantendo a memória constante.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import DimRisk, DimUO, DimUser, search_key
+from .versioning import bump_versions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+RiskKey = Tuple[str, str, str]
+UserValues = Tuple[str, Optional[str], Optional[str], Optional[str]]
+USER_FIELDS = ("nome", "email", "funcao", "uo_id")
+
+# (tabela, operação "+" ou "~", chave, {campo: (antes, depois)})
+ChangeReporter = Callable[[str, str, Any, Dict[str, Tuple[Any, Any]]], None]
+
+
+@dataclass
+class LoadResult:
+    """Resumo de uma carga: quantas linhas foram inseridas, alteradas ou mantidas."""
+
+    table: str
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated)
+
+    def merge(self, other: "LoadResult") -> None:
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.skipped += other.skipped
+
+    def __str__(self) -> str:
+        return (
+            f"{self.table}: {self.inserted} inseridas, {self.updated} atualizadas, "
+            f"{self.unchanged} sem alteração, {self.skipped} ignoradas"
+        )
+
+
+def get_batch_size(batch_size: int | None = None) -> int:
+    if batch_size:
+        return batch_size
+    return getattr(settings, "DIMENSION_LOAD_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+
+# === LEITURA DOS ARQUIVOS === #
+
+
+def _normalize_key(value: str | None) -> str:
+    if not value:
+        return ""
+    return value.replace("\ufeff", "").strip()
+
+
+def _normalize_value(value: str | None) -> str:
+    if value is None:
+        return ""
+    return value.replace("\ufeff", "").strip()
+
+
+def read_csv(csv_path: Path) -> Iterator[Dict[str, str]]:
+    """Percorre o CSV linha a linha (sem materializar o arquivo) normalizando chaves e valores."""
+
+    if not csv_path.exists():
+        logger.warning("Arquivo de carga não encontrado: %s", csv_path)
+        return
+
+    with csv_path.open(encoding="utf-8-sig", newline="") as stream:
+        reader = csv.DictReader(stream, delimiter=";")
+        for row in reader:
+            yield {_normalize_key(key): _normalize_value(val) for key, val in row.items()}
+
+
+def iter_chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# === RISCOS === #
+
+
+def parse_risk_rows(rows: Iterable[Dict[str, str]], result: LoadResult) -> Dict[RiskKey, str]:
+    """Indexa as linhas válidas pela chave natural, contando as descartadas em ``result``."""
+
+    incoming: Dict[RiskKey, str] = {}
+    for row in rows:
+        codigo = row.get("codigo")
+        subcategoria = row.get("subcategoria")
+        descricao = row.get("descricao")
+        if not codigo or not subcategoria or not descricao:
+            result.skipped += 1
+            continue
+        incoming[(codigo, subcategoria, descricao)] = row.get("categoria", "")
+    return incoming
+
+
+def sync_risks(
+    incoming: Dict[RiskKey, str],
+    batch_size: int | None = None,
+    *,
+    scoped: bool = False,
+    dry_run: bool = False,
+    report: ChangeReporter | None = None,
+) -> LoadResult:
+    """Aplica em ``DimRisk`` as linhas já indexadas por ``parse_risk_rows``."""
+
+    batch_size = get_batch_size(batch_size)
+    result = LoadResult(DimRisk._meta.db_table)
+    if not incoming:
+        return result
+
+    queryset = DimRisk.objects.all()
+    if scoped:
+        queryset = queryset.filter(
+            codigo__in={key[0] for key in incoming},
+            subcategoria__in={key[1] for key in incoming},
+        )
+    existing = {
+        (codigo, subcategoria, descricao): (pk, categoria)
+        for pk, codigo, subcategoria, descricao, categoria in queryset.values_list(
+            "id", "codigo", "subcategoria", "descricao", "categoria"
+        )
+    }
+
+    to_create: List[DimRisk] = []
+    to_update: List[DimRisk] = []
+    for key, categoria in incoming.items():
+        current = existing.get(key)
+        if current is None:
+            codigo, subcategoria, descricao = key
+            to_create.append(
+                DimRisk(
+                    codigo=codigo,
+                    subcategoria=subcategoria,
+                    descricao=descricao,
+                    categoria=categoria,
+                )
+            )
+            if report:
+                report(result.table, "+", key, {"categoria": (None, categoria)})
+        elif current[1] != categoria:
+            to_update.append(DimRisk(id=current[0], categoria=categoria))
+            if report:
+                report(result.table, "~", key, {"categoria": (current[1], categoria)})
+        else:
+            result.unchanged += 1
+
+    if not dry_run:
+        with transaction.atomic():
+            DimRisk.objects.bulk_create(to_create, batch_size=batch_size)
+            DimRisk.objects.bulk_update(to_update, ["categoria"], batch_size=batch_size)
+            if to_create or to_update:
+                bump_versions(DimRisk._meta.db_table)
+
+    result.inserted = len(to_create)
+    result.updated = len(to_update)
+    return result
+
+
+def load_risks(
+    rows: Iterable[Dict[str, str]],
+    batch_size: int | None = None,
+    *,
+    chunk_size: int | None = None,
+    dry_run: bool = False,
+    report: ChangeReporter | None = None,
+) -> LoadResult:
+    """Sincroniza ``DimRisk`` pela chave natural (codigo, subcategoria, descricao)."""
+
+    batch_size = get_batch_size(batch_size)
+    result = LoadResult(DimRisk._meta.db_table)
+
+    if chunk_size is None:
+        incoming = parse_risk_rows(rows, result)
+        result.merge(sync_risks(incoming, batch_size, dry_run=dry_run, report=report))
+        return result
+
+    for chunk in iter_chunks(rows, chunk_size):
+        incoming = parse_risk_rows(chunk, result)
+        result.merge(
+            sync_risks(incoming, batch_size, scoped=True, dry_run=dry_run, report=report)
+        )
+    return result
+
+
+# === UNIDADES ORGANIZACIONAIS === #
+
+
+def load_uos(
+    codes: Iterable[str],
+    batch_size: int | None = None,
+    *,
+    scoped: bool = False,
+    dry_run: bool = False,
+    report: ChangeReporter | None = None,
+    created: Set[str] | None = None,
+) -> LoadResult:
+    """Garante a existência das UOs informadas, usando o código como descrição inicial.
+
+    ``created`` acumula os códigos já criados (ou, em ``dry_run``, já reportados como
+    criados) numa carga em fatias, para que as fatias seguintes não os contem de novo.
+    """
+
+    batch_size = get_batch_size(batch_size)
+    result = LoadResult(DimUO._meta.db_table)
+
+    incoming = {code for code in codes if code}
+    if not incoming:
+        return result
+
+    queryset = DimUO.objects.all()
+    if scoped:
+        queryset = queryset.filter(codigo__in=incoming)
+    existing = set(queryset.values_list("codigo", flat=True))
+    if created is not None:
+        existing |= incoming & created
+
+    to_create = [DimUO(codigo=code, descricao=code) for code in sorted(incoming - existing)]
+    if report:
+        for uo in to_create:
+            report(result.table, "+", uo.codigo, {"descricao": (None, uo.descricao)})
+    if not dry_run and to_create:
+        with transaction.atomic():
+            DimUO.objects.bulk_create(to_create, batch_size=batch_size)
+            bump_versions(DimUO._meta.db_table)
+
+    if created is not None:
+        created.update(uo.codigo for uo in to_create)
+
+    result.inserted = len(to_create)
+    result.unchanged = len(incoming) - result.inserted
+    return result
+
+
+# === USUÁRIOS === #
+
+
+def user_uo_codes(incoming: Dict[str, UserValues]) -> Set[str]:
+    """Códigos de UO referenciados pelas linhas de usuário indexadas."""
+
+    return {values[3] for values in incoming.values() if values[3]}
+
+
+def parse_user_rows(rows: Iterable[Dict[str, str]], result: LoadResult) -> Dict[str, UserValues]:
+    """Indexa as linhas válidas pela matrícula, contando as descartadas em ``result``."""
+
+    incoming: Dict[str, UserValues] = {}
+    for row in rows:
+        matricula = row.get("matricula")
+        nome = row.get("nome")
+        if not matricula or not nome:
+            result.skipped += 1
+            continue
+        incoming[matricula] = (
+            nome,
+            row.get("email") or None,
+            row.get("cargo") or None,
+            row.get("uo") or None,
+        )
+    return incoming
+
+
+def sync_users(
+    incoming: Dict[str, UserValues],
+    batch_size: int | None = None,
+    *,
+    scoped: bool = False,
+    dry_run: bool = False,
+    report: ChangeReporter | None = None,
+    ensure_uos: bool = True,
+    created_uos: Set[str] | None = None,
+) -> LoadResult:
+    """Aplica em ``DimUser`` as linhas já indexadas por ``parse_user_rows``.
+
+    Com ``ensure_uos=False`` as UOs referenciadas precisam ter sido carregadas antes
+    (ver ``user_uo_codes``/``load_uos``); ``created_uos`` é repassado a ``load_uos``.
+    """
+
+    batch_size = get_batch_size(batch_size)
+    result = LoadResult(DimUser._meta.db_table)
+    if not incoming:
+        return result
+
+    with transaction.atomic():
+        if ensure_uos:
+            uo_result = load_uos(
+                user_uo_codes(incoming),
+                batch_size,
+                scoped=scoped,
+                dry_run=dry_run,
+                report=report,
+                created=created_uos,
+            )
+            if uo_result.inserted:
+                logger.info("%s", uo_result)
+
+        queryset = DimUser.objects.all()
+        if scoped:
+            queryset = queryset.filter(matricula__in=list(incoming))
+        existing: Dict[str, UserValues] = {
+            matricula: (nome, email, funcao, uo_id)
+            for matricula, nome, email, funcao, uo_id in queryset.values_list(
+                "matricula", *USER_FIELDS
+            )
+        }
+
+        to_create: List[DimUser] = []
+        to_update: List[DimUser] = []
+        for matricula, values in incoming.items():
+            nome, email, funcao, uo_id = values
+            instance = DimUser(
+                matricula=matricula,
+                nome=nome,
+                nome_busca=search_key(nome),
+                email=email,
+                funcao=funcao,
+                uo_id=uo_id,
+            )
+            current = existing.get(matricula)
+            if current is None:
+                to_create.append(instance)
+                if report:
+                    report(
+                        result.table,
+                        "+",
+                        matricula,
+                        {field: (None, value) for field, value in zip(USER_FIELDS, values)},
+                    )
+            elif current != values:
+                to_update.append(instance)
+                if report:
+                    report(
+                        result.table,
+                        "~",
+                        matricula,
+                        {
+                            field: (before, after)
+                            for field, before, after in zip(USER_FIELDS, current, values)
+                            if before != after
+                        },
+                    )
+            else:
+                result.unchanged += 1
+
+        if not dry_run:
+            DimUser.objects.bulk_create(to_create, batch_size=batch_size)
+            DimUser.objects.bulk_update(
+                to_update,
+                ["nome", "nome_busca", "email", "funcao", "uo"],
+                batch_size=batch_size,
+            )
+            if to_create or to_update:
+                bump_versions(DimUser._meta.db_table)
+
+    result.inserted = len(to_create)
+    result.updated = len(to_update)
+    return result
+
+
+def load_users(
+    rows: Iterable[Dict[str, str]],
+    batch_size: int | None = None,
+    *,
+    chunk_size: int | None = None,
+    dry_run: bool = False,
+    report: ChangeReporter | None = None,
+) -> LoadResult:
+    """Sincroniza ``DimUser`` pela matrícula, criando as UOs referenciadas que faltarem."""
+
+    batch_size = get_batch_size(batch_size)
+    result = LoadResult(DimUser._meta.db_table)
+
+    if chunk_size is None:
+        incoming = parse_user_rows(rows, result)
+        result.merge(sync_users(incoming, batch_size, dry_run=dry_run, report=report))
+        return result
+
+    # Em ``dry_run`` as UOs de uma fatia não são gravadas; sem este conjunto as
+    # fatias seguintes não as encontrariam e as reportariam como novas outra vez.
+    created_uos: Set[str] = set()
+    for chunk in iter_chunks(rows, chunk_size):
+        incoming = parse_user_rows(chunk, result)
+        result.merge(
+            sync_users(
+                incoming,
+                batch_size,
+                scoped=True,
+                dry_run=dry_run,
+                report=report,
+                created_uos=created_uos,
+            )
+        )
+    return result
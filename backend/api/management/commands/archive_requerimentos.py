@@ -0,0 +1,81 @@
+"""Move requerimentos encerrados e antigos da tabela fato para o arquivo."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+
+from api import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Arquiva (com os riscos) os requerimentos com status encerrado criados antes da "
+        "janela de retenção; a API só os devolve com ?incluir_arquivados=1."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.ARCHIVE_RETENTION_DAYS,
+            help="Idade mínima (dias desde a criação) para arquivar.",
+        )
+        parser.add_argument(
+            "--status",
+            action="append",
+            dest="statuses",
+            help="Status encerrado (repita a opção); padrão: ARCHIVE_CLOSED_STATUSES.",
+        )
+        parser.add_argument("--batch-size", type=int, default=archive.DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Só conta os candidatos por ano de criação, sem mover nada.",
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] < 0:
+            raise CommandError("--older-than-days não pode ser negativo.")
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size deve ser positivo.")
+        statuses = options["statuses"] or settings.ARCHIVE_CLOSED_STATUSES
+        if not statuses:
+            raise CommandError("Informe ao menos um status encerrado.")
+
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        self.stdout.write(
+            f"Candidatos: status {', '.join(statuses)}, criados antes de {cutoff:%Y-%m-%d %H:%M}."
+        )
+
+        if options["dry_run"]:
+            per_year = (
+                archive.closed_queryset(cutoff, statuses)
+                .order_by()
+                .values(ano=ExtractYear("data_criacao"))
+                .annotate(total=Count("pk"))
+                .order_by("ano")
+            )
+            total = 0
+            for row in per_year:
+                total += row["total"]
+                self.stdout.write(f"  {row['ano']}: {row['total']}")
+            self.stdout.write(self.style.SUCCESS(f"{total} requerimentos seriam arquivados."))
+            return
+
+        facts, links = archive.archive_requerimentos(
+            cutoff,
+            statuses,
+            batch_size=options["batch_size"],
+            progress=lambda facts, links: self.stdout.write(f"  {facts} requerimentos"),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{facts} requerimentos e {links} ligações com riscos arquivados."
+            )
+        )
@@ -0,0 +1,358 @@
+"""Suíte de benchmark dos endpoints da API e da sincronização dos CSVs.
+
+As rotas são lidas do ``router`` de ``core/urls.py`` (toda rota GET, mais o
+PATCH idempotente do detalhe do fato), de modo que um endpoint novo entra na
+suíte sem ajustes; parâmetros específicos ficam em ``ROUTE_QUERIES``. Para cada
+rota são medidos latência (p50/p95/p99), vazão sequencial e consultas SQL (na
+primeira requisição, com o cache limpo, e numa requisição já aquecida). A carga
+dos CSVs é medida com ``sync_dimensions(force=True)`` e a vazão concorrente com
+``bench_db``. O resultado é gravado em JSON (um arquivo por execução, com o
+commit corrente) e pode ser comparado com uma execução anterior (``--baseline``).
+
+Gere volume antes com ``manage.py seed_bench``.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from api.models import DimRisk, DimUser, FactRequerimento
+from api.signals import sync_dimensions
+
+DEFAULT_OUTPUT_DIR = Path(settings.BASE_DIR) / "bench-results"
+
+# Parâmetros por nome de rota; ``{recent}`` vira a data de 30 dias atrás.
+ROUTE_QUERIES = {
+    "dimrisk-tree": "codigo=inflamavel",
+    "dimuser-search": "q=SILVA",
+    "factrequerimento-list": "page_size=50",
+    "factrequerimento-stats": "group_by=uo",
+    "factrequerimento-export": "format=ndjson&data_criacao_after={recent}",
+    "analytics-detail": "format=parquet",
+}
+# Detalhe de rotas cujo ViewSet não tem ``queryset``.
+ROUTE_LOOKUPS = {"analytics-detail": "dim_uo"}
+
+
+@contextmanager
+def count_queries():
+    """Conta as consultas da conexão padrão durante o bloco.
+
+    ``CaptureQueriesContext`` fatia ``queries_log``, que o início de cada requisição
+    esvazia (``reset_queries``); o *wrapper* conta todas sem depender do log.
+    """
+
+    counter = {"queries": 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter["queries"] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+class Command(BaseCommand):
+    help = "Mede latência, vazão e consultas SQL de cada rota da API e da carga dos CSVs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Requisições por rota.")
+        parser.add_argument("--sync-iterations", type=int, default=3)
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Limpa o cache antes de cada requisição (mede sem o cache de respostas).",
+        )
+        parser.add_argument(
+            "--throughput-requests",
+            type=int,
+            default=500,
+            help="Requisições da rodada concorrente de bench_db (0 desliga).",
+        )
+        parser.add_argument("--output", type=Path, help="Arquivo JSON de saída.")
+        parser.add_argument("--label", default="", help="Rótulo livre gravado no resultado.")
+        parser.add_argument("--baseline", type=Path, help="Resultado anterior para comparar.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Aumento relativo do p50 considerado regressão (0.2 = 20%%).",
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=1.0,
+            help="Diferença mínima de p50 (ms) para contar como regressão (ignora ruído).",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Termina com erro se houver regressão em relação ao --baseline.",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] <= 0:
+            raise CommandError("--iterations deve ser positivo.")
+        baseline = self._read_baseline(options["baseline"]) if options["baseline"] else None
+
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=["*"]):
+            client = Client()
+            routes = [
+                self._measure_route(client, route, options["iterations"], options["cold"])
+                for route in self._routes()
+            ]
+        result = {
+            "label": options["label"],
+            "commit": self._git_commit(),
+            "created_at": timezone.now().isoformat(),
+            "vendor": connection.vendor,
+            "db_profile": settings.DB_PROFILE,
+            "cold": options["cold"],
+            "rows": {
+                "fato_requerimento": FactRequerimento.objects.count(),
+                "dim_user": DimUser.objects.count(),
+                "dim_risk": DimRisk.objects.count(),
+            },
+            "routes": routes,
+            "csv_sync": self._measure_sync(options["sync_iterations"]),
+            "throughput": self._measure_throughput(options["throughput_requests"]),
+        }
+
+        output = options["output"] or DEFAULT_OUTPUT_DIR / (
+            f"{timezone.now():%Y%m%dT%H%M%S}-{result['commit'] or 'nocommit'}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+
+        for route in routes:
+            self.stdout.write(self._format(route))
+        self.stdout.write(self._format(result["csv_sync"]))
+        if result["throughput"]:
+            throughput = result["throughput"]
+            self.stdout.write(
+                f"vazão concorrente: {throughput['throughput']} req/s "
+                f"({throughput['threads']} threads)"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {output}."))
+
+        if baseline is not None:
+            regressions = self._compare(
+                baseline, result, options["tolerance"], options["min_delta_ms"]
+            )
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} regressões em relação ao baseline.")
+
+    # === ROTAS === #
+
+    def _routes(self) -> List[Dict]:
+        from core.urls import router
+
+        recent = (timezone.now() - timedelta(days=30)).date().isoformat()
+        routes = [{"name": "api-root", "method": "get", "path": reverse("api-root")}]
+        for prefix, viewset, basename in router.registry:
+            for route in router.get_routes(viewset):
+                name = route.name.format(basename=basename)
+                if "get" not in router.get_method_map(viewset, route.mapping):
+                    continue
+                lookup = None
+                if route.detail:
+                    path, lookup = self._detail_path(name, viewset)
+                    if path is None:
+                        self.stdout.write(f"{name}: sem linha de exemplo para o detalhe, ignorada.")
+                        continue
+                else:
+                    path = reverse(name)
+                query = ROUTE_QUERIES.get(name, "").format(recent=recent)
+                routes.append(
+                    {"name": name, "method": "get", "path": f"{path}?{query}" if query else path}
+                )
+                if name == "factrequerimento-detail":
+                    status = FactRequerimento.objects.filter(pk=lookup).values_list(
+                        "status", flat=True
+                    )[0]
+                    routes.append(
+                        {"name": name, "method": "patch", "path": path, "data": {"status": status}}
+                    )
+        return routes
+
+    @staticmethod
+    def _detail_path(name: str, viewset):
+        """URL do detalhe com a primeira chave de exemplo que a rota aceita."""
+
+        if name in ROUTE_LOOKUPS:
+            candidates = [ROUTE_LOOKUPS[name]]
+        elif getattr(viewset, "queryset", None) is not None:
+            candidates = viewset.queryset.model.objects.order_by().values_list("pk", flat=True)[:20]
+        else:
+            candidates = []
+        kwarg = getattr(viewset, "lookup_url_kwarg", None) or "pk"
+        for lookup in candidates:
+            try:
+                return reverse(name, kwargs={kwarg: lookup}), lookup
+            except NoReverseMatch:
+                continue
+        return None, None
+
+    @staticmethod
+    def _request(client: Client, route: Dict):
+        if route["method"] == "patch":
+            response = client.patch(
+                route["path"], json.dumps(route["data"]), content_type="application/json"
+            )
+        else:
+            response = client.get(route["path"])
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        return response.status_code, size
+
+    def _measure_route(self, client: Client, route: Dict, iterations: int, cold: bool) -> Dict:
+        cache.clear()
+        with count_queries() as first:
+            status, size = self._request(client, route)
+
+        latencies = []
+        for _ in range(iterations):
+            if cold:
+                cache.clear()
+            started = time.perf_counter()
+            self._request(client, route)
+            latencies.append(time.perf_counter() - started)
+
+        with count_queries() as warm:
+            self._request(client, route)
+
+        return {
+            "name": route["name"],
+            "method": route["method"].upper(),
+            "path": route["path"],
+            "status": status,
+            "bytes": size,
+            "queries_first": first["queries"],
+            "queries_warm": warm["queries"],
+            **self._summary(latencies),
+        }
+
+    # === CARGA DOS CSVs E VAZÃO === #
+
+    def _measure_sync(self, iterations: int) -> Dict:
+        latencies = []
+        queries = 0
+        for _ in range(max(iterations, 1)):
+            with count_queries() as captured:
+                started = time.perf_counter()
+                sync_dimensions(force=True)
+                latencies.append(time.perf_counter() - started)
+            queries = captured["queries"]
+        return {
+            "name": "csv-sync",
+            "method": "SYNC",
+            "queries_warm": queries,
+            **self._summary(latencies),
+        }
+
+    @staticmethod
+    def _measure_throughput(requests: int) -> Optional[Dict]:
+        if requests <= 0:
+            return None
+        buffer = io.StringIO()
+        call_command("bench_db", "--json", f"--requests={requests}", stdout=buffer)
+        return json.loads(buffer.getvalue().strip().splitlines()[-1])
+
+    # === RESULTADO === #
+
+    @staticmethod
+    def _summary(latencies: List[float]) -> Dict:
+        ordered = sorted(latencies)
+
+        def percentile(q: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+        return {
+            "iterations": len(ordered),
+            "p50_ms": round(statistics.median(ordered) * 1000, 2),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "throughput": round(len(ordered) / sum(ordered), 1) if sum(ordered) else None,
+        }
+
+    @staticmethod
+    def _format(item: Dict) -> str:
+        queries = item.get("queries_warm")
+        if "queries_first" in item:
+            queries = f"{item['queries_first']}/{queries}"
+        return (
+            f"{item['method']:5} {item['name']:32} p50 {item['p50_ms']:8.2f} ms  "
+            f"p95 {item['p95_ms']:8.2f} ms  p99 {item['p99_ms']:8.2f} ms  consultas {queries}"
+        )
+
+    @staticmethod
+    def _read_baseline(path: Path) -> Dict:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Não foi possível ler o baseline {path}: {exc}") from exc
+
+    def _compare(
+        self, baseline: Dict, result: Dict, tolerance: float, min_delta_ms: float
+    ) -> List[str]:
+        def key(item):
+            return item["method"], item["name"]
+
+        previous = {key(item): item for item in [*baseline["routes"], baseline["csv_sync"]]}
+        regressions = []
+        reference = baseline.get("commit") or baseline.get("created_at")
+        self.stdout.write(f"Comparação com {reference}:")
+        for item in [*result["routes"], result["csv_sync"]]:
+            before = previous.get(key(item))
+            if before is None:
+                continue
+            ratio = item["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 1.0
+            more_queries = item.get("queries_warm", 0) > before.get("queries_warm", 0)
+            line = (
+                f"  {item['method']:5} {item['name']:32} p50 {before['p50_ms']:.2f} -> "
+                f"{item['p50_ms']:.2f} ms ({ratio:.2f}x), consultas "
+                f"{before.get('queries_warm')} -> {item.get('queries_warm')}"
+            )
+            slower = (
+                ratio > 1 + tolerance and item["p50_ms"] - before["p50_ms"] >= min_delta_ms
+            )
+            if slower or more_queries:
+                regressions.append(item["name"])
+                self.stdout.write(self.style.ERROR(line + "  REGRESSÃO"))
+            else:
+                self.stdout.write(line)
+        return regressions
+
+    @staticmethod
+    def _git_commit() -> Optional[str]:
+        try:
+            completed = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return completed.stdout.strip() or None
@@ -0,0 +1,190 @@
+"""Mede a vazão de requisições da API com o perfil de banco atual ou compara perfis.
+
+Cada thread usa seu próprio ``Client`` (e, portanto, sua própria conexão) e
+dispara uma mistura de leituras do fato (listagem, detalhe, agregados) com uma
+fração de gravações (PATCH que regrava o mesmo ``status``). Com ``--compare``
+o comando roda uma vez por ``DB_PROFILE`` em subprocessos; no SQLite cada
+rodada usa uma cópia descartável do banco.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from api.models import FactRequerimento
+
+PROFILES = ("default", "performance")
+
+
+class Command(BaseCommand):
+    help = "Mede requisições por segundo na API (leituras e gravações concorrentes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="Total de requisições.")
+        parser.add_argument("--threads", type=int, default=8, help="Clientes simultâneos.")
+        parser.add_argument(
+            "--write-ratio",
+            type=float,
+            default=0.1,
+            help="Fração das requisições que são gravações (0 a 1).",
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Roda uma vez com cada DB_PROFILE e mostra o ganho.",
+        )
+        parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+
+    def handle(self, *args, **options):
+        if options["requests"] <= 0 or options["threads"] <= 0:
+            raise CommandError("--requests e --threads devem ser positivos.")
+        if not 0 <= options["write_ratio"] <= 1:
+            raise CommandError("--write-ratio deve estar entre 0 e 1.")
+
+        if options["compare"]:
+            self._compare(options)
+            return
+
+        result = self._run(options["requests"], options["threads"], options["write_ratio"])
+        if options["json"]:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.stdout.write(self._format(result))
+
+    # === EXECUÇÃO === #
+
+    def _run(self, total: int, threads: int, write_ratio: float) -> Dict:
+        recent = FactRequerimento.objects.order_by("-data_criacao")
+        facts = list(recent.values_list("req_num", "status")[:200])
+        if not facts:
+            raise CommandError("Nenhum requerimento no banco para exercitar a API.")
+
+        rng = random.Random(42)
+        plan = [self._pick(rng, facts, write_ratio) for _ in range(total)]
+        shares = [plan[index::threads] for index in range(threads)]
+
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=["*"]):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                outcomes = list(pool.map(self._worker, shares))
+            elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latencies, _ in outcomes for latency in latencies)
+        return {
+            "profile": settings.DB_PROFILE,
+            "vendor": connection.vendor,
+            "requests": total,
+            "threads": threads,
+            "write_ratio": write_ratio,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(total / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+            "errors": sum(errors for _, errors in outcomes),
+        }
+
+    @staticmethod
+    def _pick(rng: random.Random, facts: List[Tuple[int, str]], write_ratio: float):
+        req_num, status = rng.choice(facts)
+        if rng.random() < write_ratio:
+            return "patch", f"/api/requerimentos/{req_num}/", {"status": status}
+        url = rng.choice(
+            (
+                "/api/requerimentos/?page_size=50",
+                f"/api/requerimentos/{req_num}/",
+                "/api/requerimentos/stats/?group_by=uo",
+            )
+        )
+        return "get", url, None
+
+    @staticmethod
+    def _worker(share) -> Tuple[List[float], int]:
+        client = Client()
+        latencies: List[float] = []
+        errors = 0
+        try:
+            for method, url, payload in share:
+                started = time.perf_counter()
+                if method == "patch":
+                    response = client.patch(
+                        url, json.dumps(payload), content_type="application/json"
+                    )
+                else:
+                    response = client.get(url)
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code >= 400
+        finally:
+            connections.close_all()
+        return latencies, errors
+
+    # === COMPARAÇÃO === #
+
+    def _compare(self, options) -> None:
+        manage = Path(settings.BASE_DIR) / "manage.py"
+        results = []
+        for profile in PROFILES:
+            env = {**os.environ, "DB_PROFILE": profile}
+            with tempfile.TemporaryDirectory() as workdir:
+                if connection.vendor == "sqlite":
+                    env["DB_NAME"] = self._copy_sqlite(Path(workdir) / "bench.sqlite3")
+                completed = subprocess.run(
+                    [
+                        sys.executable,
+                        str(manage),
+                        "bench_db",
+                        "--json",
+                        f"--requests={options['requests']}",
+                        f"--threads={options['threads']}",
+                        f"--write-ratio={options['write_ratio']}",
+                    ],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                )
+            if completed.returncode:
+                raise CommandError(f"Falha no perfil {profile}:\n{completed.stderr}")
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+        for result in results:
+            self.stdout.write(self._format(result))
+        baseline, tuned = results
+        gain = tuned["throughput"] / baseline["throughput"]
+        self.stdout.write(self.style.SUCCESS(f"Ganho de vazão: {gain:.2f}x"))
+
+    @staticmethod
+    def _copy_sqlite(target: Path) -> str:
+        """Cópia consistente do banco atual (API de backup do SQLite)."""
+
+        source = sqlite3.connect(settings.DATABASES["default"]["NAME"])
+        destination = sqlite3.connect(target)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+            source.close()
+        return str(target)
+
+    @staticmethod
+    def _format(result: Dict) -> str:
+        return (
+            f"[{result['profile']}/{result['vendor']}] {result['requests']} requisições, "
+            f"{result['threads']} threads: {result['throughput']} req/s "
+            f"(p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, {result['errors']} erros)"
+        )
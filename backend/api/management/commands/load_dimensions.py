@@ -0,0 +1,100 @@
+"""Carga incremental e em streaming das dimensões a partir de arquivos arbitrários."""
+
+from __future__ import annotations
+
+from datetime import datetime, time, timezone as dt_timezone
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from api.loaders import load_risks, load_users, read_csv
+from api.signals import DATA_DIR
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _parse_since(value: str) -> datetime:
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Data inválida para --since: {value!r}")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = (
+        "Carrega DimRisk/DimUser (e as DimUO referenciadas) lendo os CSVs em fatias, "
+        "aplicando apenas as linhas novas ou alteradas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--risks", type=Path, help="CSV de riscos (padrão: dimRisk.csv).")
+        parser.add_argument("--users", type=Path, help="CSV de usuários (padrão: dimUser.csv).")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Linhas lidas, comparadas e confirmadas por transação.",
+        )
+        parser.add_argument(
+            "--since",
+            type=_parse_since,
+            help="Ignora arquivos não modificados desde a data/hora informada (ISO 8601).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Mostra as diferenças sem gravar nada no banco.",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] <= 0:
+            raise CommandError("--chunk-size deve ser positivo.")
+
+        risks_path = options["risks"]
+        users_path = options["users"]
+        if risks_path is None and users_path is None:
+            risks_path = DATA_DIR / "dimRisk.csv"
+            users_path = DATA_DIR / "dimUser.csv"
+
+        for path, loader in ((risks_path, load_risks), (users_path, load_users)):
+            if path is None:
+                continue
+            if not path.exists():
+                raise CommandError(f"Arquivo não encontrado: {path}")
+            if options["since"] and not self._modified_since(path, options["since"]):
+                self.stdout.write(
+                    f"{path}: sem modificações desde {options['since']:%Y-%m-%d %H:%M}"
+                )
+                continue
+
+            result = loader(
+                read_csv(path),
+                chunk_size=options["chunk_size"],
+                dry_run=options["dry_run"],
+                report=self._report if options["dry_run"] else None,
+            )
+            self.stdout.write(self.style.SUCCESS(str(result)))
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry-run: nenhuma alteração foi gravada."))
+
+    @staticmethod
+    def _modified_since(path: Path, since: datetime) -> bool:
+        modified = datetime.fromtimestamp(path.stat().st_mtime, tz=dt_timezone.utc)
+        return modified > since
+
+    def _report(self, table, operation, key, changes) -> None:
+        if operation == "+":
+            details = ", ".join(f"{field}={after!r}" for field, (_, after) in changes.items())
+        else:
+            details = ", ".join(
+                f"{field}: {before!r} -> {after!r}" for field, (before, after) in changes.items()
+            )
+        self.stdout.write(f"{operation} {table} {key}: {details}")
@@ -0,0 +1,13 @@
+"""Reconstrói os agregados diários a partir da tabela fato e do arquivo."""
+
+from django.core.management.base import BaseCommand
+
+from api.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recalcula agg_requerimento_diario a partir de fato_requerimento e do arquivo."
+
+    def handle(self, *args, **options):
+        total = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{total} linhas de agregado reconstruídas."))
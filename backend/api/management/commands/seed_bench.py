@@ -0,0 +1,266 @@
+"""Gera dimensões e requerimentos sintéticos em volume para medir a API.
+
+As linhas são gravadas com ``bulk_create`` em lotes (cada lote numa transação),
+sem passar pelos signals; ao final os agregados diários são reconstruídos e as
+versões das tabelas incrementadas, como fazem as cargas em lote. Os registros
+gerados são identificáveis: matrículas a partir de ``90000000``, UOs ``BN*``,
+riscos ``BENCH_*`` e ``doc_uuid`` com prefixo ``bench-``. Use um banco próprio
+(``DB_NAME``) para não misturá-los aos dados reais.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api import rollups
+from api.dimension_cache import dimension_cache
+from api.models import (
+    DimLocalAtividade,
+    DimRegimeTrabalho,
+    DimRisk,
+    DimTipoRequerimento,
+    DimUO,
+    DimUser,
+    FactRequerimento,
+    search_key,
+)
+from api.versioning import DIMENSION_TABLES, FACT_TABLE, bump_versions
+
+FIRST_NAMES = (
+    "ANA", "JOÃO", "MARIA", "JOSÉ", "ANTÔNIO", "FRANCISCA", "CARLOS", "PAULO",
+    "LÚCIA", "MÁRCIA", "LUÍS", "FÁBIO", "BEATRIZ", "CÉSAR", "INÊS", "RAFAEL",
+)
+LAST_NAMES = (
+    "SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES",
+    "PEREIRA", "LIMA", "GOMES", "CONCEIÇÃO", "ARAÚJO", "MONTEIRO", "GUIMARÃES",
+)
+ACTIVITY_WORDS = (
+    "manutenção", "inspeção", "soldagem", "pintura", "limpeza", "calibração",
+    "montagem", "desmontagem", "elétrica", "mecânica", "caldeira", "tubulação",
+    "tanque", "válvula", "bomba", "painel", "andaime", "altura", "confinado",
+    "químico", "ruído", "calor", "radiação", "inflamável",
+)
+RISK_CATEGORIES = ("FÍSICO", "QUÍMICO", "BIOLÓGICO", "ERGONÔMICO", "ACIDENTE")
+
+# Status e peso relativo; os processados recebem data de processamento e os
+# aprovados/reprovados também de aprovação.
+STATUSES = {
+    "Aberto": 30,
+    "Em análise": 20,
+    "Processado": 15,
+    "Aprovado": 30,
+    "Reprovado": 5,
+}
+PROCESSED = {"Processado", "Aprovado", "Reprovado"}
+DECIDED = {"Aprovado", "Reprovado"}
+
+# Probabilidade de um requerimento ter 0, 1, 2, ... riscos.
+RISK_FAN_OUT = (15, 35, 25, 13, 7, 3, 2)
+
+FIRST_MATRICULA = 90_000_000
+SMALL_DIMENSIONS = {
+    DimRegimeTrabalho: ("bench_lma", "bench_adc", "bench_pri"),
+    DimLocalAtividade: ("bench_loc_1", "bench_loc_2", "bench_loc_3", "bench_loc_4"),
+    DimTipoRequerimento: ("bench_inicial", "bench_renovacao", "bench_alteracao"),
+}
+
+
+@contextmanager
+def explicit_timestamps():
+    """Desliga ``auto_now``/``auto_now_add`` do fato para gravar as datas geradas."""
+
+    fields = [
+        FactRequerimento._meta.get_field(name) for name in ("data_criacao", "data_modificacao")
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = "Gera DimUO/DimUser/DimRisk e requerimentos sintéticos (com riscos) em lote."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--uos", type=int, default=200)
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--risks", type=int, default=400)
+        parser.add_argument("--facts", type=int, default=100_000)
+        parser.add_argument(
+            "--max-risks",
+            type=int,
+            default=len(RISK_FAN_OUT) - 1,
+            help="Máximo de riscos por requerimento.",
+        )
+        parser.add_argument(
+            "--days", type=int, default=730, help="Janela (dias) das datas de criação."
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42, help="Semente do gerador.")
+
+    def handle(self, *args, **options):
+        for option in ("uos", "users", "risks", "batch_size", "days"):
+            if options[option] <= 0:
+                raise CommandError(f"--{option.replace('_', '-')} deve ser positivo.")
+        if options["facts"] < 0 or options["max_risks"] < 0:
+            raise CommandError("--facts e --max-risks não podem ser negativos.")
+
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        started = time.perf_counter()
+
+        uos = self._seed_uos(options["uos"], batch_size)
+        users = self._seed_users(rng, options["users"], uos, batch_size)
+        risks = self._seed_risks(rng, options["risks"], batch_size)
+        small = self._seed_small_dimensions()
+        self.stdout.write(
+            f"Dimensões: {len(uos)} UOs, {len(users)} usuários, {len(risks)} riscos."
+        )
+
+        facts, links = self._seed_facts(
+            rng, options["facts"], users, uos, risks, small, options, batch_size
+        )
+
+        rollups.rebuild()
+        with transaction.atomic():
+            bump_versions(FACT_TABLE, *DIMENSION_TABLES)
+        dimension_cache.invalidate()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{facts} requerimentos e {links} ligações com riscos gerados em "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
+
+    # === DIMENSÕES === #
+
+    @staticmethod
+    def _seed_uos(total: int, batch_size: int):
+        codes = [f"BN{index:05d}" for index in range(total)]
+        DimUO.objects.bulk_create(
+            [DimUO(codigo=code, descricao=f"UO SINTÉTICA {code}") for code in codes],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        return codes
+
+    @staticmethod
+    def _seed_users(rng: random.Random, total: int, uos, batch_size: int):
+        users = []
+        for index in range(total):
+            nome = " ".join(
+                (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(LAST_NAMES))
+            )
+            matricula = str(FIRST_MATRICULA + index)
+            users.append(
+                DimUser(
+                    matricula=matricula,
+                    nome=nome,
+                    nome_busca=search_key(nome),
+                    email=f"u{matricula}@bench.invalid",
+                    funcao="ANALISTA",
+                    uo_id=rng.choice(uos),
+                )
+            )
+        DimUser.objects.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+        return [user.matricula for user in users]
+
+    @staticmethod
+    def _seed_risks(rng: random.Random, total: int, batch_size: int):
+        risks = [
+            DimRisk(
+                codigo=f"BENCH_{index % 40:02d}",
+                categoria=rng.choice(RISK_CATEGORIES),
+                subcategoria=f"SUBCATEGORIA {index // 40:02d}",
+                descricao=" ".join(rng.choices(ACTIVITY_WORDS, k=12)).capitalize(),
+            )
+            for index in range(total)
+        ]
+        DimRisk.objects.bulk_create(risks, batch_size=batch_size, ignore_conflicts=True)
+        return list(
+            DimRisk.objects.filter(codigo__startswith="BENCH_").values_list("id", flat=True)
+        )
+
+    @staticmethod
+    def _seed_small_dimensions():
+        codes = {}
+        for model, values in SMALL_DIMENSIONS.items():
+            model.objects.bulk_create(
+                [model(codigo=codigo, descricao=codigo) for codigo in values],
+                ignore_conflicts=True,
+            )
+            codes[model] = values
+        return codes
+
+    # === FATO === #
+
+    def _seed_facts(self, rng, total, users, uos, risks, small, options, batch_size):
+        fan_out = RISK_FAN_OUT[: options["max_risks"] + 1]
+        window = options["days"] * 86_400
+        statuses, weights = list(STATUSES), list(STATUSES.values())
+        now = timezone.now()
+        RiskLink = FactRequerimento.riscos.through
+
+        created_facts = created_links = 0
+        with explicit_timestamps():
+            for start in range(0, total, batch_size):
+                size = min(batch_size, total - start)
+                facts = []
+                for status in rng.choices(statuses, weights, k=size):
+                    facts.append(self._fact(rng, status, now, window, users, uos, small))
+                counts = rng.choices(range(len(fan_out)), fan_out, k=size)
+
+                with transaction.atomic():
+                    FactRequerimento.objects.bulk_create(facts)
+                    links = [
+                        RiskLink(factrequerimento_id=fact.pk, dimrisk_id=risk_id)
+                        for fact, count in zip(facts, counts)
+                        for risk_id in rng.sample(risks, min(count, len(risks)))
+                    ]
+                    RiskLink.objects.bulk_create(links, batch_size=batch_size)
+
+                created_facts += size
+                created_links += len(links)
+                self.stdout.write(f"  {created_facts}/{total} requerimentos")
+        return created_facts, created_links
+
+    @staticmethod
+    def _fact(rng, status, now, window, users, uos, small) -> FactRequerimento:
+        criacao = now - timedelta(seconds=rng.uniform(0, window))
+        processamento = aprovacao = None
+        if status in PROCESSED:
+            processamento = criacao + timedelta(hours=rng.uniform(1, 240))
+        if status in DECIDED:
+            aprovacao = processamento + timedelta(hours=rng.uniform(1, 120))
+        inicio = criacao.date() + timedelta(days=rng.randint(0, 30))
+        fim = inicio + timedelta(days=rng.randint(1, 180)) if rng.random() < 0.7 else None
+
+        return FactRequerimento(
+            status=status,
+            data_inicio=inicio,
+            data_fim=fim,
+            atividades_executadas=" ".join(rng.choices(ACTIVITY_WORDS, k=rng.randint(5, 25))),
+            data_criacao=criacao,
+            data_modificacao=aprovacao or processamento or criacao,
+            data_processamento=processamento,
+            data_aprovacao=aprovacao,
+            doc_uuid=f"bench-{uuid.uuid4()}",
+            requerente_id=rng.choice(users),
+            funcionario_id=rng.choice(users),
+            uo_id=rng.choice(uos),
+            regime_trabalho_id=rng.choice(small[DimRegimeTrabalho]),
+            local_atividade_id=rng.choice(small[DimLocalAtividade]),
+            tipo_requerimento_id=rng.choice(small[DimTipoRequerimento]),
+        )
@@ -0,0 +1,20 @@
+"""Sincroniza as dimensões com os arquivos base fora do ciclo de ``migrate``."""
+
+from django.core.management.base import BaseCommand
+
+from api.signals import sync_dimensions
+
+
+class Command(BaseCommand):
+    help = "Carrega dimRisk.csv e dimUser.csv quando o conteúdo dos arquivos mudou."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Ignora a impressão digital gravada e recarrega todos os arquivos.",
+        )
+
+    def handle(self, *args, **options):
+        sync_dimensions(force=options["force"])
+        self.stdout.write(self.style.SUCCESS("Dimensões sincronizadas."))
@@ -0,0 +1,270 @@
+"""Instrumentação opcional por requisição: consultas SQL, tempo de banco, render e latência.
+
+Ligada por ``API_METRICS``. Desligada, o middleware se remove da pilha na
+inicialização (``MiddlewareNotUsed``) e nenhum *wrapper* é instalado nas
+conexões, então o custo é nulo.
+
+Ligada, cada requisição carrega uma amostra numa ``ContextVar``; um
+``execute_wrapper`` instalado em toda conexão nova soma consultas e tempo de
+banco na amostra corrente (inclusive nas consultas do caminho assíncrono, que
+rodam em threads com o contexto copiado). O tempo de serialização é o do
+``render()`` das respostas do DRF (no caminho assíncrono o JSON é renderizado
+dentro da view e entra na latência do handler).
+
+As amostras são agregadas em memória, por processo, com a chave
+(ViewSet ou view, ação, método); ``GET /api/_metrics`` devolve contagens,
+somas e percentis das últimas ``API_METRICS_WINDOW`` requisições de cada
+chave no formato texto do Prometheus. Requisições acima de
+``API_SLOW_REQUEST_MS`` são registradas em log com o SQL executado.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 1024
+DEFAULT_SLOW_REQUEST_MS = 500.0
+MAX_LOGGED_STATEMENTS = 50
+QUANTILES = (0.5, 0.9, 0.99)
+METRICS_PATH = "/api/_metrics"
+
+Key = Tuple[str, str, str]
+
+
+@dataclass
+class RequestSample:
+    queries: int = 0
+    db_seconds: float = 0.0
+    render_seconds: float = 0.0
+    statements: List[Tuple[float, str]] = field(default_factory=list)
+
+
+_current: ContextVar[Optional[RequestSample]] = ContextVar("api_metrics_sample", default=None)
+
+
+def enabled() -> bool:
+    return getattr(settings, "API_METRICS", False)
+
+
+# === SQL === #
+
+
+def record_query(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        sample.queries += 1
+        sample.db_seconds += elapsed
+        if len(sample.statements) < MAX_LOGGED_STATEMENTS:
+            sample.statements.append((elapsed, sql))
+
+
+def install_query_wrapper(sender, connection, **kwargs) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# === AGREGAÇÃO === #
+
+
+class _Series:
+    __slots__ = ("count", "total", "window")
+
+    def __init__(self, size: int) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.window: Deque[float] = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.window.append(value)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.window)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+SERIES = {
+    "api_request_duration_seconds": "Latência total da requisição.",
+    "api_request_db_seconds": "Tempo gasto em consultas SQL.",
+    "api_request_render_seconds": "Tempo de serialização (render) da resposta.",
+    "api_request_queries": "Consultas SQL por requisição.",
+}
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._series: Dict[Key, Dict[str, _Series]] = {}
+
+    def observe(self, key: Key, values: Dict[str, float]) -> None:
+        size = getattr(settings, "API_METRICS_WINDOW", DEFAULT_WINDOW)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {name: _Series(size) for name in SERIES}
+            for name, value in values.items():
+                series[name].add(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            items = sorted(self._series.items())
+            for name, help_text in SERIES.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} summary")
+                for (view, action, method), series in items:
+                    serie = series[name]
+                    labels = f'view="{view}",action="{action}",method="{method}"'
+                    for q in QUANTILES:
+                        value = serie.quantile(q)
+                        lines.append(f'{name}{{{labels},quantile="{q}"}} {value:.6g}')
+                    lines.append(f"{name}_sum{{{labels}}} {serie.total:.6g}")
+                    lines.append(f"{name}_count{{{labels}}} {serie.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def endpoint_key(request) -> Key:
+    """(ViewSet ou nome da view, ação, método) da rota resolvida."""
+
+    match = getattr(request, "resolver_match", None)
+    method = request.method
+    if match is None:
+        return ("unresolved", "", method)
+    view_class = getattr(match.func, "cls", None)
+    if view_class is None:
+        return (match.view_name or match.func.__name__, "", method)
+    actions = getattr(match.func, "actions", None) or {}
+    return (view_class.__name__, actions.get(method.lower(), method.lower()), method)
+
+
+# === MIDDLEWARE === #
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_seconds = (
+            getattr(settings, "API_SLOW_REQUEST_MS", DEFAULT_SLOW_REQUEST_MS) / 1000
+        )
+        connection_created.connect(install_query_wrapper, dispatch_uid="api-metrics")
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(None, connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == METRICS_PATH:
+            return self.get_response(request)
+
+        sample = RequestSample()
+        token = _current.set(sample)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, sample, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if request.path == METRICS_PATH:
+            return await self.get_response(request)
+
+        sample = RequestSample()
+        token = _current.set(sample)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, sample, time.perf_counter() - started)
+        return response
+
+    def process_template_response(self, request, response):
+        """Mede o ``render()`` das respostas do DRF (chamado logo antes dele)."""
+
+        sample = _current.get()
+        if sample is not None and not response.is_rendered:
+            started = time.perf_counter()
+
+            def rendered(response):
+                sample.render_seconds += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _finish(self, request, sample: RequestSample, elapsed: float) -> None:
+        key = endpoint_key(request)
+        registry.observe(
+            key,
+            {
+                "api_request_duration_seconds": elapsed,
+                "api_request_db_seconds": sample.db_seconds,
+                "api_request_render_seconds": sample.render_seconds,
+                "api_request_queries": sample.queries,
+            },
+        )
+        if elapsed >= self.slow_seconds:
+            statements = "\n".join(
+                f"  [{duration * 1000:.1f} ms] {sql}" for duration, sql in sample.statements
+            )
+            logger.warning(
+                "Requisição lenta: %s %s (%s.%s) %.1f ms, %d consultas, %.1f ms em SQL\n%s",
+                request.method,
+                request.get_full_path(),
+                key[0],
+                key[1],
+                elapsed * 1000,
+                sample.queries,
+                sample.db_seconds * 1000,
+                statements,
+            )
+
+
+# === ENDPOINT === #
+
+
+def metrics_view(request):
+    """``GET /api/_metrics``: agregados do processo no formato texto do Prometheus."""
+
+    if not enabled():
+        raise Http404
+    return HttpResponse(
+        registry.prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
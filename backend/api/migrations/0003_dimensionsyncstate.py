@@ -0,0 +1,24 @@
+"""Bookkeeping table with the fingerprint of each loaded dimension file."""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0002_dimuser_add_uo"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DimensionSyncState",
+            fields=[
+                ("arquivo", models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ("tamanho", models.BigIntegerField()),
+                ("modificado_em_ns", models.BigIntegerField()),
+                ("hash_conteudo", models.CharField(max_length=64)),
+                ("duracao_carga", models.FloatField(default=0)),
+                ("sincronizado_em", models.DateTimeField(auto_now=True)),
+            ],
+            options={"db_table": "dim_sync_state"},
+        ),
+    ]
@@ -0,0 +1,18 @@
+"""Composite index backing the keyset pagination of the fact table."""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0003_dimensionsyncstate"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="factrequerimento",
+            index=models.Index(
+                fields=["-data_criacao", "req_num"], name="fato_req_criacao_num_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+"""Per-table change counters used to version cached dimension payloads."""
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0004_factrequerimento_criacao_num_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableVersion",
+            fields=[
+                ("tabela", models.CharField(max_length=63, primary_key=True, serialize=False)),
+                ("versao", models.BigIntegerField(default=0)),
+                ("atualizado_em", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={"db_table": "controle_versao_tabela"},
+        ),
+    ]
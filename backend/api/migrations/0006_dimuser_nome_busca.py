@@ -0,0 +1,52 @@
+"""Accent-insensitive search column (and trigram index on PostgreSQL) for DimUser."""
+
+import unicodedata
+
+from django.db import migrations, models
+
+TRGM_INDEX = "dim_user_nome_busca_trgm_idx"
+
+
+def _search_key(value):
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.upper().split())
+
+
+def fill_nome_busca(apps, schema_editor):
+    DimUser = apps.get_model("api", "DimUser")
+    users = list(DimUser.objects.only("matricula", "nome"))
+    for user in users:
+        user.nome_busca = _search_key(user.nome)
+    DimUser.objects.bulk_update(users, ["nome_busca"], batch_size=500)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON dim_user USING gin (nome_busca gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRGM_INDEX}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0005_tableversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dimuser",
+            name="nome_busca",
+            field=models.CharField(db_index=True, default="", editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_nome_busca, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
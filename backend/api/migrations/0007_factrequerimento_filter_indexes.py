@@ -0,0 +1,102 @@
+"""Composite indexes backing the declared filters of the fact table.
+
+Each (fk, -data_criacao) index also serves plain lookups by the foreign key,
+so the single-column FK indexes are dropped once the composites exist.
+"""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0006_dimuser_nome_busca"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="factrequerimento",
+            index=models.Index(fields=["status", "-data_criacao"], name="fato_req_status_criacao_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="factrequerimento",
+            index=models.Index(fields=["uo", "-data_criacao"], name="fato_req_uo_criacao_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="factrequerimento",
+            index=models.Index(
+                fields=["tipo_requerimento", "-data_criacao"], name="fato_req_tipo_criacao_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="factrequerimento",
+            index=models.Index(
+                fields=["regime_trabalho", "-data_criacao"], name="fato_req_regime_criacao_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="factrequerimento",
+            index=models.Index(fields=["funcionario", "-data_criacao"], name="fato_req_func_criacao_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="factrequerimento",
+            index=models.Index(fields=["requerente", "-data_criacao"], name="fato_req_requer_criacao_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="factrequerimento",
+            index=models.Index(fields=["data_inicio"], name="fato_req_data_inicio_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="factrequerimento",
+            index=models.Index(fields=["data_fim"], name="fato_req_data_fim_idx"),
+        ),
+        migrations.AlterField(
+            model_name="factrequerimento",
+            name="requerente",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="requerimentos_criados",
+                to="api.dimuser",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="factrequerimento",
+            name="funcionario",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="requerimentos_funcionarios",
+                to="api.dimuser",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="factrequerimento",
+            name="uo",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="api.dimuo",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="factrequerimento",
+            name="regime_trabalho",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="requerimentos_por_regime",
+                to="api.dimregimetrabalho",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="factrequerimento",
+            name="tipo_requerimento",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="requerimentos_por_tipo",
+                to="api.dimtiporequerimento",
+            ),
+        ),
+    ]
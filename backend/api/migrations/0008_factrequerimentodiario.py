@@ -0,0 +1,60 @@
+"""Daily rollup of the fact table used by the dashboard statistics."""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0007_factrequerimento_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FactRequerimentoDiario",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("dia", models.DateField()),
+                ("status", models.CharField(max_length=50)),
+                ("quantidade", models.IntegerField(default=0)),
+                ("processados", models.IntegerField(default=0)),
+                ("soma_prazo_processamento", models.FloatField(default=0)),
+                ("aprovados", models.IntegerField(default=0)),
+                ("soma_prazo_aprovacao", models.FloatField(default=0)),
+                (
+                    "uo",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="api.dimuo",
+                    ),
+                ),
+                (
+                    "tipo_requerimento",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="api.dimtiporequerimento",
+                    ),
+                ),
+                (
+                    "regime_trabalho",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="api.dimregimetrabalho",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "agg_requerimento_diario",
+                "ordering": ["-dia"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("dia", "uo", "tipo_requerimento", "status", "regime_trabalho"),
+                        name="agg_req_diario_chave_uniq",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+"""Track the last modification of each requerimento for HTTP validators."""
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_data_modificacao(apps, schema_editor):
+    FactRequerimento = apps.get_model("api", "FactRequerimento")
+    FactRequerimento.objects.update(
+        data_modificacao=Coalesce("data_aprovacao", "data_processamento", "data_criacao")
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0008_factrequerimentodiario"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="factrequerimento",
+            name="data_modificacao",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_data_modificacao, migrations.RunPython.noop),
+    ]
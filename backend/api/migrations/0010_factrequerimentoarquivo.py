@@ -0,0 +1,166 @@
+"""Archive tables for closed requerimentos moved out of fato_requerimento.
+
+On PostgreSQL the archive is recreated as a table partitioned by range of
+data_criacao: the primary key becomes (req_num, data_criacao), a DEFAULT
+partition catches anything outside the yearly partitions, and those are created
+on demand by the archive_requerimentos command. Other backends keep the plain
+table created by CreateModel.
+"""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PARTITIONED_ARCHIVE_SQL = [
+    "DROP TABLE fato_requerimento_arquivo",
+    """
+    CREATE TABLE fato_requerimento_arquivo (
+        req_num integer NOT NULL,
+        status varchar(50) NOT NULL,
+        data_inicio date NULL,
+        data_fim date NULL,
+        atividades_executadas text NOT NULL,
+        data_criacao timestamp with time zone NOT NULL,
+        data_modificacao timestamp with time zone NOT NULL,
+        data_processamento timestamp with time zone NULL,
+        data_aprovacao timestamp with time zone NULL,
+        doc_uuid varchar(100) NOT NULL,
+        arquivado_em timestamp with time zone NOT NULL,
+        requerente_id varchar(20) NOT NULL
+            REFERENCES dim_user (matricula) DEFERRABLE INITIALLY DEFERRED,
+        funcionario_id varchar(20) NOT NULL
+            REFERENCES dim_user (matricula) DEFERRABLE INITIALLY DEFERRED,
+        uo_id varchar(10) NOT NULL
+            REFERENCES dim_uo (codigo) DEFERRABLE INITIALLY DEFERRED,
+        regime_trabalho_id varchar(10) NOT NULL
+            REFERENCES dim_regime_trabalho (codigo) DEFERRABLE INITIALLY DEFERRED,
+        local_atividade_id varchar(10) NOT NULL
+            REFERENCES dim_local_atividade (codigo) DEFERRABLE INITIALLY DEFERRED,
+        tipo_requerimento_id varchar(10) NOT NULL
+            REFERENCES dim_tipo_requerimento (codigo) DEFERRABLE INITIALLY DEFERRED,
+        PRIMARY KEY (req_num, data_criacao)
+    ) PARTITION BY RANGE (data_criacao)
+    """,
+    "CREATE INDEX fato_arq_criacao_num_idx "
+    "ON fato_requerimento_arquivo (data_criacao DESC, req_num)",
+    "CREATE TABLE fato_requerimento_arquivo_default "
+    "PARTITION OF fato_requerimento_arquivo DEFAULT",
+]
+
+
+def partition_archive_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in PARTITIONED_ARCHIVE_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0009_factrequerimento_data_modificacao"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FactRequerimentoArquivo",
+            fields=[
+                ("req_num", models.IntegerField(primary_key=True, serialize=False)),
+                ("status", models.CharField(max_length=50)),
+                ("data_inicio", models.DateField(blank=True, null=True)),
+                ("data_fim", models.DateField(blank=True, null=True)),
+                ("atividades_executadas", models.TextField(blank=True)),
+                ("data_criacao", models.DateTimeField()),
+                ("data_modificacao", models.DateTimeField()),
+                ("data_processamento", models.DateTimeField(blank=True, null=True)),
+                ("data_aprovacao", models.DateTimeField(blank=True, null=True)),
+                ("doc_uuid", models.CharField(max_length=100)),
+                ("arquivado_em", models.DateTimeField()),
+                (
+                    "requerente",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="api.dimuser",
+                    ),
+                ),
+                (
+                    "funcionario",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="api.dimuser",
+                    ),
+                ),
+                (
+                    "uo",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="api.dimuo",
+                    ),
+                ),
+                (
+                    "regime_trabalho",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="api.dimregimetrabalho",
+                    ),
+                ),
+                (
+                    "local_atividade",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="api.dimlocalatividade",
+                    ),
+                ),
+                (
+                    "tipo_requerimento",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="api.dimtiporequerimento",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "fato_requerimento_arquivo",
+                "ordering": ["-data_criacao"],
+                "indexes": [
+                    models.Index(
+                        fields=["-data_criacao", "req_num"], name="fato_arq_criacao_num_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="FactRequerimentoArquivoRisco",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("req_num", models.IntegerField()),
+                (
+                    "risco",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="requerimentos_arquivados",
+                        to="api.dimrisk",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "fato_requerimento_arquivo_riscos",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("req_num", "risco"), name="fato_arq_riscos_uniq"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(partition_archive_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,128 @@
+"""Full-text index over fato_requerimento.atividades_executadas.
+
+PostgreSQL: a pt_unaccent text search configuration (Portuguese stemming after
+unaccent; needs the unaccent extension), a stored generated tsvector column
+"busca" and a GIN index on it.
+
+SQLite: an external-content FTS5 table kept in sync by triggers and filled with
+the FTS5 rebuild command. Django remakes SQLite tables on many ALTERs, which
+drops the triggers; api.search.ensure_index (run on every post_migrate) checks
+for them and recreates them and the index content when any is missing.
+
+The "busca" column is not part of the model state; the FTS table is mapped by
+the unmanaged FactRequerimentoBusca model (see api/search.py).
+"""
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POSTGRESQL_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = pg_catalog.portuguese);
+            ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    """,
+    """
+    ALTER TABLE fato_requerimento ADD COLUMN busca tsvector
+        GENERATED ALWAYS AS (to_tsvector('pt_unaccent', atividades_executadas)) STORED
+    """,
+    "CREATE INDEX fato_req_busca_gin ON fato_requerimento USING gin (busca)",
+]
+POSTGRESQL_REVERSE_SQL = [
+    "DROP INDEX IF EXISTS fato_req_busca_gin",
+    "ALTER TABLE fato_requerimento DROP COLUMN IF EXISTS busca",
+]
+
+SQLITE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS fato_requerimento_fts USING fts5(
+        atividades_executadas,
+        content='fato_requerimento',
+        content_rowid='req_num',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fato_requerimento_fts_ai AFTER INSERT ON fato_requerimento
+    BEGIN
+        INSERT INTO fato_requerimento_fts (rowid, atividades_executadas)
+        VALUES (new.req_num, new.atividades_executadas);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fato_requerimento_fts_ad AFTER DELETE ON fato_requerimento
+    BEGIN
+        INSERT INTO fato_requerimento_fts (fato_requerimento_fts, rowid, atividades_executadas)
+        VALUES ('delete', old.req_num, old.atividades_executadas);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fato_requerimento_fts_au
+    AFTER UPDATE OF req_num, atividades_executadas ON fato_requerimento
+    BEGIN
+        INSERT INTO fato_requerimento_fts (fato_requerimento_fts, rowid, atividades_executadas)
+        VALUES ('delete', old.req_num, old.atividades_executadas);
+        INSERT INTO fato_requerimento_fts (rowid, atividades_executadas)
+        VALUES (new.req_num, new.atividades_executadas);
+    END
+    """,
+    "INSERT INTO fato_requerimento_fts (fato_requerimento_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS fato_requerimento_fts_ai",
+    "DROP TRIGGER IF EXISTS fato_requerimento_fts_ad",
+    "DROP TRIGGER IF EXISTS fato_requerimento_fts_au",
+    "DROP TABLE IF EXISTS fato_requerimento_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement, params=None)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRESQL_SQL, "sqlite": SQLITE_SQL})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRESQL_REVERSE_SQL, "sqlite": SQLITE_REVERSE_SQL})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0010_factrequerimentoarquivo"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name="FactRequerimentoBusca",
+            fields=[
+                (
+                    "requerimento",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="busca_fts",
+                        serialize=False,
+                        to="api.factrequerimento",
+                    ),
+                ),
+                ("atividades_executadas", models.TextField()),
+            ],
+            options={
+                "db_table": "fato_requerimento_fts",
+                "managed": False,
+            },
+        ),
+    ]
@@ -1,6 +1,18 @@
 """Modelos das dimensões e da tabela fato utilizados pela API."""
 
+import unicodedata
+
 from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+
+def search_key(value: str | None) -> str:
+    """Forma canônica para busca: sem acentos, em maiúsculas e com espaços simples."""
+
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.upper().split())
 
 
 # === DIMENSÕES === #
@@ -9,6 +21,8 @@ from django.db import models
 class DimUser(models.Model):
     matricula = models.CharField(max_length=20, primary_key=True)
     nome = models.CharField(max_length=100)
+    # Nome normalizado por ``search_key`` para a busca por prefixo/trigramas
+    nome_busca = models.CharField(max_length=100, db_index=True, default="", editable=False)
     email = models.EmailField(blank=True, null=True)
     funcao = models.CharField(max_length=100, blank=True, null=True)
     uo = models.ForeignKey(
@@ -26,6 +40,13 @@ class DimUser(models.Model):
     def __str__(self) -> str:  # pragma: no cover - representação amigável
         return f"{self.nome} ({self.matricula})"
 
+    def save(self, *args, **kwargs):
+        self.nome_busca = search_key(self.nome)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "nome" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "nome_busca"}
+        super().save(*args, **kwargs)
+
 
 class DimUO(models.Model):
     codigo = models.CharField(max_length=10, primary_key=True)
@@ -124,6 +145,7 @@ class FactRequerimento(models.Model):
         help_text="Descrição resumida das atividades executadas no requerimento.",
     )
     data_criacao = models.DateTimeField(auto_now_add=True)
+    data_modificacao = models.DateTimeField(auto_now=True)
     data_processamento = models.DateTimeField(null=True, blank=True)
     data_aprovacao = models.DateTimeField(null=True, blank=True)
     doc_uuid = models.CharField(max_length=100, unique=True)
@@ -133,17 +155,20 @@ class FactRequerimento(models.Model):
         DimUser,
         on_delete=models.PROTECT,
         related_name="requerimentos_criados",
+        db_index=False,
     )
     funcionario = models.ForeignKey(
         DimUser,
         on_delete=models.PROTECT,
         related_name="requerimentos_funcionarios",
+        db_index=False,
     )
-    uo = models.ForeignKey(DimUO, on_delete=models.PROTECT)
+    uo = models.ForeignKey(DimUO, on_delete=models.PROTECT, db_index=False)
     regime_trabalho = models.ForeignKey(
         DimRegimeTrabalho,
         on_delete=models.PROTECT,
         related_name="requerimentos_por_regime",
+        db_index=False,
     )
     local_atividade = models.ForeignKey(
         DimLocalAtividade,
@@ -154,6 +179,7 @@ class FactRequerimento(models.Model):
         DimTipoRequerimento,
         on_delete=models.PROTECT,
         related_name="requerimentos_por_tipo",
+        db_index=False,
     )
 
     # Relação Muitos-Para-Muitos para Riscos (Degenerada)
@@ -166,6 +192,204 @@ class FactRequerimento(models.Model):
     class Meta:
         db_table = "fato_requerimento"
         ordering = ["-data_criacao"]
+        # Cada filtro de igualdade da API tem um índice composto com a ordenação padrão,
+        # que também atende às consultas só pela FK (por isso as FKs abaixo dispensam
+        # o índice simples).
+        indexes = [
+            models.Index(fields=["-data_criacao", "req_num"], name="fato_req_criacao_num_idx"),
+            models.Index(fields=["status", "-data_criacao"], name="fato_req_status_criacao_idx"),
+            models.Index(fields=["uo", "-data_criacao"], name="fato_req_uo_criacao_idx"),
+            models.Index(
+                fields=["tipo_requerimento", "-data_criacao"], name="fato_req_tipo_criacao_idx"
+            ),
+            models.Index(
+                fields=["regime_trabalho", "-data_criacao"], name="fato_req_regime_criacao_idx"
+            ),
+            models.Index(fields=["funcionario", "-data_criacao"], name="fato_req_func_criacao_idx"),
+            models.Index(
+                fields=["requerente", "-data_criacao"], name="fato_req_requer_criacao_idx"
+            ),
+            models.Index(fields=["data_inicio"], name="fato_req_data_inicio_idx"),
+            models.Index(fields=["data_fim"], name="fato_req_data_fim_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - representação amigável
         return f"Req {self.req_num} - {self.status}"
+
+
+class FactRequerimentoBusca(models.Model):
+    """Índice FTS5 de ``atividades_executadas`` no SQLite (ver ``api.search``).
+
+    Tabela virtual criada e sincronizada por *triggers* na migração ``0011``; o
+    modelo (não gerenciado) só existe para a busca fazer o JOIN com o fato pelo
+    ORM. No PostgreSQL o índice é a coluna ``busca`` do próprio fato.
+    """
+
+    requerimento = models.OneToOneField(
+        FactRequerimento,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="busca_fts",
+    )
+    atividades_executadas = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = "fato_requerimento_fts"
+
+
+# === ARQUIVO DA TABELA FATO === #
+
+
+class FactRequerimentoArquivo(models.Model):
+    """Requerimentos encerrados movidos da tabela fato por ``archive_requerimentos``.
+
+    Mesmas colunas (e o mesmo ``req_num``) do fato, mais ``arquivado_em``. No
+    PostgreSQL a tabela é particionada por intervalo de ``data_criacao`` (uma
+    partição por ano, criadas sob demanda), por isso lá a chave primária física é
+    ``(req_num, data_criacao)`` e ``doc_uuid`` não tem índice único.
+    """
+
+    req_num = models.IntegerField(primary_key=True)
+    status = models.CharField(max_length=50)
+    data_inicio = models.DateField(null=True, blank=True)
+    data_fim = models.DateField(null=True, blank=True)
+    atividades_executadas = models.TextField(blank=True)
+    data_criacao = models.DateTimeField()
+    data_modificacao = models.DateTimeField()
+    data_processamento = models.DateTimeField(null=True, blank=True)
+    data_aprovacao = models.DateTimeField(null=True, blank=True)
+    doc_uuid = models.CharField(max_length=100)
+    arquivado_em = models.DateTimeField()
+
+    requerente = models.ForeignKey(
+        DimUser, on_delete=models.PROTECT, related_name="+", db_index=False
+    )
+    funcionario = models.ForeignKey(
+        DimUser, on_delete=models.PROTECT, related_name="+", db_index=False
+    )
+    uo = models.ForeignKey(DimUO, on_delete=models.PROTECT, related_name="+", db_index=False)
+    regime_trabalho = models.ForeignKey(
+        DimRegimeTrabalho, on_delete=models.PROTECT, related_name="+", db_index=False
+    )
+    local_atividade = models.ForeignKey(
+        DimLocalAtividade, on_delete=models.PROTECT, related_name="+", db_index=False
+    )
+    tipo_requerimento = models.ForeignKey(
+        DimTipoRequerimento, on_delete=models.PROTECT, related_name="+", db_index=False
+    )
+
+    class Meta:
+        db_table = "fato_requerimento_arquivo"
+        ordering = ["-data_criacao"]
+        indexes = [
+            models.Index(fields=["-data_criacao", "req_num"], name="fato_arq_criacao_num_idx"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - representação amigável
+        return f"Req {self.req_num} - {self.status} (arquivado)"
+
+    @cached_property
+    def riscos(self):
+        """Riscos do requerimento arquivado (mesma interface lida pelo serializer do fato)."""
+
+        return list(DimRisk.objects.filter(requerimentos_arquivados__req_num=self.req_num))
+
+
+class FactRequerimentoArquivoRisco(models.Model):
+    """Ligação requerimento arquivado -> risco (cópia de ``fato_requerimento_riscos``).
+
+    Referencia ``req_num`` sem chave estrangeira: no PostgreSQL a tabela de arquivo é
+    particionada e não tem chave única só em ``req_num``.
+    """
+
+    req_num = models.IntegerField()
+    risco = models.ForeignKey(
+        DimRisk, on_delete=models.PROTECT, related_name="requerimentos_arquivados"
+    )
+
+    class Meta:
+        db_table = "fato_requerimento_arquivo_riscos"
+        constraints = [
+            models.UniqueConstraint(fields=["req_num", "risco"], name="fato_arq_riscos_uniq"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - representação amigável
+        return f"Req {self.req_num} -> risco {self.risco_id}"
+
+
+# === CONTROLE DE CARGA DAS DIMENSÕES === #
+
+
+class DimensionSyncState(models.Model):
+    """Impressão digital do último arquivo base carregado em cada dimensão."""
+
+    arquivo = models.CharField(max_length=255, primary_key=True)
+    tamanho = models.BigIntegerField()
+    modificado_em_ns = models.BigIntegerField()
+    hash_conteudo = models.CharField(max_length=64)
+    duracao_carga = models.FloatField(default=0)
+    sincronizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "dim_sync_state"
+
+    def __str__(self) -> str:  # pragma: no cover - representação amigável
+        return f"{self.arquivo} ({self.hash_conteudo[:12]})"
+
+
+class TableVersion(models.Model):
+    """Contador de alterações por tabela, compartilhado por todos os workers via banco."""
+
+    tabela = models.CharField(max_length=63, primary_key=True)
+    versao = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "controle_versao_tabela"
+
+    def __str__(self) -> str:  # pragma: no cover - representação amigável
+        return f"{self.tabela} v{self.versao}"
+
+
+# === AGREGADOS DIÁRIOS (FactRequerimento) === #
+
+
+class FactRequerimentoDiario(models.Model):
+    """Agregado diário do fato por (dia, UO, tipo, status, regime).
+
+    Guarda somas e contagens (e não médias) para que a manutenção incremental
+    seja exata: as médias de prazo são ``soma / quantidade`` no momento da leitura.
+    """
+
+    dia = models.DateField()
+    uo = models.ForeignKey(DimUO, on_delete=models.CASCADE, related_name="+")
+    tipo_requerimento = models.ForeignKey(
+        DimTipoRequerimento, on_delete=models.CASCADE, related_name="+"
+    )
+    status = models.CharField(max_length=50)
+    regime_trabalho = models.ForeignKey(
+        DimRegimeTrabalho, on_delete=models.CASCADE, related_name="+"
+    )
+    quantidade = models.IntegerField(default=0)
+    # data_criacao -> data_processamento
+    processados = models.IntegerField(default=0)
+    soma_prazo_processamento = models.FloatField(default=0)
+    # data_processamento -> data_aprovacao
+    aprovados = models.IntegerField(default=0)
+    soma_prazo_aprovacao = models.FloatField(default=0)
+
+    class Meta:
+        db_table = "agg_requerimento_diario"
+        ordering = ["-dia"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dia", "uo", "tipo_requerimento", "status", "regime_trabalho"],
+                name="agg_req_diario_chave_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - representação amigável
+        return f"{self.dia} {self.uo_id}/{self.tipo_requerimento_id}/{self.status}"
@@ -0,0 +1,77 @@
+"""Classes de paginação utilizadas pelos ViewSets da API."""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+from asgiref.sync import sync_to_async
+from rest_framework.pagination import CursorPagination
+
+
+class MergedQuerySet:
+    """Querysets com as mesmas colunas lidos como um só, intercalados pela ordenação.
+
+    Implementa só o que ``CursorPagination.paginate_queryset`` usa — ``order_by``,
+    ``filter`` e o fatiamento —, de modo que a lógica de cursor continua a do DRF.
+    Cada queryset busca até o fim da fatia pedida e as linhas são intercaladas em
+    Python; ``None`` vem depois dos valores na ordem crescente (como no PostgreSQL).
+    """
+
+    def __init__(self, querysets: Sequence, ordering: Sequence[str] = ()) -> None:
+        self.querysets = list(querysets)
+        self.ordering = tuple(ordering)
+
+    def order_by(self, *ordering: str) -> "MergedQuerySet":
+        return MergedQuerySet(
+            [queryset.order_by(*ordering) for queryset in self.querysets], ordering
+        )
+
+    def filter(self, *args, **kwargs) -> "MergedQuerySet":
+        return MergedQuerySet(
+            [queryset.filter(*args, **kwargs) for queryset in self.querysets], self.ordering
+        )
+
+    def __getitem__(self, window: slice) -> list:
+        rows = [row for queryset in self.querysets for row in queryset[: window.stop]]
+        # Ordenações estáveis, do critério menos para o mais significativo.
+        for field in reversed(self.ordering):
+            name = field.lstrip("-")
+            rows.sort(
+                key=lambda row: self._sort_key(
+                    row[name] if isinstance(row, dict) else getattr(row, name)
+                ),
+                reverse=field.startswith("-"),
+            )
+        return rows[window]
+
+    @staticmethod
+    def _sort_key(value):
+        return (value is None, value if value is not None else 0)
+
+
+class FactRequerimentoCursorPagination(CursorPagination):
+    """Paginação por cursor (keyset) sobre ``(-data_criacao, req_num)``.
+
+    O cursor carrega a posição do último registro visto, de modo que cada página
+    é um ``WHERE data_criacao < posição ORDER BY ... LIMIT n`` apoiado no índice
+    composto ``fato_req_criacao_num_idx``: páginas profundas custam o mesmo que a
+    primeira e os links ``next``/``previous`` permanecem estáveis com inserções.
+
+    ``paginate_querysets`` pagina o fato junto com o arquivo (``MergedQuerySet``);
+    as variantes ``a*`` rodam a mesma paginação do DRF fora do loop de eventos,
+    que é onde o ORM assíncrono também executa as consultas.
+    """
+
+    ordering = ("-data_criacao", "req_num")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+    def paginate_querysets(self, querysets, request, view=None):
+        return self.paginate_queryset(MergedQuerySet(querysets), request, view)
+
+    async def apaginate_querysets(self, querysets, request, view=None):
+        return await self.apaginate_queryset(MergedQuerySet(querysets), request, view)
@@ -0,0 +1,191 @@
+"""Pipeline de ingestão das dimensões respeitando as dependências entre tabelas.
+
+Os CSVs são interpretados em paralelo num pool de processos e cada tabela é
+gravada assim que as tabelas das quais depende terminam (DimUO antes de
+DimUser; DimRisk é independente). No PostgreSQL cada tabela é gravada em sua
+própria thread e, portanto, em sua própria conexão; no SQLite, que aceita um
+único escritor, as gravações seguem a ordem topológica na conexão corrente.
+O tempo total tende ao da cadeia mais lenta, e não à soma das tabelas.
+
+O pool de processos só compensa para arquivos grandes: abaixo de
+``DIMENSION_LOAD_PARALLEL_MIN_BYTES`` somados, os CSVs são lidos no próprio processo.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections, transaction
+
+from .loaders import (
+    LoadResult,
+    load_uos,
+    parse_risk_rows,
+    parse_user_rows,
+    read_csv,
+    sync_risks,
+    sync_users,
+    user_uo_codes,
+)
+
+logger = logging.getLogger(__name__)
+
+Parsed = Tuple[Dict[Any, Any], int]
+
+DEFAULT_PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Step:
+    """Uma tabela do pipeline: de qual arquivo vem, como gravá-la e do que depende."""
+
+    table: str
+    source: str
+    apply: Callable[[Dict[Any, Any], int | None], LoadResult]
+    depends_on: Tuple[str, ...] = ()
+    # Se as linhas descartadas na leitura do arquivo devem entrar no resumo desta tabela
+    reports_skipped: bool = True
+
+
+@dataclass
+class StepResult:
+    step: Step
+    result: LoadResult
+    elapsed: float
+
+
+def _apply_uos(incoming, batch_size):
+    return load_uos(user_uo_codes(incoming), batch_size)
+
+
+def _apply_users(incoming, batch_size):
+    return sync_users(incoming, batch_size, ensure_uos=False)
+
+
+# Interpretador de cada arquivo base (executado no pool de processos).
+PARSERS: Dict[str, Callable[[Iterable[Dict[str, str]], LoadResult], Dict[Any, Any]]] = {
+    "dimRisk.csv": parse_risk_rows,
+    "dimUser.csv": parse_user_rows,
+}
+
+STEPS: Tuple[Step, ...] = (
+    Step("dim_risk", "dimRisk.csv", sync_risks),
+    Step("dim_uo", "dimUser.csv", _apply_uos, reports_skipped=False),
+    Step("dim_user", "dimUser.csv", _apply_users, depends_on=("dim_uo",)),
+)
+
+
+def _parse_file(source: str, path: str) -> Parsed:
+    result = LoadResult(source)
+    incoming = PARSERS[source](read_csv(Path(path)), result)
+    return incoming, result.skipped
+
+
+def _topological_order(steps: Iterable[Step]) -> List[Step]:
+    pending = {step.table: step for step in steps}
+    ordered: List[Step] = []
+    done: set = set()
+    while pending:
+        ready = [
+            step
+            for step in pending.values()
+            if all(dep in done or dep not in pending for dep in step.depends_on)
+        ]
+        if not ready:
+            raise ImproperlyConfigured(
+                f"Dependência circular entre as dimensões: {sorted(pending)}"
+            )
+        for step in ready:
+            ordered.append(step)
+            done.add(step.table)
+            del pending[step.table]
+    return ordered
+
+
+def _run_step(step: Step, parsed: Parsed, batch_size: int | None) -> StepResult:
+    incoming, skipped = parsed
+    started = time.perf_counter()
+    with transaction.atomic():
+        result = step.apply(incoming, batch_size)
+    if step.reports_skipped:
+        result.skipped += skipped
+    return StepResult(step, result, time.perf_counter() - started)
+
+
+def _run_step_on_own_connection(
+    step: Step,
+    parsed: Future,
+    dependencies: List[Future],
+    batch_size: int | None,
+) -> StepResult:
+    try:
+        for dependency in dependencies:
+            dependency.result()
+        return _run_step(step, parsed.result(), batch_size)
+    finally:
+        connections.close_all()
+
+
+def run_pipeline(
+    files: Dict[str, Path],
+    batch_size: int | None = None,
+    workers: int | None = None,
+) -> List[StepResult]:
+    """Carrega as tabelas alimentadas pelos ``files`` informados (nome base -> caminho)."""
+
+    steps = _topological_order(step for step in STEPS if step.source in files)
+    if not steps:
+        return []
+
+    if workers is None:
+        workers = getattr(settings, "DIMENSION_LOAD_WORKERS", 1)
+    min_bytes = getattr(settings, "DIMENSION_LOAD_PARALLEL_MIN_BYTES", DEFAULT_PARALLEL_MIN_BYTES)
+    parallel_parse = (
+        workers > 1
+        and len(files) > 1
+        and sum(Path(path).stat().st_size for path in files.values()) >= min_bytes
+    )
+    parallel_write = workers > 1 and connection.vendor == "postgresql"
+
+    parse_pool = (
+        ProcessPoolExecutor(max_workers=min(workers, len(files)), initializer=django.setup)
+        if parallel_parse
+        else None
+    )
+    try:
+        parsed: Dict[str, Future] = {}
+        for source, path in files.items():
+            if parse_pool:
+                parsed[source] = parse_pool.submit(_parse_file, source, str(path))
+            else:
+                future: Future = Future()
+                future.set_result(_parse_file(source, str(path)))
+                parsed[source] = future
+
+        if not parallel_write:
+            return [
+                _run_step(step, parsed[step.source].result(), batch_size) for step in steps
+            ]
+
+        with ThreadPoolExecutor(max_workers=len(steps)) as write_pool:
+            running: Dict[str, Future] = {}
+            for step in steps:
+                running[step.table] = write_pool.submit(
+                    _run_step_on_own_connection,
+                    step,
+                    parsed[step.source],
+                    [running[dep] for dep in step.depends_on if dep in running],
+                    batch_size,
+                )
+            return [running[step.table].result() for step in steps]
+    finally:
+        if parse_pool:
+            parse_pool.shutdown()
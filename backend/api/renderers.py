@@ -0,0 +1,29 @@
+"""Renderers dos formatos de exportação.
+
+As exportações respondem com ``StreamingHttpResponse`` e não passam por
+``render()``; estas classes existem para que ``?format=`` (e o ``Accept``) com
+``csv``, ``ndjson``, ``parquet`` ou ``arrow`` sejam aceitos pela negociação de
+conteúdo do DRF. Respostas de erro (ex.: filtro inválido) são renderizadas como JSON.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+
+class CSVRenderer(JSONRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONRenderer(JSONRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class ParquetRenderer(JSONRenderer):
+    media_type = "application/vnd.apache.parquet"
+    format = "parquet"
+
+
+class ArrowStreamRenderer(JSONRenderer):
+    media_type = "application/vnd.apache.arrow.stream"
+    format = "arrow"
@@ -0,0 +1,74 @@
+"""Catálogo de riscos já agrupado como o formulário o exibe.
+
+Formato: ``{codigo: {subcategoria: [{"id", "descricao"}, ...]}}``, com o código
+normalizado (sem acentos, minúsculo) e a ordem de primeira ocorrência por
+``id``. A árvore é montada uma vez por versão de ``dim_risk`` — incrementada pela
+carga do ``dimRisk.csv`` e pelos signals de ``DimRisk`` — e cada resposta
+(árvore inteira ou um ramo, ``?codigo=``) é guardada comprimida no cache com a
+sua ETag, como o pacote de dimensões; as entradas de versões antigas expiram com
+``API_RESPONSE_CACHE_TIMEOUT``.
+"""
+
+from __future__ import annotations
+
+import gzip
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from .caching import response_cache_timeout
+from .models import DimRisk, search_key
+from .versioning import versions_validators
+
+RISK_TABLES = (DimRisk._meta.db_table,)
+CACHE_PREFIX = "riscos-tree"
+
+RiskTree = Dict[str, Dict[str, List[Dict]]]
+
+
+def codigo_key(codigo: Optional[str]) -> str:
+    """Chave do código no catálogo (mesma normalização do formulário)."""
+
+    return search_key(codigo).lower()
+
+
+def tree_etag(branch: Optional[str] = None) -> str:
+    # O ramo entra no hash: a ETag continua ASCII seja qual for o ``?codigo=``.
+    return versions_validators(CACHE_PREFIX, RISK_TABLES, branch or "")[0]
+
+
+def build_tree() -> RiskTree:
+    tree: RiskTree = {}
+    rows = DimRisk.objects.order_by("id").values_list("id", "codigo", "subcategoria", "descricao")
+    for pk, codigo, subcategoria, descricao in rows.iterator():
+        subcategorias = tree.setdefault(codigo_key(codigo), {})
+        subcategorias.setdefault(subcategoria, []).append({"id": pk, "descricao": descricao})
+    return tree
+
+
+def get_tree() -> RiskTree:
+    """Árvore da versão corrente, montada só na primeira leitura de cada versão."""
+
+    key = f"{CACHE_PREFIX}:{tree_etag()}"
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_tree()
+        cache.set(key, tree, timeout=response_cache_timeout())
+    return tree
+
+
+def get_compressed_tree(branch: Optional[str] = None) -> Optional[bytes]:
+    """JSON comprimido da árvore ou de um ramo; ``None`` se o código não existe."""
+
+    key = f"{CACHE_PREFIX}:payload:{tree_etag(branch)}"
+    payload = cache.get(key)
+    if payload is None:
+        tree = get_tree()
+        if branch is not None:
+            if branch not in tree:
+                return None
+            tree = {branch: tree[branch]}
+        payload = gzip.compress(JSONRenderer().render(tree))
+        cache.set(key, payload, timeout=response_cache_timeout())
+    return payload
@@ -0,0 +1,224 @@
+"""Manutenção incremental e reconstrução dos agregados diários do fato.
+
+Cada requerimento contribui com uma unidade em ``quantidade`` (e com seus
+prazos, quando já processado/aprovado) na linha de ``FactRequerimentoDiario``
+da sua chave (dia de criação, UO, tipo, status, regime). Salvar ou excluir um
+requerimento remove a contribuição antiga e soma a nova com ``UPDATE ... SET
+x = x + delta``, de modo que vários workers podem atualizar o mesmo agregado.
+Alterações que não passam por ``save()``/``delete()`` (``QuerySet.update``,
+SQL direto) são corrigidas por ``manage.py rebuild_rollups``.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import FactRequerimento, FactRequerimentoArquivo, FactRequerimentoDiario
+from .versioning import bump_versions
+
+SOURCE_FIELDS = (
+    "data_criacao",
+    "data_processamento",
+    "data_aprovacao",
+    "uo_id",
+    "tipo_requerimento_id",
+    "status",
+    "regime_trabalho_id",
+)
+KEY_FIELDS = ("dia", "uo_id", "tipo_requerimento_id", "status", "regime_trabalho_id")
+METRIC_FIELDS = (
+    "quantidade",
+    "processados",
+    "soma_prazo_processamento",
+    "aprovados",
+    "soma_prazo_aprovacao",
+)
+
+RollupKey = Tuple
+Metrics = Tuple[int, int, float, int, float]
+
+
+def fact_values(instance: FactRequerimento) -> Dict:
+    return {field: getattr(instance, field) for field in SOURCE_FIELDS}
+
+
+def fetch_fact_values(pk) -> Optional[Dict]:
+    return FactRequerimento.objects.filter(pk=pk).values(*SOURCE_FIELDS).first()
+
+
+def contribution(values: Dict) -> Tuple[RollupKey, Metrics]:
+    """Chave do agregado e métricas com que um requerimento contribui."""
+
+    criacao = values["data_criacao"]
+    processamento = values["data_processamento"]
+    aprovacao = values["data_aprovacao"]
+    dia = timezone.localdate(criacao) if timezone.is_aware(criacao) else criacao.date()
+
+    processados, prazo_processamento = 0, 0.0
+    if processamento:
+        processados, prazo_processamento = 1, (processamento - criacao).total_seconds()
+    aprovados, prazo_aprovacao = 0, 0.0
+    if processamento and aprovacao:
+        aprovados, prazo_aprovacao = 1, (aprovacao - processamento).total_seconds()
+
+    key = (
+        dia,
+        values["uo_id"],
+        values["tipo_requerimento_id"],
+        values["status"],
+        values["regime_trabalho_id"],
+    )
+    return key, (1, processados, prazo_processamento, aprovados, prazo_aprovacao)
+
+
+def apply_contributions(changes: Iterable[Tuple[Dict, int]]) -> None:
+    """Aplica ``(valores do fato, +1 | -1)`` agrupando as variações por chave."""
+
+    deltas: Dict[RollupKey, list] = defaultdict(lambda: [0, 0, 0.0, 0, 0.0])
+    for values, sign in changes:
+        key, metrics = contribution(values)
+        for index, metric in enumerate(metrics):
+            deltas[key][index] += sign * metric
+
+    removed_any = False
+    with transaction.atomic():
+        for key, delta in deltas.items():
+            if not any(delta):
+                continue
+            removed_any |= delta[0] < 0
+            _apply_delta(dict(zip(KEY_FIELDS, key)), dict(zip(METRIC_FIELDS, delta)))
+        if removed_any:
+            FactRequerimentoDiario.objects.filter(quantidade__lte=0).delete()
+
+
+def _apply_delta(key: Dict, delta: Dict) -> None:
+    expressions = {field: F(field) + value for field, value in delta.items()}
+    if FactRequerimentoDiario.objects.filter(**key).update(**expressions):
+        return
+    try:
+        with transaction.atomic():
+            FactRequerimentoDiario.objects.create(**key, **delta)
+    except IntegrityError:
+        # Outro worker criou a linha entre o UPDATE e o INSERT.
+        FactRequerimentoDiario.objects.filter(**key).update(**expressions)
+
+
+def record_change(previous: Optional[Dict], current: Optional[Dict]) -> None:
+    """Troca a contribuição ``previous`` pela ``current`` (qualquer uma pode ser ``None``)."""
+
+    if previous is not None and current is not None:
+        if contribution(previous) == contribution(current):
+            return
+
+    changes = []
+    if previous is not None:
+        changes.append((previous, -1))
+    if current is not None:
+        changes.append((current, 1))
+    apply_contributions(changes)
+
+
+def add_facts(values: Iterable[Dict]) -> None:
+    """Soma de uma vez a contribuição de vários requerimentos (cargas em lote)."""
+
+    apply_contributions((item, 1) for item in values)
+
+
+def _grouped(model):
+    """Contribuições de ``model`` (fato ou arquivo) agrupadas pela chave do agregado."""
+
+    return (
+        model.objects.order_by()
+        .values(
+            "uo_id",
+            "tipo_requerimento_id",
+            "status",
+            "regime_trabalho_id",
+            dia=TruncDate("data_criacao"),
+        )
+        .annotate(
+            quantidade=Count("pk"),
+            processados=Count("data_processamento"),
+            soma_prazo_processamento=Sum(
+                F("data_processamento") - F("data_criacao"), output_field=DurationField()
+            ),
+            aprovados=Count(
+                "pk",
+                filter=Q(data_processamento__isnull=False, data_aprovacao__isnull=False),
+            ),
+            soma_prazo_aprovacao=Sum(
+                F("data_aprovacao") - F("data_processamento"), output_field=DurationField()
+            ),
+        )
+    )
+
+
+def rebuild(batch_size: int = 1000) -> int:
+    """Recalcula todos os agregados com um ``GROUP BY`` na tabela fato e outro no arquivo.
+
+    Requerimentos arquivados continuam contando nas estatísticas.
+    """
+
+    totals: Dict[RollupKey, list] = defaultdict(lambda: [0, 0, 0.0, 0, 0.0])
+    for model in (FactRequerimento, FactRequerimentoArquivo):
+        for row in _grouped(model).iterator():
+            metrics = totals[tuple(row[field] for field in KEY_FIELDS)]
+            metrics[0] += row["quantidade"]
+            metrics[1] += row["processados"]
+            if row["soma_prazo_processamento"]:
+                metrics[2] += row["soma_prazo_processamento"].total_seconds()
+            metrics[3] += row["aprovados"]
+            if row["soma_prazo_aprovacao"]:
+                metrics[4] += row["soma_prazo_aprovacao"].total_seconds()
+
+    aggregates = [
+        FactRequerimentoDiario(**dict(zip(KEY_FIELDS, key)), **dict(zip(METRIC_FIELDS, metrics)))
+        for key, metrics in totals.items()
+    ]
+
+    with transaction.atomic():
+        FactRequerimentoDiario.objects.all().delete()
+        FactRequerimentoDiario.objects.bulk_create(aggregates, batch_size=batch_size)
+        bump_versions(FactRequerimentoDiario._meta.db_table)
+    return len(aggregates)
+
+
+GROUPABLE_FIELDS = ("dia", "uo", "tipo_requerimento", "status", "regime_trabalho")
+
+
+def summarize(queryset, group_by: Iterable[str]) -> list:
+    """Soma os agregados por ``group_by`` e devolve contagens e prazos médios (segundos)."""
+
+    group_fields = [field if field in ("dia", "status") else f"{field}_id" for field in group_by]
+    rows = (
+        queryset.order_by(*group_fields)
+        .values(*group_fields)
+        .annotate(
+            total=Sum("quantidade"),
+            total_processados=Sum("processados"),
+            total_prazo_processamento=Sum("soma_prazo_processamento"),
+            total_aprovados=Sum("aprovados"),
+            total_prazo_aprovacao=Sum("soma_prazo_aprovacao"),
+        )
+    )
+
+    results = []
+    for row in rows:
+        item = {field: row[column] for field, column in zip(group_by, group_fields)}
+        item["quantidade"] = row["total"] or 0
+        item["processados"] = row["total_processados"] or 0
+        item["aprovados"] = row["total_aprovados"] or 0
+        item["prazo_medio_processamento"] = (
+            row["total_prazo_processamento"] / item["processados"] if item["processados"] else None
+        )
+        item["prazo_medio_aprovacao"] = (
+            row["total_prazo_aprovacao"] / item["aprovados"] if item["aprovados"] else None
+        )
+        results.append(item)
+    return results
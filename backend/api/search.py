@@ -0,0 +1,253 @@
+"""Busca textual em ``atividades_executadas`` apoiada no índice de texto do banco.
+
+O índice é mantido pelo próprio banco (migração ``0011``), de modo que qualquer
+escrita — ``save()``, cargas com ``bulk_create``, ``QuerySet.update``, o
+arquivamento — já o deixa em dia:
+
+* PostgreSQL: coluna gerada ``busca`` (``tsvector`` com a configuração
+  ``pt_unaccent``: radicais em português e sem acentos) e índice GIN; a consulta
+  usa ``websearch_to_tsquery`` (aceita aspas, ``or`` e ``-termo``), a relevância é
+  ``ts_rank_cd`` e o destaque ``ts_headline``;
+* SQLite: tabela FTS5 ``fato_requerimento_fts`` (conteúdo externo, sincronizada
+  por *triggers*, tokenizador sem acentos), ligada ao fato por JOIN no ``rowid``
+  (modelo ``FactRequerimentoBusca``). Não há radicais em português: cada
+  palavra é buscada por prefixo (``manut`` encontra ``manutenção``); relevância
+  por ``bm25`` e destaque por ``snippet``, calculados na mesma passada do índice.
+
+O SQLite recria a tabela em boa parte dos ``ALTER`` feitos pelas migrações, o que
+apaga os *triggers* sem erro algum. Por isso ``ensure_index`` roda a cada
+``migrate`` (signal ``post_migrate``): confere as peças do índice e, se faltar
+alguma, recria-as e reconstrói o conteúdo do índice.
+
+``search`` filtra o queryset (a condição do índice entra na mesma consulta dos
+demais filtros) e anota ``relevancia`` (maior é melhor) e
+``destaque`` (trechos com os termos entre ``<mark>``/``</mark>``). O texto do
+destaque sai escapado para HTML — as marcas são o único HTML da coluna —, de
+modo que o cliente pode exibi-lo como HTML sem abrir espaço para XSS armazenado:
+no PostgreSQL o texto é escapado antes do ``ts_headline``; no SQLite o
+``snippet`` marca os termos com caracteres de controle, trocados pelas marcas
+depois do escape. O arquivo não tem índice textual: nele a busca é um
+``icontains`` sem relevância nem destaque.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import List, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import BooleanField, FloatField, Lookup, TextField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import FactRequerimento, FactRequerimentoBusca
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = "pt_unaccent"
+FTS_TABLE = FactRequerimentoBusca._meta.db_table
+MARK_START, MARK_END = "<mark>", "</mark>"
+HEADLINE_OPTIONS = (
+    f"StartSel={MARK_START}, StopSel={MARK_END}, MaxFragments=2, MaxWords=20, MinWords=8"
+)
+SNIPPET_TOKENS = 24
+# Marcadores provisórios do ``snippet`` (não aparecem em texto digitado).
+SNIPPET_START, SNIPPET_END = "\x02", "\x03"
+# Mesmo escape de ``django.utils.html.escape``; ``&`` primeiro.
+HTML_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;"))
+
+# Colunas anotadas por ``search`` (a listagem plana as inclui quando presentes).
+ANNOTATIONS = ("relevancia", "destaque")
+
+_WORD = re.compile(r"\w+")
+
+
+@FactRequerimentoBusca._meta.get_field("atividades_executadas").register_lookup
+class FullTextMatch(Lookup):
+    """``coluna MATCH expressão`` do FTS5."""
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+def fts_match(term: str) -> str:
+    """Expressão ``MATCH`` do FTS5: todas as palavras, cada uma por prefixo.
+
+    Só palavras entram (entre aspas), então a entrada do usuário nunca é lida como
+    sintaxe do FTS5.
+    """
+
+    return " ".join(f'"{word}"*' for word in _WORD.findall(term))
+
+
+def _replace_sql(sql: str, params: List, replacements) -> Tuple[str, List]:
+    """``REPLACE`` encadeados sobre a expressão ``sql`` (na ordem de ``replacements``)."""
+
+    params = list(params)
+    for old, new in replacements:
+        sql = f"REPLACE({sql}, %s, %s)"
+        params += [old, new]
+    return sql, params
+
+
+def has_terms(term: str) -> bool:
+    return bool(_WORD.search(term or ""))
+
+
+def search(queryset, term: str):
+    """Filtra por ``term`` e anota ``relevancia`` e ``destaque`` (sem palavras, não filtra)."""
+
+    term = term.strip()
+    if not has_terms(term):
+        return queryset
+    if queryset.model is not FactRequerimento:
+        return queryset.filter(atividades_executadas__icontains=term).annotate(
+            relevancia=Value(0.0, output_field=FloatField()),
+            destaque=Value(None, output_field=TextField()),
+        )
+
+    table = FactRequerimento._meta.db_table
+    if connections[queryset.db].vendor == "postgresql":
+        query = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        text, text_params = _replace_sql(f"{table}.atividades_executadas", [], HTML_ESCAPES)
+        return queryset.filter(
+            RawSQL(f"{table}.busca @@ {query}", [term], output_field=BooleanField())
+        ).annotate(
+            relevancia=RawSQL(
+                f"ts_rank_cd({table}.busca, {query})", [term], output_field=FloatField()
+            ),
+            destaque=RawSQL(
+                f"ts_headline('{SEARCH_CONFIG}', {text}, {query}, %s)",
+                [*text_params, term, HEADLINE_OPTIONS],
+                output_field=TextField(),
+            ),
+        )
+
+    snippet, snippet_params = _replace_sql(
+        f"snippet({FTS_TABLE}, 0, %s, %s, '…', {SNIPPET_TOKENS})",
+        [SNIPPET_START, SNIPPET_END],
+        (*HTML_ESCAPES, (SNIPPET_START, MARK_START), (SNIPPET_END, MARK_END)),
+    )
+    return queryset.filter(busca_fts__atividades_executadas__match=fts_match(term)).annotate(
+        # bm25: menor é melhor; negado para seguir o sentido do ``ts_rank_cd``.
+        relevancia=RawSQL(f"-bm25({FTS_TABLE})", [], output_field=FloatField()),
+        destaque=RawSQL(snippet, snippet_params, output_field=TextField()),
+    )
+
+
+# === MANUTENÇÃO DO ÍNDICE === #
+
+INDEX_MIGRATION = ("api", "0011_factrequerimento_busca")
+FACT_TABLE = FactRequerimento._meta.db_table
+
+# Mesmos objetos da migração ``0011``, em versão idempotente.
+POSTGRESQL_INDEX_SQL = (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{SEARCH_CONFIG}') THEN
+            CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = pg_catalog.portuguese);
+            ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    """,
+    f"""
+    ALTER TABLE {FACT_TABLE} ADD COLUMN IF NOT EXISTS busca tsvector
+        GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', atividades_executadas)) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS fato_req_busca_gin ON {FACT_TABLE} USING gin (busca)",
+)
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {FACT_TABLE}
+    BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, atividades_executadas)
+        VALUES (new.req_num, new.atividades_executadas);
+    END
+    """,
+    f"{FTS_TABLE}_ad": f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {FACT_TABLE}
+    BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, atividades_executadas)
+        VALUES ('delete', old.req_num, old.atividades_executadas);
+    END
+    """,
+    f"{FTS_TABLE}_au": f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF req_num, atividades_executadas ON {FACT_TABLE}
+    BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, atividades_executadas)
+        VALUES ('delete', old.req_num, old.atividades_executadas);
+        INSERT INTO {FTS_TABLE} (rowid, atividades_executadas)
+        VALUES (new.req_num, new.atividades_executadas);
+    END
+    """,
+}
+SQLITE_INDEX_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        atividades_executadas,
+        content='{FACT_TABLE}',
+        content_rowid='req_num',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    *SQLITE_TRIGGERS.values(),
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+
+def missing_index_objects(using: str = DEFAULT_DB_ALIAS) -> List[str]:
+    """Peças do índice textual ausentes no banco ``using`` (vazio se está completo)."""
+
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            expected = [FTS_TABLE, *SQLITE_TRIGGERS]
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') "
+                f"AND name IN ({', '.join(['%s'] * len(expected))})",
+                expected,
+            )
+        elif connection.vendor == "postgresql":
+            expected = ["busca", "fato_req_busca_gin"]
+            cursor.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s "
+                "UNION ALL SELECT indexname FROM pg_indexes "
+                "WHERE schemaname = current_schema() AND indexname = %s",
+                [FACT_TABLE, *expected],
+            )
+        else:
+            return []
+        present = {name for (name,) in cursor.fetchall()}
+    return [name for name in expected if name not in present]
+
+
+def ensure_index(using: str = DEFAULT_DB_ALIAS) -> List[str]:
+    """Recria as peças do índice que faltarem e reconstrói o índice; devolve as recriadas.
+
+    Não faz nada antes de a migração ``0011`` ser aplicada (ou depois de revertida).
+    """
+
+    connection = connections[using]
+    if INDEX_MIGRATION not in MigrationRecorder(connection).applied_migrations():
+        return []
+    missing = missing_index_objects(using)
+    if not missing:
+        return []
+
+    logger.warning("Índice textual incompleto (faltavam %s); recriando.", ", ".join(missing))
+    statements = POSTGRESQL_INDEX_SQL if connection.vendor == "postgresql" else SQLITE_INDEX_SQL
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return missing
@@ -1,7 +1,10 @@
 """Serializers responsáveis por expor os modelos via API REST."""
 
+from django.db.models import F
 from rest_framework import serializers
 
+from . import search
+from .dimension_cache import dimension_cache
 from .models import (
     DimCargo,
     DimLocalAtividade,
@@ -11,9 +14,30 @@ from .models import (
     DimUO,
     DimUser,
     FactRequerimento,
+    FactRequerimentoArquivoRisco,
 )
 
 
+# === 0. CAMPOS === #
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """``PrimaryKeyRelatedField`` que resolve a chave no cache de dimensões, sem consulta."""
+
+    def to_internal_value(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        model = self.get_queryset().model
+        try:
+            pk = dimension_cache.to_pk(model, data)
+        except ValueError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        instance = dimension_cache.get(model, pk)
+        if instance is None:
+            self.fail("does_not_exist", pk_value=data)
+        return instance
+
+
 # === 1. SERIALIZERS DE DIMENSÃO (LEITURA) === #
 
 
@@ -77,34 +101,41 @@ class FactRequerimentoSerializer(serializers.ModelSerializer):
     tipo_requerimento = DimTipoRequerimentoSerializer(read_only=True)
     riscos = DimRiskSerializer(many=True, read_only=True)
 
-    # --- ESCRITA (PrimaryKeyRelatedField para receber IDs) ---
-    requerente_matricula = serializers.PrimaryKeyRelatedField(
+    # --- ESCRITA (IDs conferidos no cache de dimensões) ---
+    requerente_matricula = CachedPrimaryKeyRelatedField(
         queryset=DimUser.objects.all(), source="requerente", write_only=True
     )
-    funcionario_matricula = serializers.PrimaryKeyRelatedField(
+    funcionario_matricula = CachedPrimaryKeyRelatedField(
         queryset=DimUser.objects.all(), source="funcionario", write_only=True
     )
-    uo_codigo = serializers.PrimaryKeyRelatedField(
+    uo_codigo = CachedPrimaryKeyRelatedField(
         queryset=DimUO.objects.all(), source="uo", write_only=True
     )
-    regime_trabalho_codigo = serializers.PrimaryKeyRelatedField(
+    regime_trabalho_codigo = CachedPrimaryKeyRelatedField(
         queryset=DimRegimeTrabalho.objects.all(),
         source="regime_trabalho",
         write_only=True,
     )
-    local_atividade_codigo = serializers.PrimaryKeyRelatedField(
+    local_atividade_codigo = CachedPrimaryKeyRelatedField(
         queryset=DimLocalAtividade.objects.all(),
         source="local_atividade",
         write_only=True,
     )
-    tipo_requerimento_codigo = serializers.PrimaryKeyRelatedField(
+    tipo_requerimento_codigo = CachedPrimaryKeyRelatedField(
         queryset=DimTipoRequerimento.objects.all(),
         source="tipo_requerimento",
         write_only=True,
     )
-    riscos_ids = serializers.PrimaryKeyRelatedField(
+    riscos_ids = CachedPrimaryKeyRelatedField(
         queryset=DimRisk.objects.all(), many=True, source="riscos", write_only=True
     )
+    # PATCH incremental: acrescenta/retira riscos sem reenviar a lista inteira
+    riscos_adicionar = CachedPrimaryKeyRelatedField(
+        queryset=DimRisk.objects.all(), many=True, write_only=True, required=False
+    )
+    riscos_remover = CachedPrimaryKeyRelatedField(
+        queryset=DimRisk.objects.all(), many=True, write_only=True, required=False
+    )
 
     class Meta:
         model = FactRequerimento
@@ -115,6 +146,7 @@ class FactRequerimentoSerializer(serializers.ModelSerializer):
             "data_fim",
             "atividades_executadas",
             "data_criacao",
+            "data_modificacao",
             "data_processamento",
             "data_aprovacao",
             "doc_uuid",
@@ -134,23 +166,243 @@ class FactRequerimentoSerializer(serializers.ModelSerializer):
             "local_atividade_codigo",
             "tipo_requerimento_codigo",
             "riscos_ids",
+            "riscos_adicionar",
+            "riscos_remover",
         ]
-        read_only_fields = ["req_num", "data_criacao"]
+        read_only_fields = ["req_num", "data_criacao", "data_modificacao"]
+
+    def validate(self, attrs):
+        adding = {risk.pk for risk in attrs.get("riscos_adicionar", ())}
+        removing = {risk.pk for risk in attrs.get("riscos_remover", ())}
+        if "riscos" in attrs and (adding or removing):
+            raise serializers.ValidationError(
+                "Use riscos_ids (lista completa) ou riscos_adicionar/riscos_remover, não ambos."
+            )
+        if adding & removing:
+            duplicated = ", ".join(str(pk) for pk in sorted(adding & removing))
+            raise serializers.ValidationError(
+                {"riscos_remover": f"Riscos também presentes em riscos_adicionar: {duplicated}."}
+            )
+        return attrs
 
     def create(self, validated_data):
         """Garante o vínculo correto com os riscos na criação."""
 
-        risks_data = validated_data.pop("riscos", [])
+        risks = {risk.pk for risk in validated_data.pop("riscos", ())}
+        risks |= {risk.pk for risk in validated_data.pop("riscos_adicionar", ())}
+        validated_data.pop("riscos_remover", None)
         instance = super().create(validated_data)
-        if risks_data:
-            instance.riscos.set(risks_data)
+        self._apply_risk_delta(instance, add=risks)
         return instance
 
     def update(self, instance, validated_data):
-        """Permite atualizar os riscos associados quando informado."""
+        """Atualiza os riscos pela diferença em relação aos vínculos atuais.
+
+        ``riscos_ids`` substitui o conjunto; ``riscos_adicionar``/``riscos_remover``
+        alteram só os itens informados. Em ambos os casos o banco recebe no máximo um
+        ``INSERT`` e um ``DELETE`` na tabela de ligação (nada, se nada mudou).
+        """
 
-        risks_data = validated_data.pop("riscos", None)
+        replace = validated_data.pop("riscos", None)
+        adding = {risk.pk for risk in validated_data.pop("riscos_adicionar", ())}
+        removing = {risk.pk for risk in validated_data.pop("riscos_remover", ())}
         instance = super().update(instance, validated_data)
-        if risks_data is not None:
-            instance.riscos.set(risks_data)
+
+        if replace is None and not adding and not removing:
+            return instance
+        current = self._current_risk_ids(instance)
+        if replace is not None:
+            wanted = {risk.pk for risk in replace}
+        else:
+            wanted = (current | adding) - removing
+        self._apply_risk_delta(instance, add=wanted - current, remove=current - wanted)
         return instance
+
+    @staticmethod
+    def _current_risk_ids(instance) -> set:
+        """Riscos vinculados, reaproveitando o ``prefetch_related`` do ViewSet quando houver."""
+
+        prefetched = getattr(instance, "_prefetched_objects_cache", {}).get("riscos")
+        if prefetched is not None:
+            return {risk.pk for risk in prefetched}
+        return set(
+            FactRequerimento.riscos.through.objects.filter(
+                factrequerimento_id=instance.pk
+            ).values_list("dimrisk_id", flat=True)
+        )
+
+    @staticmethod
+    def _apply_risk_delta(instance, add=(), remove=()) -> None:
+        # Direto na tabela de ligação (sem m2m_changed): o ``save()`` do fato, feito
+        # antes, já atualizou ``data_modificacao`` e a versão da tabela.
+        through = FactRequerimento.riscos.through
+        if remove:
+            through.objects.filter(
+                factrequerimento_id=instance.pk, dimrisk_id__in=remove
+            ).delete()
+        if add:
+            through.objects.bulk_create(
+                [through(factrequerimento_id=instance.pk, dimrisk_id=pk) for pk in add],
+                ignore_conflicts=True,
+            )
+        if add or remove:
+            instance._prefetched_objects_cache = {}
+
+
+# === 3. LISTAGEM PLANA DO FATO (sem campos DRF) === #
+
+
+class FactRequerimentoFlatSerializer:
+    """Serializa a listagem de requerimentos diretamente de ``.values()``.
+
+    Não instancia campos DRF por linha: as dimensões 1:1 viram colunas planas
+    (chave + rótulo) resolvidas pelos mesmos JOINs do ``select_related``, e os
+    riscos são carregados numa única consulta à tabela de ligação, enviados uma
+    vez por resposta em ``riscos`` e referenciados em cada linha por ``riscos_ids``.
+    O serializer aninhado continua sendo usado no detalhe e na escrita.
+    """
+
+    fields = (
+        "req_num",
+        "status",
+        "data_inicio",
+        "data_fim",
+        "atividades_executadas",
+        "data_criacao",
+        "data_modificacao",
+        "data_processamento",
+        "data_aprovacao",
+        "doc_uuid",
+    )
+    related_fields = {
+        "requerente_matricula": "requerente_id",
+        "requerente_nome": "requerente__nome",
+        "funcionario_matricula": "funcionario_id",
+        "funcionario_nome": "funcionario__nome",
+        "uo_codigo": "uo_id",
+        "uo_descricao": "uo__descricao",
+        "regime_trabalho_codigo": "regime_trabalho_id",
+        "regime_trabalho_descricao": "regime_trabalho__descricao",
+        "local_atividade_codigo": "local_atividade_id",
+        "local_atividade_descricao": "local_atividade__descricao",
+        "tipo_requerimento_codigo": "tipo_requerimento_id",
+        "tipo_requerimento_descricao": "tipo_requerimento__descricao",
+    }
+    risk_fields = ("codigo", "categoria", "subcategoria", "descricao")
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self._riscos = None
+
+    @classmethod
+    def values(cls, queryset, **extra):
+        """Converte o queryset do fato (ou do arquivo) nas colunas planas da listagem.
+
+        ``extra`` acrescenta colunas calculadas (ex.: ``arquivado=Value(True)``); as
+        anotações da busca textual (``relevancia``/``destaque``) entram quando presentes.
+        """
+
+        searched = [name for name in search.ANNOTATIONS if name in queryset.query.annotations]
+        return (
+            queryset.select_related(None)
+            .prefetch_related(None)
+            .values(
+                *cls.fields,
+                *searched,
+                **{alias: F(lookup) for alias, lookup in cls.related_fields.items()},
+                **extra,
+            )
+        )
+
+    def _risk_links(self):
+        """Ligações com riscos das linhas; as arquivadas vêm da ponte do arquivo (``UNION``)."""
+
+        through = FactRequerimento.riscos.through
+        hot = [row["req_num"] for row in self.rows if not row.get("arquivado")]
+        archived = [row["req_num"] for row in self.rows if row.get("arquivado")]
+        links = through.objects.filter(factrequerimento_id__in=hot).values_list(
+            "factrequerimento_id",
+            "dimrisk_id",
+            *(f"dimrisk__{field}" for field in self.risk_fields),
+        )
+        if archived:
+            links = links.union(
+                FactRequerimentoArquivoRisco.objects.filter(req_num__in=archived).values_list(
+                    "req_num", "risco_id", *(f"risco__{field}" for field in self.risk_fields)
+                ),
+                all=True,
+            )
+        return links
+
+    def _attach_riscos(self, links) -> None:
+        by_fact = {row["req_num"]: [] for row in self.rows}
+        riscos = {}
+        for fact_id, risk_id, *values in links:
+            by_fact[fact_id].append(risk_id)
+            if risk_id not in riscos:
+                riscos[risk_id] = {"id": risk_id, **dict(zip(self.risk_fields, values))}
+
+        for row in self.rows:
+            row["riscos_ids"] = by_fact[row["req_num"]]
+        self._riscos = riscos
+
+    def _load_riscos(self):
+        if self._riscos is None:
+            self._attach_riscos(self._risk_links())
+
+    async def aload_riscos(self) -> None:
+        """Versão assíncrona da carga dos riscos (ORM assíncrono), para as views ASGI."""
+
+        if self._riscos is None:
+            self._attach_riscos([link async for link in self._risk_links()])
+
+    @property
+    def data(self):
+        self._load_riscos()
+        return self.rows
+
+    @property
+    def riscos(self):
+        self._load_riscos()
+        return self._riscos
+
+
+# === 4. CARGA EM LOTE DO FATO === #
+
+
+class FactRequerimentoBulkRowSerializer(serializers.ModelSerializer):
+    """Valida os campos escalares de uma linha da carga em lote.
+
+    As chaves das dimensões chegam como texto/inteiros e são resolvidas depois,
+    para todas as linhas de uma vez (ver ``api.bulk``); por isso aqui não há
+    ``PrimaryKeyRelatedField`` nem o ``UniqueValidator`` de ``doc_uuid``, que
+    fariam uma consulta por linha.
+    """
+
+    requerente_matricula = serializers.CharField(max_length=20)
+    funcionario_matricula = serializers.CharField(max_length=20)
+    uo_codigo = serializers.CharField(max_length=10)
+    regime_trabalho_codigo = serializers.CharField(max_length=10)
+    local_atividade_codigo = serializers.CharField(max_length=10)
+    tipo_requerimento_codigo = serializers.CharField(max_length=10)
+    riscos_ids = serializers.ListField(child=serializers.IntegerField())
+
+    class Meta:
+        model = FactRequerimento
+        fields = [
+            "status",
+            "data_inicio",
+            "data_fim",
+            "atividades_executadas",
+            "data_processamento",
+            "data_aprovacao",
+            "doc_uuid",
+            "requerente_matricula",
+            "funcionario_matricula",
+            "uo_codigo",
+            "regime_trabalho_codigo",
+            "local_atividade_codigo",
+            "tipo_requerimento_codigo",
+            "riscos_ids",
+        ]
+        extra_kwargs = {"doc_uuid": {"validators": []}}
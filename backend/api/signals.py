@@ -2,112 +2,175 @@
 
 from __future__ import annotations
 
-import csv
+import hashlib
 import logging
+import time
 from pathlib import Path
-from typing import Dict, Iterable
+from typing import Dict, Tuple
 
 from django.conf import settings
-from django.db import transaction
-from django.db.models.signals import post_migrate
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import DimRisk, DimUO, DimUser
+from . import rollups, search
+from .dimension_cache import dimension_cache
+from .models import DimensionSyncState, FactRequerimento
+from .pipeline import run_pipeline
+from .versioning import DIMENSION_MODELS, FACT_TABLE, bump_versions
 
 logger = logging.getLogger(__name__)
 
 DATA_DIR = Path(settings.BASE_DIR).parent / "frontend" / "src" / "assets" / "files"
+SOURCES = ("dimRisk.csv", "dimUser.csv")
+
+
+def _fingerprint(csv_path: Path, state: DimensionSyncState | None) -> Tuple[int, int, str]:
+    """Retorna (tamanho, mtime, sha256), reaproveitando o hash quando tamanho e mtime batem."""
+
+    stat = csv_path.stat()
+    if state and state.tamanho == stat.st_size and state.modificado_em_ns == stat.st_mtime_ns:
+        return stat.st_size, stat.st_mtime_ns, state.hash_conteudo
+
+    digest = hashlib.sha256()
+    with csv_path.open("rb") as stream:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+def _is_unchanged(
+    filename: str, state: DimensionSyncState | None, fingerprint: Tuple[int, int, str]
+) -> bool:
+    size, mtime_ns, content_hash = fingerprint
+    if state is None or state.hash_conteudo != content_hash:
+        return False
+
+    if state.tamanho != size or state.modificado_em_ns != mtime_ns:
+        DimensionSyncState.objects.filter(arquivo=filename).update(
+            tamanho=size, modificado_em_ns=mtime_ns
+        )
+    logger.info(
+        "%s sem alterações desde a última carga; sincronização ignorada (~%.2fs economizados)",
+        filename,
+        state.duracao_carga,
+    )
+    return True
+
+
+def sync_dimensions(force: bool = False) -> None:
+    """Carrega os arquivos base cujo conteúdo mudou desde a última sincronização."""
+
+    states = {
+        state.arquivo: state for state in DimensionSyncState.objects.filter(arquivo__in=SOURCES)
+    }
+    pending: Dict[str, Tuple[Path, Tuple[int, int, str]]] = {}
+    for filename in SOURCES:
+        csv_path = DATA_DIR / filename
+        if not csv_path.exists():
+            logger.warning("Arquivo de carga não encontrado: %s", csv_path)
+            continue
+
+        fingerprint = _fingerprint(csv_path, states.get(filename))
+        if not force and _is_unchanged(filename, states.get(filename), fingerprint):
+            continue
+        pending[filename] = (csv_path, fingerprint)
+
+    if not pending:
+        return
 
+    started = time.perf_counter()
+    step_results = run_pipeline({filename: path for filename, (path, _) in pending.items()})
+    for step_result in step_results:
+        logger.info("%s (%.2fs)", step_result.result, step_result.elapsed)
+
+    for filename, (_, (size, mtime_ns, content_hash)) in pending.items():
+        DimensionSyncState.objects.update_or_create(
+            arquivo=filename,
+            defaults={
+                "tamanho": size,
+                "modificado_em_ns": mtime_ns,
+                "hash_conteudo": content_hash,
+                "duracao_carga": sum(
+                    item.elapsed for item in step_results if item.step.source == filename
+                ),
+            },
+        )
+    logger.info("Carga das dimensões concluída em %.2fs", time.perf_counter() - started)
 
-def _normalize_key(value: str | None) -> str:
-    if not value:
-        return ""
-    return value.replace("\ufeff", "").strip()
 
+@receiver(post_migrate)
+def populate_dimensions(sender, **kwargs) -> None:
+    if sender.name != "api":
+        return
 
-def _normalize_value(value: str | None) -> str:
-    if value is None:
-        return ""
-    return value.replace("\ufeff", "").strip()
+    try:
+        sync_dimensions(force=getattr(settings, "DIMENSION_SYNC_FORCE", False))
+    except Exception:  # pragma: no cover - apenas log de suporte
+        logger.exception("Falha ao popular tabelas de dimensão")
 
 
-def _read_csv(filename: str) -> Iterable[Dict[str, str]]:
-    csv_path = DATA_DIR / filename
-    if not csv_path.exists():
-        logger.warning("Arquivo de carga não encontrado: %s", csv_path)
-        return []
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs) -> None:
+    """Refaz os *triggers* do índice textual que um ``ALTER`` no SQLite tenha apagado."""
 
-    with csv_path.open(encoding="utf-8-sig") as stream:
-        reader = csv.DictReader(stream, delimiter=";")
-        for row in reader:
-            normalized = {_normalize_key(key): _normalize_value(val) for key, val in row.items()}
-            yield normalized
+    if sender.name == "api":
+        search.ensure_index(using)
 
 
-def _load_risks() -> None:
-    rows = list(_read_csv("dimRisk.csv"))
-    if not rows:
-        return
+def bump_dimension_version(sender, **kwargs) -> None:
+    """Invalida caches/validadores da dimensão alterada fora das cargas em lote."""
 
-    with transaction.atomic():
-        for row in rows:
-            codigo = row.get("codigo")
-            subcategoria = row.get("subcategoria")
-            descricao = row.get("descricao")
-            categoria = row.get("categoria", "")
+    bump_versions(sender._meta.db_table)
+    dimension_cache.invalidate(sender)
 
-            if not codigo or not subcategoria or not descricao:
-                continue
 
-            DimRisk.objects.update_or_create(
-                codigo=codigo,
-                subcategoria=subcategoria,
-                descricao=descricao,
-                defaults={"categoria": categoria},
-            )
+for _model in DIMENSION_MODELS:
+    post_save.connect(
+        bump_dimension_version, sender=_model, dispatch_uid=f"bump-{_model.__name__}"
+    )
+    post_delete.connect(
+        bump_dimension_version, sender=_model, dispatch_uid=f"bump-{_model.__name__}"
+    )
 
 
-def _load_users() -> None:
-    rows = list(_read_csv("dimUser.csv"))
-    if not rows:
-        return
+@receiver(pre_save, sender=FactRequerimento)
+def capture_rollup_contribution(sender, instance, **kwargs) -> None:
+    instance._rollup_previous = (
+        None if instance._state.adding else rollups.fetch_fact_values(instance.pk)
+    )
 
-    with transaction.atomic():
-        for row in rows:
-            matricula = row.get("matricula")
-            nome = row.get("nome")
-            if not matricula or not nome:
-                continue
-
-            email = row.get("email") or None
-            funcao = row.get("cargo") or None
-            uo_code = row.get("uo") or ""
-
-            uo_instance = None
-            if uo_code:
-                uo_instance, _ = DimUO.objects.get_or_create(
-                    codigo=uo_code,
-                    defaults={"descricao": uo_code},
-                )
-
-            DimUser.objects.update_or_create(
-                matricula=matricula,
-                defaults={
-                    "nome": nome,
-                    "email": email,
-                    "funcao": funcao,
-                    "uo": uo_instance,
-                },
-            )
 
+@receiver(post_save, sender=FactRequerimento)
+def update_rollup_on_save(sender, instance, **kwargs) -> None:
+    rollups.record_change(
+        getattr(instance, "_rollup_previous", None), rollups.fact_values(instance)
+    )
 
-@receiver(post_migrate)
-def populate_dimensions(sender, **kwargs) -> None:
-    if sender.name != "api":
-        return
 
-    try:
-        _load_risks()
-        _load_users()
-    except Exception:  # pragma: no cover - apenas log de suporte
-        logger.exception("Falha ao popular tabelas de dimensão")
+@receiver(post_delete, sender=FactRequerimento)
+def update_rollup_on_delete(sender, instance, **kwargs) -> None:
+    rollups.record_change(rollups.fact_values(instance), None)
+
+
+@receiver(post_save, sender=FactRequerimento)
+@receiver(post_delete, sender=FactRequerimento)
+def bump_fact_version(sender, **kwargs) -> None:
+    """Muda a ETag das listagens do fato (o detalhe usa ``data_modificacao``)."""
+
+    bump_versions(FACT_TABLE)
+
+
+@receiver(m2m_changed, sender=FactRequerimento.riscos.through)
+def touch_fact_on_risks_change(sender, instance, action, reverse, pk_set, **kwargs) -> None:
+    """Alterar só os riscos não passa por ``save()``: atualiza a data de modificação."""
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        # ``post_clear`` pelo lado do risco não informa os fatos; sobra a versão da tabela.
+        facts = FactRequerimento.objects.filter(pk__in=pk_set or ())
+    else:
+        facts = FactRequerimento.objects.filter(pk=instance.pk)
+    facts.update(data_modificacao=timezone.now())
+    bump_versions(FACT_TABLE)
@@ -1,3 +1,599 @@
-from django.test import TestCase
+"""Testes de comportamento da API: cargas, paginação, agregados, carga em lote,
+validação condicional (ETag), arquivo e busca textual.
 
-# Create your tests here.
+Os benchmarks (``seed_bench``, ``bench_api``, ``bench_db``) medem velocidade; aqui
+se confere que as otimizações devolvem o mesmo resultado que o caminho simples.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from . import bulk, rollups, views
+from .archive import archive_requerimentos
+from .dimension_cache import dimension_cache
+from .loaders import load_risks, load_users
+from .models import (
+    DimLocalAtividade,
+    DimRegimeTrabalho,
+    DimRisk,
+    DimTipoRequerimento,
+    DimUO,
+    DimUser,
+    FactRequerimento,
+    FactRequerimentoArquivo,
+    FactRequerimentoDiario,
+)
+
+LIST_URL = "/api/requerimentos/"
+
+
+class FactFixturesMixin:
+    """Dimensões próprias dos testes e uma fábrica de requerimentos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.uo = DimUO.objects.create(codigo="TST", descricao="UO de teste")
+        cls.outra_uo = DimUO.objects.create(codigo="TST2", descricao="Outra UO de teste")
+        cls.user = DimUser.objects.create(matricula="T0001", nome="Ana Teste", uo=cls.uo)
+        cls.regime = DimRegimeTrabalho.objects.create(codigo="TREG", descricao="Regime")
+        cls.local = DimLocalAtividade.objects.create(codigo="TLOC", descricao="Local")
+        cls.tipo = DimTipoRequerimento.objects.create(codigo="TTIPO", descricao="Tipo")
+        cls.riscos = [
+            DimRisk.objects.create(
+                codigo="TESTE_A", categoria="FÍSICO", subcategoria="Ruído", descricao=f"r{i}"
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        # Caches do processo sobrevivem ao rollback de cada teste.
+        cache.clear()
+        dimension_cache.invalidate()
+
+    def make_fact(self, criado_em=None, riscos=(), **fields):
+        values = {
+            "status": "Aberto",
+            "atividades_executadas": "",
+            "doc_uuid": f"teste-{uuid.uuid4()}",
+            "requerente": self.user,
+            "funcionario": self.user,
+            "uo": self.uo,
+            "regime_trabalho": self.regime,
+            "local_atividade": self.local,
+            "tipo_requerimento": self.tipo,
+            **fields,
+        }
+        fact = FactRequerimento.objects.create(**values)
+        if riscos:
+            fact.riscos.set(riscos)
+        if criado_em is not None:
+            # ``auto_now_add`` ignora o valor passado no ``create``.
+            FactRequerimento.objects.filter(pk=fact.pk).update(data_criacao=criado_em)
+            fact.refresh_from_db()
+        return fact
+
+    def bulk_row(self, **fields):
+        return {
+            "status": "Aberto",
+            "atividades_executadas": "",
+            "doc_uuid": f"bulk-{uuid.uuid4()}",
+            "requerente_matricula": self.user.pk,
+            "funcionario_matricula": self.user.pk,
+            "uo_codigo": self.uo.pk,
+            "regime_trabalho_codigo": self.regime.pk,
+            "local_atividade_codigo": self.local.pk,
+            "tipo_requerimento_codigo": self.tipo.pk,
+            "riscos_ids": [self.riscos[0].pk],
+            **fields,
+        }
+
+    def walk(self, url, direction="next"):
+        """Segue os links ``direction`` a partir de ``url``; devolve as páginas visitadas."""
+
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append(data)
+            url = data[direction]
+        return pages
+
+
+def rollup_snapshot():
+    return sorted(
+        (
+            row.dia,
+            row.uo_id,
+            row.tipo_requerimento_id,
+            row.status,
+            row.regime_trabalho_id,
+            row.quantidade,
+            row.processados,
+            round(row.soma_prazo_processamento, 3),
+            row.aprovados,
+            round(row.soma_prazo_aprovacao, 3),
+        )
+        for row in FactRequerimentoDiario.objects.all()
+    )
+
+
+# === CARGA DAS DIMENSÕES === #
+
+
+class DimensionLoaderTests(TestCase):
+    def risk_rows(self, categoria="FÍSICO"):
+        # A terceira linha não tem subcategoria e é descartada.
+        values = [(categoria, "Calor", "a"), ("QUÍMICO", "Gases", "b"), ("QUÍMICO", "", "c")]
+        return [
+            {"codigo": "TESTE_L", "categoria": cat, "subcategoria": sub, "descricao": desc}
+            for cat, sub, desc in values
+        ]
+
+    def assertCounts(self, result, inserted=0, updated=0, unchanged=0, skipped=0):
+        self.assertEqual(
+            (result.inserted, result.updated, result.unchanged, result.skipped),
+            (inserted, updated, unchanged, skipped),
+        )
+
+    def test_risks_report_inserted_then_unchanged_then_updated(self):
+        self.assertCounts(load_risks(self.risk_rows()), inserted=2, skipped=1)
+        self.assertCounts(load_risks(self.risk_rows()), unchanged=2, skipped=1)
+        self.assertCounts(
+            load_risks(self.risk_rows("ERGONÔMICO")), updated=1, unchanged=1, skipped=1
+        )
+        self.assertEqual(
+            DimRisk.objects.get(codigo="TESTE_L", subcategoria="Calor").categoria, "ERGONÔMICO"
+        )
+
+    def test_chunked_load_matches_single_pass(self):
+        self.assertCounts(load_risks(self.risk_rows(), chunk_size=1), inserted=2, skipped=1)
+        self.assertCounts(load_risks(self.risk_rows(), chunk_size=1), unchanged=2, skipped=1)
+
+    def test_dry_run_counts_without_writing(self):
+        changes = []
+        result = load_risks(
+            self.risk_rows(), dry_run=True, report=lambda *change: changes.append(change)
+        )
+        self.assertCounts(result, inserted=2, skipped=1)
+        self.assertEqual(len(changes), 2)
+        self.assertFalse(DimRisk.objects.filter(codigo="TESTE_L").exists())
+
+    def test_users_create_missing_uos_and_detect_changes(self):
+        rows = [
+            {"matricula": "T9001", "nome": "José Teste", "email": "", "cargo": "", "uo": "TNOVA"},
+            {"matricula": "T9002", "nome": "", "email": "", "cargo": "", "uo": "TNOVA"},
+        ]
+        self.assertCounts(load_users(rows), inserted=1, skipped=1)
+        self.assertTrue(DimUO.objects.filter(codigo="TNOVA").exists())
+        self.assertEqual(DimUser.objects.get(matricula="T9001").nome_busca, "JOSE TESTE")
+
+        rows[0]["email"] = "jose@example.com"
+        self.assertCounts(load_users(rows), updated=1, skipped=1)
+        self.assertCounts(load_users(rows), unchanged=1, skipped=1)
+
+    def test_chunked_dry_run_reports_each_new_uo_once(self):
+        rows = [
+            {"matricula": f"T910{i}", "nome": f"P{i}", "email": "", "cargo": "", "uo": "TNOVA"}
+            for i in range(3)
+        ]
+        changes = []
+        result = load_users(
+            rows, chunk_size=1, dry_run=True, report=lambda *change: changes.append(change)
+        )
+        self.assertCounts(result, inserted=3)
+        new_uos = [key for table, op, key, _ in changes if table == DimUO._meta.db_table]
+        self.assertEqual(new_uos, ["TNOVA"])
+        self.assertFalse(DimUO.objects.filter(codigo="TNOVA").exists())
+
+
+# === PAGINAÇÃO POR CURSOR === #
+
+
+class CursorPaginationTests(FactFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        base = timezone.now() - timedelta(days=10)
+        # Pares com a mesma data de criação: o cursor precisa do deslocamento.
+        self.facts = [self.make_fact(criado_em=base + timedelta(hours=i // 2)) for i in range(11)]
+
+    def expected_order(self):
+        return list(
+            FactRequerimento.objects.order_by("-data_criacao", "req_num").values_list(
+                "req_num", flat=True
+            )
+        )
+
+    def test_next_links_cover_every_row_once_in_order(self):
+        pages = self.walk(f"{LIST_URL}?page_size=3")
+        seen = [row["req_num"] for page in pages for row in page["results"]]
+        self.assertEqual(seen, self.expected_order())
+        self.assertIsNone(pages[0]["previous"])
+
+    def test_previous_links_return_the_same_pages(self):
+        forward = self.walk(f"{LIST_URL}?page_size=3")
+        backward = self.walk(forward[-1]["previous"], direction="previous")
+        self.assertEqual(
+            [[row["req_num"] for row in page["results"]] for page in backward],
+            [[row["req_num"] for row in page["results"]] for page in reversed(forward[:-1])],
+        )
+
+    def test_new_rows_do_not_shift_the_next_page(self):
+        first = self.client.get(f"{LIST_URL}?page_size=4").json()
+        second_before = self.client.get(first["next"]).json()["results"]
+        self.make_fact()
+        second_after = self.client.get(first["next"]).json()["results"]
+        self.assertEqual(second_before, second_after)
+
+    def test_risks_are_sent_once_per_page(self):
+        self.make_fact(riscos=self.riscos[:2])
+        data = self.client.get(f"{LIST_URL}?page_size=1").json()
+        self.assertEqual(data["results"][0]["riscos_ids"], [risk.pk for risk in self.riscos[:2]])
+        self.assertEqual(
+            sorted(int(pk) for pk in data["riscos"]), [risk.pk for risk in self.riscos[:2]]
+        )
+
+
+# === AGREGADOS DIÁRIOS === #
+
+
+class RollupTests(FactFixturesMixin, TestCase):
+    def test_incremental_rollups_match_rebuild(self):
+        facts = [self.make_fact(riscos=self.riscos[:1]) for _ in range(4)]
+        facts[0].status = "Processado"
+        facts[0].data_processamento = facts[0].data_criacao + timedelta(hours=5)
+        facts[0].save()
+        facts[1].status = "Aprovado"
+        facts[1].data_processamento = facts[1].data_criacao + timedelta(hours=2)
+        facts[1].data_aprovacao = facts[1].data_criacao + timedelta(hours=3)
+        facts[1].uo = self.outra_uo
+        facts[1].save()
+        facts[2].delete()
+        rows = [self.bulk_row(), self.bulk_row(status="Em análise")]
+        self.client.post(f"{LIST_URL}bulk/", rows, "application/json")
+
+        incremental = rollup_snapshot()
+        self.assertEqual(sum(row[5] for row in incremental), FactRequerimento.objects.count())
+        rollups.rebuild()
+        self.assertEqual(rollup_snapshot(), incremental)
+
+    def test_stats_read_the_rollups(self):
+        self.make_fact()
+        self.make_fact(status="Processado")
+        response = self.client.get(f"{LIST_URL}stats/?group_by=status&uo=TST")
+        counts = {row["status"]: row["quantidade"] for row in response.json()["results"]}
+        self.assertEqual(counts, {"Aberto": 1, "Processado": 1})
+
+
+# === CARGA EM LOTE === #
+
+
+class BulkCreateTests(FactFixturesMixin, TestCase):
+    url = f"{LIST_URL}bulk/"
+
+    def post(self, rows):
+        return self.client.post(self.url, rows, "application/json")
+
+    def test_partial_success_reports_each_invalid_row(self):
+        duplicated = self.bulk_row()
+        rows = [
+            self.bulk_row(riscos_ids=[risk.pk for risk in self.riscos]),
+            self.bulk_row(uo_codigo="NAOEXISTE"),
+            self.bulk_row(riscos_ids=[self.riscos[0].pk, 999_999]),
+            duplicated,
+            {**duplicated},
+            self.bulk_row(status=""),
+        ]
+        response = self.post(rows)
+
+        self.assertEqual(response.status_code, 207)
+        body = response.json()
+        self.assertEqual([item["index"] for item in body["created"]], [0, 3])
+        errors = {item["index"]: item["errors"] for item in body["errors"]}
+        self.assertEqual(sorted(errors), [1, 2, 4, 5])
+        self.assertIn("uo_codigo", errors[1])
+        self.assertIn("riscos_ids", errors[2])
+        self.assertIn("doc_uuid", errors[4])
+        self.assertIn("status", errors[5])
+
+        created = FactRequerimento.objects.get(pk=body["created"][0]["req_num"])
+        self.assertEqual(
+            sorted(created.riscos.values_list("pk", flat=True)), [risk.pk for risk in self.riscos]
+        )
+
+    def test_all_valid_is_201_and_all_invalid_is_400(self):
+        self.assertEqual(self.post([self.bulk_row(), self.bulk_row()]).status_code, 201)
+        self.assertEqual(FactRequerimento.objects.count(), 2)
+        self.assertEqual(self.post([self.bulk_row(tipo_requerimento_codigo="X")]).status_code, 400)
+        self.assertEqual(FactRequerimento.objects.count(), 2)
+
+    def test_rejects_empty_payload(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post({"rows": "x"}).status_code, 400)
+
+    def test_doc_uuid_taken_after_the_check_becomes_a_row_error(self):
+        rows = [self.bulk_row(), self.bulk_row()]
+        check = bulk._taken_uuids
+        calls = []
+
+        def concurrent_insert(valid_rows):
+            taken = check(valid_rows)
+            if not calls:
+                # Outra requisição grava o mesmo doc_uuid logo após a conferência.
+                self.make_fact(doc_uuid=rows[1]["doc_uuid"])
+            calls.append(taken)
+            return taken
+
+        with mock.patch.object(bulk, "_taken_uuids", side_effect=concurrent_insert):
+            response = self.post(rows)
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([item["index"] for item in response.json()["created"]], [0])
+        self.assertEqual(response.json()["errors"][0]["index"], 1)
+        self.assertIn("doc_uuid", response.json()["errors"][0]["errors"])
+        self.assertEqual(FactRequerimento.objects.count(), 2)
+
+    def test_conflict_on_the_retry_is_409(self):
+        with mock.patch.object(bulk, "_insert", side_effect=IntegrityError):
+            response = self.post([self.bulk_row()])
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(FactRequerimento.objects.exists())
+
+
+# === VALIDAÇÃO CONDICIONAL === #
+
+
+class ConditionalGetTests(FactFixturesMixin, TestCase):
+    factory = AsyncRequestFactory()
+
+    def assertRevalidates(self, url, change):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_dimension_list(self):
+        self.assertRevalidates(
+            "/api/uos/", lambda: DimUO.objects.create(codigo="TST3", descricao="Nova")
+        )
+
+    def test_fact_list(self):
+        self.make_fact()
+        self.assertRevalidates(LIST_URL, self.make_fact)
+
+    def test_fact_detail_follows_the_row(self):
+        fact = self.make_fact()
+
+        def change():
+            fact.status = "Em análise"
+            fact.save()
+
+        self.assertRevalidates(f"{LIST_URL}{fact.pk}/", change)
+
+    def test_gzip_and_identity_bundles_have_distinct_etags(self):
+        gzipped = self.client.get("/api/dimensions/bundle/", HTTP_ACCEPT_ENCODING="gzip")
+        identity = self.client.get("/api/dimensions/bundle/")
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertNotEqual(gzipped["ETag"], identity["ETag"])
+        self.assertEqual(json.loads(identity.content)["uos"][0].keys(), {"codigo", "descricao"})
+        revalidated = self.client.get(
+            "/api/dimensions/bundle/",
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=gzipped["ETag"],
+        )
+        self.assertEqual(revalidated.status_code, 304)
+        # A ETag de uma codificação não valida a outra.
+        mismatched = self.client.get("/api/dimensions/bundle/", HTTP_IF_NONE_MATCH=gzipped["ETag"])
+        self.assertEqual(mismatched.status_code, 200)
+
+    async def async_get(self, viewset, actions, url, **headers):
+        with override_settings(API_ASYNC_READS=True):
+            view = viewset.as_view(actions, basename=viewset.queryset.model.__name__.lower())
+        request = self.factory.get(url, headers=headers)
+        return await view(request)
+
+    async def test_async_list_matches_sync_and_answers_304(self):
+        await FactRequerimento.objects.acreate(
+            status="Aberto",
+            doc_uuid="async-1",
+            requerente=self.user,
+            funcionario=self.user,
+            uo=self.uo,
+            regime_trabalho=self.regime,
+            local_atividade=self.local,
+            tipo_requerimento=self.tipo,
+        )
+        sync_response = await self.async_client.get(LIST_URL)
+        response = await self.async_get(views.FactRequerimentoViewSet, {"get": "list"}, LIST_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], sync_response["ETag"])
+        self.assertEqual(json.loads(response.content), json.loads(sync_response.content))
+
+        not_modified = await self.async_get(
+            views.FactRequerimentoViewSet,
+            {"get": "list"},
+            LIST_URL,
+            if_none_match=response["ETag"],
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    async def test_async_dimension_detail_answers_304(self):
+        url = f"/api/uos/{self.uo.pk}/"
+        view_kwargs = {"pk": self.uo.pk}
+        with override_settings(API_ASYNC_READS=True):
+            view = views.DimUOViewSet.as_view({"get": "retrieve"}, basename="dimuo")
+        response = await view(self.factory.get(url), **view_kwargs)
+        self.assertEqual(response.status_code, 200)
+        not_modified = await view(
+            self.factory.get(url, headers={"if_none_match": response["ETag"]}), **view_kwargs
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+
+# === ARQUIVO === #
+
+
+class ArchiveTests(FactFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.old_closed = [
+            self.make_fact(
+                criado_em=now - timedelta(days=400 + i),
+                status="Aprovado",
+                riscos=self.riscos[i : i + 1],
+            )
+            for i in range(3)
+        ]
+        self.old_open = self.make_fact(criado_em=now - timedelta(days=401), status="Aberto")
+        self.recent = [
+            self.make_fact(criado_em=now - timedelta(days=i), status="Aprovado") for i in range(2)
+        ]
+        rollups.rebuild()
+        self.rollups_before = rollup_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.moved = archive_requerimentos(now - timedelta(days=365), ["Aprovado"])
+
+    def merged(self):
+        """Ordem esperada: ``old_open`` empata com ``old_closed[1]`` e perde no ``req_num``."""
+
+        first, second, third = self.old_closed
+        return [*self.recent, first, second, self.old_open, third]
+
+    def test_moves_closed_rows_and_their_risks(self):
+        self.assertEqual(self.moved, (3, 3))
+        archived = {fact.pk for fact in self.old_closed}
+        self.assertEqual(
+            set(FactRequerimentoArquivo.objects.values_list("pk", flat=True)), archived
+        )
+        self.assertFalse(FactRequerimento.objects.filter(pk__in=archived).exists())
+        row = FactRequerimentoArquivo.objects.get(pk=self.old_closed[1].pk)
+        self.assertEqual([risk.pk for risk in row.riscos], [self.riscos[1].pk])
+
+    def test_rollups_keep_counting_archived_rows(self):
+        self.assertEqual(rollup_snapshot(), self.rollups_before)
+        rollups.rebuild()
+        self.assertEqual(rollup_snapshot(), self.rollups_before)
+
+    def test_list_merges_the_archive_only_on_request(self):
+        hot = [row["req_num"] for row in self.client.get(LIST_URL).json()["results"]]
+        self.assertEqual(hot, [fact.pk for fact in (*self.recent, self.old_open)])
+
+        pages = self.walk(f"{LIST_URL}?page_size=2&incluir_arquivados=1")
+        rows = [row for page in pages for row in page["results"]]
+        self.assertEqual([row["req_num"] for row in rows], [fact.pk for fact in self.merged()])
+        self.assertEqual(
+            [row["arquivado"] for row in rows], [False, False, True, True, False, True]
+        )
+        self.assertEqual(rows[3]["riscos_ids"], [self.riscos[1].pk])
+
+    def test_detail_and_export_include_the_archive_on_request(self):
+        url = f"{LIST_URL}{self.old_closed[0].pk}/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(f"{url}?incluir_arquivados=1").status_code, 200)
+
+        response = self.client.get(f"{LIST_URL}export/?format=ndjson&incluir_arquivados=1")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["req_num"] for row in rows], [fact.pk for fact in self.merged()])
+        self.assertEqual(rows[-1]["riscos"], ["TESTE_A"])
+        self.assertTrue(rows[-1]["arquivado"])
+
+
+# === BUSCA TEXTUAL === #
+
+
+class SearchTests(FactFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.once = self.make_fact(atividades_executadas="Manutenção da caldeira e pintura")
+        self.many = self.make_fact(
+            atividades_executadas="Manutenção, manutenção preventiva e manutenção corretiva"
+        )
+        self.other = self.make_fact(atividades_executadas="Limpeza do tanque")
+        self.unsafe = self.make_fact(
+            atividades_executadas='<img src=x onerror="alert(1)"> solda & pintura',
+            status="Em análise",
+        )
+
+    def search(self, query):
+        return self.client.get(f"{LIST_URL}?search={query}").json()["results"]
+
+    def test_matches_accent_insensitive_prefixes(self):
+        self.assertEqual(
+            {row["req_num"] for row in self.search("manut")}, {self.once.pk, self.many.pk}
+        )
+        self.assertEqual([row["req_num"] for row in self.search("CALDEIRA")], [self.once.pk])
+        self.assertEqual(self.search("inexistente"), [])
+
+    def test_orders_by_relevance(self):
+        rows = self.search("manutencao")
+        self.assertEqual([row["req_num"] for row in rows], [self.many.pk, self.once.pk])
+        self.assertGreater(rows[0]["relevancia"], rows[1]["relevancia"])
+
+    def test_combines_with_filters(self):
+        rows = self.client.get(f"{LIST_URL}?search=pintura&status=Aberto").json()["results"]
+        self.assertEqual([row["req_num"] for row in rows], [self.once.pk])
+
+    def test_highlight_escapes_the_text(self):
+        (row,) = self.search("solda")
+        self.assertIn("<mark>solda</mark>", row["destaque"])
+        self.assertIn("&lt;img", row["destaque"])
+        self.assertNotIn("<img", row["destaque"])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.other.atividades_executadas = "Inspeção do andaime"
+        self.other.save()
+        self.assertEqual([row["req_num"] for row in self.search("andaime")], [self.other.pk])
+        self.other.delete()
+        self.assertEqual(self.search("andaime"), [])
+
+    def test_export_carries_the_search_columns(self):
+        response = self.client.get(f"{LIST_URL}export/?format=ndjson&search=manutencao")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["req_num"] for row in rows], [self.many.pk, self.once.pk])
+        self.assertIn("relevancia", rows[0])
+        self.assertIn("<mark>", rows[0]["destaque"])
+
+
+# === ADMIN === #
+
+
+class AdminSearchTests(FactFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.numeric_user = DimUser.objects.create(matricula="12345", nome="Bia", uo=self.uo)
+        self.fact = self.make_fact(funcionario=self.numeric_user)
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin_user)
+
+    def search(self, model, term):
+        response = self.client.get(f"/admin/api/{model}/", {"q": term})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context["cl"].result_list)
+
+    def test_numeric_terms_match_keys(self):
+        self.assertEqual(self.search("factrequerimento", str(self.fact.pk)), [self.fact])
+        self.assertEqual(self.search("factrequerimento", "12345"), [self.fact])
+        self.assertEqual(self.search("dimuser", "123"), [self.numeric_user])
+
+    def test_unicode_digits_are_not_numbers(self):
+        self.assertEqual(self.search("factrequerimento", "¹²"), [])
+        # ``search_key`` decompõe "¹²" em "12"; os dígitos arábicos continuam não ASCII.
+        self.assertEqual(self.search("dimuser", "¹²"), [self.numeric_user])
+        self.assertEqual(self.search("factrequerimento", "١٢"), [])
+        self.assertEqual(self.search("dimuser", "١٢"), [])
@@ -0,0 +1,172 @@
+"""Versões por tabela usadas para invalidar caches e gerar validadores HTTP.
+
+Cada alteração em uma tabela monitorada incrementa ``TableVersion.versao``
+(via signals dos modelos ou explicitamente pelas cargas em lote, que não
+disparam signals). Como o contador fica no banco, todos os workers enxergam
+a mesma versão sem depender de um cache compartilhado.
+
+``cached_versions`` lê as versões pelo cache do Django, para que uma
+requisição servida do cache não precise ir ao banco; ``bump_versions``
+descarta essas entradas quando a transação que alterou a tabela é confirmada.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    DimCargo,
+    DimLocalAtividade,
+    DimRegimeTrabalho,
+    DimRisk,
+    DimTipoRequerimento,
+    DimUO,
+    DimUser,
+    FactRequerimento,
+    FactRequerimentoArquivo,
+    TableVersion,
+)
+
+VERSION_CACHE_PREFIX = "table-version"
+
+DIMENSION_MODELS = (
+    DimUser,
+    DimUO,
+    DimCargo,
+    DimLocalAtividade,
+    DimRegimeTrabalho,
+    DimTipoRequerimento,
+    DimRisk,
+)
+DIMENSION_TABLES = tuple(model._meta.db_table for model in DIMENSION_MODELS)
+FACT_TABLE = FactRequerimento._meta.db_table
+ARCHIVE_TABLE = FactRequerimentoArquivo._meta.db_table
+
+
+def bump_versions(*tables: str) -> None:
+    """Incrementa a versão das tabelas informadas (dentro da transação corrente)."""
+
+    now = timezone.now()
+    for table in tables:
+        updated = TableVersion.objects.filter(tabela=table).update(
+            versao=F("versao") + 1, atualizado_em=now
+        )
+        if not updated:
+            _, created = TableVersion.objects.get_or_create(
+                tabela=table, defaults={"versao": 1, "atualizado_em": now}
+            )
+            if not created:
+                TableVersion.objects.filter(tabela=table).update(
+                    versao=F("versao") + 1, atualizado_em=now
+                )
+
+    keys = [_version_cache_key(table) for table in tables]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _version_cache_key(table: str) -> str:
+    return f"{VERSION_CACHE_PREFIX}:{table}"
+
+
+def _versions_query(tables):
+    return TableVersion.objects.filter(tabela__in=tables).values_list(
+        "tabela", "versao", "atualizado_em"
+    )
+
+
+def get_versions(tables: Iterable[str]) -> Dict[str, Tuple[int, object]]:
+    """Retorna ``{tabela: (versão, atualizado_em)}`` numa única consulta."""
+
+    tables = list(tables)
+    versions = {table: (0, None) for table in tables}
+    for tabela, versao, atualizado_em in _versions_query(tables):
+        versions[tabela] = (versao, atualizado_em)
+    return versions
+
+
+async def aget_versions(tables: Iterable[str]) -> Dict[str, Tuple[int, object]]:
+    tables = list(tables)
+    versions = {table: (0, None) for table in tables}
+    async for tabela, versao, atualizado_em in _versions_query(tables):
+        versions[tabela] = (versao, atualizado_em)
+    return versions
+
+
+def cached_versions(tables: Iterable[str]) -> Dict[str, Tuple[int, object]]:
+    """Como ``get_versions``, mas servido pelo cache; só consulta o banco nas ausentes."""
+
+    tables = list(tables)
+    keys = {table: _version_cache_key(table) for table in tables}
+    found = cache.get_many(keys.values())
+    versions = {table: found[key] for table, key in keys.items() if key in found}
+
+    missing = [table for table in tables if table not in versions]
+    if missing:
+        fresh = get_versions(missing)
+        cache.set_many(
+            {keys[table]: value for table, value in fresh.items()},
+            timeout=getattr(settings, "TABLE_VERSION_CACHE_TIMEOUT", 1),
+        )
+        versions.update(fresh)
+    return versions
+
+
+async def acached_versions(tables: Iterable[str]) -> Dict[str, Tuple[int, object]]:
+    tables = list(tables)
+    keys = {table: _version_cache_key(table) for table in tables}
+    found = await cache.aget_many(keys.values())
+    versions = {table: found[key] for table, key in keys.items() if key in found}
+
+    missing = [table for table in tables if table not in versions]
+    if missing:
+        fresh = await aget_versions(missing)
+        await cache.aset_many(
+            {keys[table]: value for table, value in fresh.items()},
+            timeout=getattr(settings, "TABLE_VERSION_CACHE_TIMEOUT", 1),
+        )
+        versions.update(fresh)
+    return versions
+
+
+def validators_from_versions(
+    prefix: str, versions: Dict[str, Tuple[int, object]], *extra: object
+) -> Tuple[str, Optional[datetime]]:
+    """ETag forte e ``Last-Modified`` derivados das versões das tabelas.
+
+    ``extra`` entra na ETag (ex.: a data de modificação de uma linha), sem tocar nos dados.
+    """
+
+    fingerprint = "|".join(
+        f"{table}:{versao}:{atualizado_em.isoformat() if atualizado_em else ''}"
+        for table, (versao, atualizado_em) in sorted(versions.items())
+    )
+    fingerprint += "".join(f"|{value}" for value in extra)
+    digest = hashlib.sha1(fingerprint.encode()).hexdigest()[:20]
+    moments = [atualizado_em for _, atualizado_em in versions.values() if atualizado_em]
+    return f'"{prefix}-{digest}"', max(moments) if moments else None
+
+
+def versions_validators(
+    prefix: str, tables: Iterable[str], *extra: object
+) -> Tuple[str, Optional[datetime]]:
+    return validators_from_versions(prefix, cached_versions(tables), *extra)
+
+
+async def aversions_validators(
+    prefix: str, tables: Iterable[str], *extra: object
+) -> Tuple[str, Optional[datetime]]:
+    return validators_from_versions(prefix, await acached_versions(tables), *extra)
+
+
+def versions_etag(prefix: str, tables: Iterable[str]) -> str:
+    """ETag forte derivada das versões das tabelas, sem tocar nos dados em si."""
+
+    return versions_validators(prefix, tables)[0]
@@ -1,7 +1,36 @@
 """ViewSets responsáveis por expor os recursos da aplicação."""
 
-from rest_framework import viewsets
+import asyncio
+import gzip
+import re
+from itertools import chain
 
+from asgiref.sync import sync_to_async
+
+from django.db import IntegrityError
+from django.db.models import Value
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from . import columnar, risk_tree
+from .async_views import AsyncReadMixin
+from .bulk import create_requerimentos
+from .caching import ConditionalGetMixin, VersionedResponseCacheMixin
+from .export import (
+    DEFAULT_CHUNK_SIZE,
+    export_columns,
+    iter_export_rows,
+    stream_csv,
+    stream_ndjson,
+)
+from .bundle import bundle_etag, get_compressed_bundle
 from .models import (
     DimCargo,
     DimLocalAtividade,
@@ -11,7 +40,20 @@ from .models import (
     DimUO,
     DimUser,
     FactRequerimento,
+    FactRequerimentoArquivo,
+    FactRequerimentoDiario,
+    search_key,
 )
+from .filters import (
+    FactRequerimentoDiarioFilter,
+    FactRequerimentoFilter,
+    FactRequerimentoOrderingFilter,
+    FactRequerimentoSearchFilter,
+    prefix_filter,
+)
+from .pagination import FactRequerimentoCursorPagination
+from .renderers import ArrowStreamRenderer, CSVRenderer, NDJSONRenderer, ParquetRenderer
+from .rollups import GROUPABLE_FIELDS, summarize
 from .serializers import (
     DimCargoSerializer,
     DimLocalAtividadeSerializer,
@@ -20,8 +62,19 @@ from .serializers import (
     DimTipoRequerimentoSerializer,
     DimUOSerializer,
     DimUserSerializer,
+    FactRequerimentoFlatSerializer,
     FactRequerimentoSerializer,
 )
+from .versioning import (
+    ARCHIVE_TABLE,
+    DIMENSION_TABLES,
+    FACT_TABLE,
+    acached_versions,
+    cached_versions,
+    validators_from_versions,
+)
+
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
 
 
 # =================================================================
@@ -29,68 +82,178 @@ from .serializers import (
 # =================================================================
 
 
-class DimUserViewSet(viewsets.ModelViewSet):
+class DimensionViewSet(
+    AsyncReadMixin, ConditionalGetMixin, VersionedResponseCacheMixin, viewsets.ModelViewSet
+):
+    """Base dos CRUDs de lookup: respostas cacheadas e validadas pela versão da tabela."""
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional_response(
+            request, self.acached_response, super().alist, *args, **kwargs
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aconditional_response(
+            request, self.acached_response, super().aretrieve, *args, **kwargs
+        )
+
+
+class DimUserViewSet(DimensionViewSet):
     """CRUD para a tabela DimUser."""
 
-    queryset = DimUser.objects.all()
+    queryset = DimUser.objects.select_related("uo")
     serializer_class = DimUserSerializer
+    version_tables = (DimUser._meta.db_table, DimUO._meta.db_table)
+    search_limit = 20
+    max_search_limit = 50
 
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """Autocomplete por matrícula ou nome (sem acentos), limitado a ``limit`` resultados.
 
-class DimUOViewSet(viewsets.ModelViewSet):
+        Primeiro busca por prefixo (matrícula ou início do nome); se faltar resultado,
+        completa com nomes que contenham o termo, o que no PostgreSQL usa o índice
+        de trigramas ``dim_user_nome_busca_trgm_idx``.
+        """
+
+        return self.conditional_response(request, self._search)
+
+    def _search(self, request):
+        term = search_key(request.query_params.get("q"))
+        try:
+            limit = int(request.query_params.get("limit", self.search_limit))
+        except ValueError:
+            limit = self.search_limit
+        limit = max(1, min(limit, self.max_search_limit))
+        if not term:
+            return Response([])
+
+        queryset = self.get_queryset()
+        if term.isdigit():
+            users = list(
+                queryset.filter(prefix_filter("matricula", term)).order_by("matricula")[:limit]
+            )
+        else:
+            users = list(
+                queryset.filter(prefix_filter("nome_busca", term)).order_by("nome_busca")[:limit]
+            )
+            if len(users) < limit:
+                users += queryset.filter(nome_busca__contains=term).exclude(
+                    matricula__in=[user.matricula for user in users]
+                )[: limit - len(users)]
+
+        return Response(self.get_serializer(users, many=True).data)
+
+
+class DimUOViewSet(DimensionViewSet):
     """CRUD para a tabela DimUO."""
 
     queryset = DimUO.objects.all()
     serializer_class = DimUOSerializer
 
 
-class DimCargoViewSet(viewsets.ModelViewSet):
+class DimCargoViewSet(DimensionViewSet):
     """CRUD para a tabela DimCargo."""
 
     queryset = DimCargo.objects.all()
     serializer_class = DimCargoSerializer
 
 
-class DimLocalAtividadeViewSet(viewsets.ModelViewSet):
+class DimLocalAtividadeViewSet(DimensionViewSet):
     """CRUD para a tabela DimLocalAtividade."""
 
     queryset = DimLocalAtividade.objects.all()
     serializer_class = DimLocalAtividadeSerializer
 
 
-class DimRegimeTrabalhoViewSet(viewsets.ModelViewSet):
+class DimRegimeTrabalhoViewSet(DimensionViewSet):
     """CRUD para a tabela DimRegimeTrabalho."""
 
     queryset = DimRegimeTrabalho.objects.all()
     serializer_class = DimRegimeTrabalhoSerializer
 
 
-class DimTipoRequerimentoViewSet(viewsets.ModelViewSet):
+class DimTipoRequerimentoViewSet(DimensionViewSet):
     """CRUD para a tabela DimTipoRequerimento."""
 
     queryset = DimTipoRequerimento.objects.all()
     serializer_class = DimTipoRequerimentoSerializer
 
 
-class DimRiskViewSet(viewsets.ModelViewSet):
+class DimRiskViewSet(DimensionViewSet):
     """CRUD para a tabela DimRisk."""
 
     queryset = DimRisk.objects.all()
     serializer_class = DimRiskSerializer
 
+    @action(detail=False, methods=["get"])
+    def tree(self, request):
+        """Catálogo ``codigo -> subcategoria -> [{id, descricao}]``; ``?codigo=`` traz um ramo."""
+
+        codigo = request.query_params.get("codigo", "").strip()
+        branch = risk_tree.codigo_key(codigo) if codigo else None
+        return compressed_json_response(
+            request, risk_tree.tree_etag(branch), lambda: risk_tree.get_compressed_tree(branch)
+        )
+
+
+def compressed_json_response(request, etag: str, load_payload):
+    """JSON comprimido com gzip por ``load_payload()``, validado por ``etag``.
+
+    Responde 304 sem chamar ``load_payload`` quando a ETag confere, e 404 se ele
+    devolve ``None``. A representação gzip leva a ETag com o sufixo ``-gzip``: cada
+    codificação tem o seu validador, para que um cache intermediário não reaproveite
+    o corpo de uma no 304 da outra.
+    """
+
+    gzipped = bool(ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")))
+    if gzipped:
+        etag = f'{etag[:-1]}-gzip"'
+
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        payload = load_payload()
+        if payload is None:
+            raise Http404
+        if gzipped:
+            response = HttpResponse(payload, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(gzip.decompress(payload), content_type="application/json")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+class DimensionBundleViewSet(viewsets.ViewSet):
+    """Todas as dimensões do formulário numa única resposta versionada por ETag."""
+
+    @action(detail=False, methods=["get"])
+    def bundle(self, request):
+        etag = bundle_etag()
+        return compressed_json_response(request, etag, lambda: get_compressed_bundle(etag))
+
 
 # =================================================================
 # VIEWSET DA TABELA FATO (FactRequerimento)
 # =================================================================
 
 
-class FactRequerimentoViewSet(viewsets.ModelViewSet):
-    """CRUD e gestão da tabela de Fato (Requerimento)."""
+class FactRequerimentoViewSet(AsyncReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    """CRUD e gestão da tabela de Fato (Requerimento).
+
+    Com ``?incluir_arquivados=1`` a listagem intercala o arquivo (linhas com
+    ``arquivado``) e o detalhe procura no arquivo o que não está mais na tabela fato.
+    """
 
     queryset = (
         FactRequerimento.objects.all()
         .select_related(
-            "requerente",
-            "funcionario",
+            "requerente__uo",
+            "funcionario__uo",
             "uo",
             "regime_trabalho",
             "local_atividade",
@@ -98,4 +261,329 @@ class FactRequerimentoViewSet(viewsets.ModelViewSet):
         )
         .prefetch_related("riscos")
     )
+    archive_queryset = FactRequerimentoArquivo.objects.select_related(
+        "requerente__uo",
+        "funcionario__uo",
+        "uo",
+        "regime_trabalho",
+        "local_atividade",
+        "tipo_requerimento",
+    )
+    archive_param = "incluir_arquivados"
     serializer_class = FactRequerimentoSerializer
+    pagination_class = FactRequerimentoCursorPagination
+    filter_backends = [
+        FactRequerimentoFilter,
+        FactRequerimentoSearchFilter,
+        FactRequerimentoOrderingFilter,
+    ]
+    # A paginação por cursor posiciona-se pelo primeiro campo da ordenação, por isso
+    # a lista branca só tem campos obrigatórios e indexados.
+    ordering_fields = ["data_criacao", "req_num"]
+    ordering = ["-data_criacao", "req_num"]
+    version_tables = (FACT_TABLE, *DIMENSION_TABLES)
+    bulk_max_rows = 5000
+    export_chunk_size = DEFAULT_CHUNK_SIZE
+
+    def include_archived(self, request) -> bool:
+        return request.query_params.get(self.archive_param, "").lower() in ("1", "true", "sim")
+
+    def get_version_tables(self):
+        tables = super().get_version_tables()
+        if self.include_archived(self.request):
+            tables += (ARCHIVE_TABLE,)
+        return tables
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != "retrieve" or not self.include_archived(self.request):
+                raise
+        instance = self._archived_object(self.kwargs[self.lookup_field])
+        if instance is None:
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    def _archived_object(self, pk):
+        """Requerimento arquivado com os riscos já carregados, ou ``None``."""
+
+        try:
+            instance = self.archive_queryset.filter(pk=pk).first()
+        except (TypeError, ValueError):
+            return None
+        if instance is not None:
+            # Avalia a ``cached_property`` aqui, já que o caminho assíncrono só serializa.
+            instance.riscos
+        return instance
+
+    def get_validators(self, request, tables=None):
+        """No detalhe, a ETag usa a ``data_modificacao`` da linha e as versões das dimensões."""
+
+        if self.action != "retrieve":
+            return super().get_validators(request, tables)
+        try:
+            modified = self._modified_lookup(FactRequerimento).first()
+            if modified is None and self.include_archived(request):
+                modified = self._modified_lookup(FactRequerimentoArquivo).first()
+        except (TypeError, ValueError):
+            return None
+        return self._detail_validators(request, modified, cached_versions(DIMENSION_TABLES))
+
+    async def aget_validators(self, request, tables=None):
+        if self.action != "retrieve":
+            return await super().aget_validators(request, tables)
+        try:
+            modified, versions = await asyncio.gather(
+                self._modified_lookup(FactRequerimento).afirst(),
+                acached_versions(DIMENSION_TABLES),
+            )
+            if modified is None and self.include_archived(request):
+                modified = await self._modified_lookup(FactRequerimentoArquivo).afirst()
+        except (TypeError, ValueError):
+            return None
+        return self._detail_validators(request, modified, versions)
+
+    def _modified_lookup(self, model):
+        return model.objects.filter(pk=self.kwargs[self.lookup_field]).values_list(
+            "data_modificacao", flat=True
+        )
+
+    def _detail_validators(self, request, modified, versions):
+        if modified is None:
+            return None
+        etag, dimensions_modified = validators_from_versions(
+            self.get_validators_prefix(request), versions, modified.isoformat()
+        )
+        return etag, max(filter(None, (modified, dimensions_modified)))
+
+    def list(self, request, *args, **kwargs):
+        """Listagem plana: colunas de ``.values()`` e riscos enviados uma vez por resposta."""
+
+        return self.conditional_response(request, self._list)
+
+    def _list(self, request):
+        if self.include_archived(request):
+            querysets = self._flat_querysets_with_archive()
+            page = self.paginator.paginate_querysets(querysets, request, view=self)
+            rows = page if page is not None else list(chain.from_iterable(querysets))
+            return self._flat_response(
+                FactRequerimentoFlatSerializer(rows), paginated=page is not None
+            )
+
+        queryset = FactRequerimentoFlatSerializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        serializer = FactRequerimentoFlatSerializer(page if page is not None else queryset)
+        return self._flat_response(serializer, paginated=page is not None)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, self._alist)
+
+    async def _alist(self, request):
+        if self.include_archived(request):
+            querysets = self._flat_querysets_with_archive()
+            page = await self.paginator.apaginate_querysets(querysets, request, view=self)
+        else:
+            querysets = [
+                FactRequerimentoFlatSerializer.values(self.filter_queryset(self.get_queryset()))
+            ]
+            page = await self.paginator.apaginate_queryset(querysets[0], request, view=self)
+        rows = page if page is not None else [row for qs in querysets async for row in qs]
+        serializer = FactRequerimentoFlatSerializer(rows)
+        await serializer.aload_riscos()
+        return self._flat_response(serializer, paginated=page is not None)
+
+    def _flat_querysets_with_archive(self):
+        """Fato e arquivo com os mesmos filtros; ``arquivado`` indica a origem da linha."""
+
+        return [
+            FactRequerimentoFlatSerializer.values(
+                self.filter_queryset(self.get_queryset()), arquivado=Value(False)
+            ),
+            FactRequerimentoFlatSerializer.values(
+                self.filter_queryset(self.archive_queryset), arquivado=Value(True)
+            ),
+        ]
+
+    def _flat_response(self, serializer, paginated):
+        if not paginated:
+            return Response({"results": serializer.data, "riscos": serializer.riscos})
+
+        response = self.get_paginated_response(serializer.data)
+        response.data["riscos"] = serializer.riscos
+        return response
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, self._aretrieve)
+
+    async def _aretrieve(self, request):
+        """Detalhe com o fato (e dimensões via JOIN) e os riscos buscados em paralelo."""
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        pk = self.kwargs[self.lookup_field]
+        try:
+            instance, riscos = await asyncio.gather(
+                queryset.filter(pk=pk).afirst(),
+                self._arisks(DimRisk.objects.filter(requerimentos_riscos=pk)),
+            )
+        except (TypeError, ValueError):
+            instance = None
+        if instance is None and self.include_archived(request):
+            instance = await sync_to_async(self._archived_object)(pk)
+        if instance is None:
+            raise Http404
+        self.check_object_permissions(request, instance)
+
+        if isinstance(instance, FactRequerimento):
+            prefetched = instance.riscos.all()
+            prefetched._result_cache = riscos
+            prefetched._prefetch_done = True
+            instance._prefetched_objects_cache = {"riscos": prefetched}
+        return Response(self.get_serializer(instance).data)
+
+    @staticmethod
+    async def _arisks(queryset):
+        return [risk async for risk in queryset]
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Cria vários requerimentos de uma vez (lista de linhas ou ``{"rows": [...]}``).
+
+        As chaves das dimensões são conferidas com uma consulta por dimensão; as linhas
+        inválidas voltam em ``errors`` (com o índice na entrada) sem impedir as demais.
+        Responde 201 se todas foram criadas, 207 se parte falhou e 400 se nenhuma entrou;
+        409 se gravações concorrentes derrubarem também a segunda tentativa do lote.
+        """
+
+        rows = request.data.get("rows") if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError({"rows": "Envie uma lista não vazia de requerimentos."})
+        if len(rows) > self.bulk_max_rows:
+            raise ValidationError({"rows": f"Máximo de {self.bulk_max_rows} linhas por envio."})
+
+        try:
+            created, errors = create_requerimentos(rows)
+        except IntegrityError:
+            return Response(
+                {"detail": "O lote conflitou com gravações concorrentes; reenvie-o."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {
+                "created": [{"index": index, "req_num": pk} for index, pk in created],
+                "errors": [{"index": index, "errors": detail} for index, detail in errors],
+            },
+            status=response_status,
+        )
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """Contagens e prazos médios lidos dos agregados diários (não varre a tabela fato).
+
+        ``group_by`` aceita ``dia``, ``uo``, ``tipo_requerimento``, ``status`` e
+        ``regime_trabalho`` (separados por vírgula); prazos médios em segundos.
+        """
+
+        group_by = [
+            field.strip()
+            for field in request.query_params.get("group_by", "status").split(",")
+            if field.strip()
+        ]
+        invalid = [field for field in group_by if field not in GROUPABLE_FIELDS]
+        if invalid:
+            allowed = ", ".join(GROUPABLE_FIELDS)
+            raise ValidationError(
+                {"group_by": f"Campos inválidos: {', '.join(invalid)}. Use: {allowed}."}
+            )
+
+        def respond(request):
+            queryset = FactRequerimentoDiarioFilter().filter_queryset(
+                request, FactRequerimentoDiario.objects.all(), self
+            )
+            return Response({"group_by": group_by, "results": summarize(queryset, group_by)})
+
+        # Os agregados mudam junto com o fato; ``rebuild_rollups`` incrementa a própria tabela.
+        tables = (FactRequerimentoDiario._meta.db_table, FACT_TABLE)
+        return self.conditional_response(
+            request, respond, validators=self.get_validators(request, tables)
+        )
+
+    @action(detail=False, methods=["get"], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """Exporta os requerimentos filtrados em CSV (padrão) ou NDJSON (``?format=ndjson``).
+
+        Aceita os mesmos filtros e ordenação da listagem, sem paginação. As linhas são
+        lidas em fatias de ``export_chunk_size`` e enviadas conforme são lidas; os
+        riscos saem como a lista de códigos (``riscos`` separados por ``|`` no CSV). Com
+        ``?search=`` saem também ``relevancia`` e ``destaque``; com
+        ``?incluir_arquivados=1`` o arquivo entra intercalado, com a coluna ``arquivado``.
+        """
+
+        archived = self.include_archived(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = iter_export_rows(
+            queryset,
+            chunk_size=self.export_chunk_size,
+            archive_queryset=self.filter_queryset(self.archive_queryset) if archived else None,
+        )
+        columns = export_columns(queryset, archived)
+        renderer = request.accepted_renderer
+        if renderer.format == NDJSONRenderer.format:
+            content = stream_ndjson(rows, columns)
+        else:
+            content = stream_csv(rows, columns)
+
+        response = StreamingHttpResponse(
+            content, content_type=f"{renderer.media_type}; charset=utf-8"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="requerimentos.{renderer.format}"'
+        )
+        return response
+
+
+# =================================================================
+# EXPORTAÇÃO COLUNAR (Parquet / Arrow)
+# =================================================================
+
+
+class ColumnarExportViewSet(viewsets.ViewSet):
+    """Uma tabela do esquema estrela em Parquet (padrão) ou Arrow IPC (``?format=arrow``).
+
+    ``GET /api/analytics/<tabela>/``; ``?since=<ISO 8601>`` limita o fato e a ponte
+    ``fato_requerimento_riscos`` aos requerimentos alterados desde então.
+    """
+
+    renderer_classes = [ParquetRenderer, ArrowStreamRenderer]
+
+    def retrieve(self, request, pk=None):
+        if pk not in columnar.TABLES:
+            raise Http404
+        if not columnar.available():
+            return Response(
+                {"detail": "Exportação colunar indisponível: pyarrow não está instalado."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+
+        since = request.query_params.get("since")
+        if since is not None:
+            since = parse_datetime(since)
+            if since is None:
+                raise ValidationError({"since": "Data inválida; use ISO 8601."})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            columnar.stream_table(pk, renderer.format, since), content_type=renderer.media_type
+        )
+        extension = columnar.FORMATS[renderer.format]
+        response["Content-Disposition"] = f'attachment; filename="{pk}.{extension}"'
+        return response
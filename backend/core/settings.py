@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -36,6 +38,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Só fica ativo com API_METRICS (ver abaixo); desligado, sai da pilha na inicialização.
+    'api.metrics.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,6 +62,40 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [],
 }
 
+# Carga das dimensões a partir dos CSVs (tamanho dos lotes de bulk_create/bulk_update)
+DIMENSION_LOAD_BATCH_SIZE = int(os.getenv("DIMENSION_LOAD_BATCH_SIZE", "500"))
+# Processos para interpretar os CSVs em paralelo (no PostgreSQL, também threads de gravação).
+# 1 carrega tudo no próprio processo: iniciar o pool (um django.setup() por processo) custa
+# mais que interpretar os CSVs do repositório.
+DIMENSION_LOAD_WORKERS = int(os.getenv("DIMENSION_LOAD_WORKERS", "1"))
+# Com mais de um worker, tamanho somado (bytes) dos CSVs a partir do qual o pool é usado
+DIMENSION_LOAD_PARALLEL_MIN_BYTES = int(
+    os.getenv("DIMENSION_LOAD_PARALLEL_MIN_BYTES", str(8 * 1024 * 1024))
+)
+# Recarrega os CSVs no migrate mesmo quando a impressão digital não mudou
+DIMENSION_SYNC_FORCE = os.getenv("DIMENSION_SYNC_FORCE", "").lower() in ("1", "true", "yes")
+# Intervalo (s) entre conferências das versões das dimensões pelo cache de validação
+DIMENSION_CACHE_VERSION_TTL = float(os.getenv("DIMENSION_CACHE_VERSION_TTL", "1.0"))
+
+# Sob ASGI (uvicorn/daphne), atende list/retrieve com views assíncronas (api/async_views.py)
+API_ASYNC_READS = os.getenv("API_ASYNC_READS", "").lower() in ("1", "true", "yes")
+
+# Métricas por endpoint (consultas, tempo de banco/render, latência) em /api/_metrics
+API_METRICS = os.getenv("API_METRICS", "").lower() in ("1", "true", "yes")
+# Requisições recentes por endpoint usadas nos percentis
+API_METRICS_WINDOW = int(os.getenv("API_METRICS_WINDOW", "1024"))
+# Requisições mais lentas que isso (ms) vão para o log com o SQL executado
+API_SLOW_REQUEST_MS = float(os.getenv("API_SLOW_REQUEST_MS", "500"))
+
+# Arquivamento (manage.py archive_requerimentos): idade mínima (dias, pela data de criação)
+# e status considerados encerrados
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "730"))
+ARCHIVE_CLOSED_STATUSES = [
+    status.strip()
+    for status in os.getenv("ARCHIVE_CLOSED_STATUSES", "Aprovado,Reprovado").split(",")
+    if status.strip()
+]
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -82,12 +120,36 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 default_db_engine = os.getenv("DB_ENGINE", "django.db.backends.sqlite3")
+# DB_PROFILE: "default" (padrões do Django) ou "performance" (perfil de produção abaixo).
+# Compare os dois com `manage.py bench_db --compare`.
+DB_PROFILE = os.getenv("DB_PROFILE", "default").lower()
+if DB_PROFILE not in ("default", "performance"):
+    raise ImproperlyConfigured(
+        f"DB_PROFILE inválido: {DB_PROFILE!r} (use default ou performance)."
+    )
 
 if default_db_engine == "django.db.backends.sqlite3":
     default_db_config = {
         "ENGINE": default_db_engine,
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.getenv("DB_NAME") or BASE_DIR / "db.sqlite3",
     }
+    if DB_PROFILE == "performance":
+        # WAL: leitores não bloqueiam o escritor. Com WAL, synchronous=NORMAL não corrompe
+        # o banco (uma queda de energia pode perder só os últimos commits). O mmap evita
+        # copiar páginas nas leituras; transações IMMEDIATE pegam o lock de escrita logo no
+        # BEGIN, e o timeout espera o lock em vez de falhar com "database is locked".
+        default_db_config["OPTIONS"] = {
+            "init_command": ";".join(
+                (
+                    "PRAGMA journal_mode=WAL",
+                    "PRAGMA synchronous=NORMAL",
+                    f"PRAGMA mmap_size={int(os.getenv('DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+                    "PRAGMA temp_store=MEMORY",
+                )
+            ),
+            "transaction_mode": "IMMEDIATE",
+            "timeout": float(os.getenv("DB_BUSY_TIMEOUT", "20")),
+        }
 else:
     default_db_config = {
         "ENGINE": default_db_engine,
@@ -97,12 +159,60 @@ else:
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
     }
+    if DB_PROFILE == "performance":
+        # Tempo máximo por comando no servidor (0 desliga; migrações longas podem precisar).
+        statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+        default_db_config["OPTIONS"] = {"options": f"-c statement_timeout={statement_timeout}"}
+        if os.getenv("DB_POOL", "").lower() in ("1", "true", "yes"):
+            # Pool do psycopg 3 (requer psycopg[pool]); incompatível com CONN_MAX_AGE.
+            default_db_config["OPTIONS"]["pool"] = {
+                "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+                "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+                "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            }
+        else:
+            # Conexões persistentes por thread, verificadas antes de reutilizar.
+            default_db_config["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+            default_db_config["CONN_HEALTH_CHECKS"] = True
 
 DATABASES = {
     "default": default_db_config
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND: "locmem" (padrão, um por processo), "file" (diretório em CACHE_LOCATION)
+# ou "redis" (URL em CACHE_LOCATION, ex.: redis://localhost:6379/1; requer o pacote redis).
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+cache_backend = os.getenv("CACHE_BACKEND", "locmem").lower()
+if cache_backend not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND inválido: {cache_backend!r} (use {', '.join(CACHE_BACKENDS)})."
+    )
+default_cache_location = {"locmem": "api", "file": str(BASE_DIR / ".cache"), "redis": ""}
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[cache_backend],
+        "LOCATION": os.getenv("CACHE_LOCATION", default_cache_location[cache_backend]),
+    }
+}
+
+# Por quanto tempo (s) cada processo confia na versão de tabela guardada no cache. Com um
+# cache compartilhado a invalidação chega a todos na hora; o prazo só cobre corridas raras.
+TABLE_VERSION_CACHE_TIMEOUT = float(
+    os.getenv("TABLE_VERSION_CACHE_TIMEOUT", "1" if cache_backend == "locmem" else "60")
+)
+# Validade das respostas cacheadas das dimensões (as chaves já mudam a cada versão)
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv("API_RESPONSE_CACHE_TIMEOUT", "86400"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -2,6 +2,7 @@ from django.contrib import admin # Necessário para o painel Admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from api import views # Assumindo que seu aplicativo se chama 'api'
+from api.metrics import metrics_view
 
 # Cria um router e registra seus ViewSets
 router = DefaultRouter()
@@ -14,15 +15,22 @@ router.register(r'locais', views.DimLocalAtividadeViewSet)
 router.register(r'regimes', views.DimRegimeTrabalhoViewSet)
 router.register(r'tipos_req', views.DimTipoRequerimentoViewSet)
 router.register(r'riscos', views.DimRiskViewSet)
+router.register(r'dimensions', views.DimensionBundleViewSet, basename='dimensions')
 
 # === Rota do Fato ===
 router.register(r'requerimentos', views.FactRequerimentoViewSet)
 
+# === Exportação colunar (Parquet / Arrow) ===
+router.register(r'analytics', views.ColumnarExportViewSet, basename='analytics')
+
 # Configura as URLs
 urlpatterns = [
     # ROTA CORRIGIDA: Adiciona o painel de administração
     path('admin/', admin.site.urls), 
     
+    # Métricas por endpoint (formato Prometheus; só com API_METRICS ligado)
+    path('api/_metrics', metrics_view, name='api-metrics'),
+
     # Rota da API
     path('api/', include(router.urls)),
 ]